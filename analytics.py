@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Analytics for the Avtotemir masters dataset
+Loading, preprocessing and the derived metrics behind the dashboard, usable
+from other jobs without importing any plotting library
+
+Derived columns (district, experience_years, rating_category, ...) are
+computed on first use and kept on the DataFrame, so a metrics-only call
+pays only for the columns it actually reads:
+
+    df = analytics.load()
+    analytics.exp_rating(df)   # derives experience_years and experience_category only
+"""
+
+import os
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+INPUT_FILE = 'avtotemir_masters.csv'
+# Typed output of scraper.py crawl --parquet, preferred when present
+PARQUET_FILE = 'avtotemir_masters.parquet'
+
+ALL_BRANDS = 'Bütün markalar'
+BRANDS = ['Mercedes', 'BMW', 'Toyota', 'Lexus', 'Nissan', 'Hyundai', 'Kia', 'Audi', 'Volkswagen', 'Honda']
+# Brands that mark a provider as a brand specialist in the brand coverage chart
+SPECIALIST_BRANDS = ['Mercedes', 'BMW', 'Toyota', 'Lexus', 'Nissan', 'Hyundai', 'Kia']
+# One pass over car_brands finds every brand (matched case-insensitively as substrings)
+BRAND_PATTERN = re.compile('|'.join(re.escape(brand.lower()) for brand in BRANDS))
+
+# Low-cardinality text columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = ['position', 'location', 'car_brands']
+
+RATING_BINS = [0, 3.5, 4.0, 4.5, 5.0]
+RATING_LABELS = ['Below Average', 'Average', 'Good', 'Excellent']
+EXPERIENCE_BINS = [0, 5, 10, 20, 50]
+EXPERIENCE_LABELS = ['Entry (0-5 yrs)', 'Mid (6-10 yrs)', 'Senior (11-20 yrs)', 'Expert (20+ yrs)']
+VISIBILITY_BINS = [0, 1000, 5000, 20000, 100000]
+VISIBILITY_LABELS = ['Low', 'Medium', 'High', 'Very High']
+
+# Derived column -> (columns it is computed from, function computing it)
+DERIVED: Dict[str, Tuple[Tuple[str, ...], Callable[[pd.DataFrame], pd.Series]]] = {}
+
+
+def derived(name: str, *requires: str):
+    """Register the function computing a derived column"""
+    def register(func):
+        DERIVED[name] = (requires, func)
+        return func
+    return register
+
+
+def ensure(df: pd.DataFrame, *columns: str) -> pd.DataFrame:
+    """
+    Make sure derived columns exist on a DataFrame, computing missing ones
+
+    Dependencies are derived first and every computed column is kept, so
+    repeated calls are free.
+
+    Returns:
+        The same DataFrame, for chaining
+    """
+    for column in columns:
+        if column in df.columns or column not in DERIVED:
+            continue
+        requires, func = DERIVED[column]
+        ensure(df, *requires)
+        df[column] = func(df)
+    return df
+
+
+def source_columns(*columns: str, available: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Dataset columns needed to produce the given (possibly derived) columns
+
+    Args:
+        columns: Raw or derived column names
+        available: Columns stored in the dataset; derived columns found here are
+            read as they are instead of being derived again
+    """
+    available = set(available) if available is not None else set()
+    needed = []
+    for column in columns:
+        if column in DERIVED and column not in available:
+            extra = source_columns(*DERIVED[column][0], available=available)
+        else:
+            extra = [column]
+        needed.extend(c for c in extra if c not in needed)
+    return needed
+
+
+def load(path: Optional[str] = None, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Load the scraped masters dataset
+
+    Parquet files come with typed columns (numbers, dates, experience_years),
+    so nothing has to be re-parsed; CSV files are read as the scraper wrote them.
+
+    Args:
+        path: Parquet or CSV file (default: PARQUET_FILE if it exists, else INPUT_FILE)
+        columns: Columns (raw or derived) the caller needs; only the stored columns
+            behind them are read (default: all)
+    """
+    if path is None:
+        path = PARQUET_FILE if os.path.exists(PARQUET_FILE) else INPUT_FILE
+
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        stored = pq.read_schema(path).names
+        usecols = source_columns(*columns, available=stored) if columns is not None else None
+        df = pd.read_parquet(path, columns=[c for c in usecols if c in stored] if usecols else None)
+        for column in CATEGORICAL_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].astype('category')
+        return df
+
+    usecols = source_columns(*columns) if columns is not None else None
+    return pd.read_csv(path, usecols=usecols, dtype={column: 'category' for column in CATEGORICAL_COLUMNS})
+
+
+def preprocess(df: pd.DataFrame, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Compute derived columns up front
+
+    Metric functions derive what they need on their own; this is for callers
+    that want the whole prepared frame, e.g. to hand it to worker processes.
+
+    Args:
+        df: Loaded dataset
+        columns: Derived columns to compute (default: all whose source columns are present)
+    """
+    if columns is None:
+        columns = [name for name in DERIVED
+                   if all(c in df.columns for c in source_columns(name, available=df.columns))]
+    return ensure(df, *columns)
+
+
+# ============================================================================
+# Derived columns
+# ============================================================================
+
+def per_unique(series: pd.Series, func: Callable[[pd.Series], pd.Series]) -> pd.Series:
+    """
+    Apply a vectorised function to the distinct values of a column only
+
+    Scraped text columns repeat a few thousand values across all rows, so the
+    string work runs once per value and the results are broadcast back.
+    """
+    codes, uniques = pd.factorize(series)
+    if not len(uniques):
+        return pd.Series(None, index=series.index, dtype=object)
+    values = func(pd.Series(uniques)).to_numpy()
+    result = pd.Series(values.take(codes), index=series.index)
+    if (codes < 0).any():
+        result[codes < 0] = None
+    return result
+
+
+@derived('experience_years', 'experience')
+def _experience_years(df: pd.DataFrame) -> pd.Series:
+    # Years of experience are the first number in text like "15 il"
+    return per_unique(df['experience'],
+                      lambda s: pd.to_numeric(s.astype(str).str.extract(r'(\d+)', expand=False)))
+
+
+@derived('district', 'location')
+def _district(df: pd.DataFrame) -> pd.Series:
+    # The district is the last part of the location
+    districts = per_unique(df['location'], lambda s: s.astype(str).str.rsplit(',', n=1).str[-1].str.strip())
+    return districts.astype('category')
+
+
+@derived('added_at', 'added_date')
+def _added_at(df: pd.DataFrame) -> pd.Series:
+    # Typed Parquet output already holds dates; cache=True parses repeated CSV strings once
+    return pd.to_datetime(df['added_date'], errors='coerce', cache=True)
+
+
+@derived('year_joined', 'added_at')
+def _year_joined(df: pd.DataFrame) -> pd.Series:
+    return df['added_at'].dt.year
+
+
+@derived('month_joined', 'added_at')
+def _month_joined(df: pd.DataFrame) -> pd.Series:
+    return df['added_at'].dt.to_period('M')
+
+
+@derived('rating_category', 'rating')
+def _rating_category(df: pd.DataFrame) -> pd.Series:
+    return pd.cut(df['rating'], bins=RATING_BINS, labels=RATING_LABELS)
+
+
+@derived('experience_category', 'experience_years')
+def _experience_category(df: pd.DataFrame) -> pd.Series:
+    return pd.cut(df['experience_years'], bins=EXPERIENCE_BINS, labels=EXPERIENCE_LABELS)
+
+
+@derived('visibility_level', 'views')
+def _visibility_level(df: pd.DataFrame) -> pd.Series:
+    return pd.cut(df['views'], bins=VISIBILITY_BINS, labels=VISIBILITY_LABELS)
+
+
+@derived('all_brands', 'car_brands')
+def _all_brands(df: pd.DataFrame) -> pd.Series:
+    return per_unique(df['car_brands'], lambda s: s.str.contains(ALL_BRANDS, regex=False)).fillna(False).astype(bool)
+
+
+def brand_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """Boolean matrix of which BRANDS each provider's car_brands mentions (one column per brand)"""
+    car_brands = df['car_brands']
+    codes, uniques = pd.factorize(car_brands)
+
+    # Match all brands with a single regex over the distinct values, then mark them
+    found = pd.Series(uniques).str.lower().str.findall(BRAND_PATTERN).explode().dropna()
+    matrix = pd.DataFrame(False, index=range(len(uniques)), columns=BRANDS)
+    if len(found):
+        names = {brand.lower(): brand for brand in BRANDS}
+        for brand, positions in found.groupby(found.map(names)).groups.items():
+            matrix.loc[positions, brand] = True
+
+    rows = matrix.to_numpy().take(codes.clip(min=0), axis=0)
+    rows[codes < 0] = False
+    return pd.DataFrame(rows, index=car_brands.index, columns=BRANDS)
+
+
+# ============================================================================
+# Metrics
+# ============================================================================
+
+def district_counts(df: pd.DataFrame, top: Optional[int] = 15) -> pd.Series:
+    """Providers per district, largest first"""
+    counts = ensure(df, 'district')['district'].value_counts()
+    return counts.head(top) if top else counts
+
+
+def position_counts(df: pd.DataFrame, top: Optional[int] = 20) -> pd.Series:
+    """Providers per specialization, largest first"""
+    counts = df['position'].value_counts()
+    return counts.head(top) if top else counts
+
+
+def brand_distribution(df: pd.DataFrame) -> pd.Series:
+    """Providers supporting all brands vs specific brands"""
+    all_brands = ensure(df, 'all_brands')['all_brands']
+    return all_brands.map({True: 'All Brands', False: 'Specific Brands'}).value_counts()
+
+
+def brand_mentions(df: pd.DataFrame, top: int = 10) -> pd.Series:
+    """Specialists per car brand among providers that name specific brands"""
+    indicators = brand_indicators(df)
+    specialists = indicators[indicators[SPECIALIST_BRANDS].any(axis=1)]
+
+    mentions = specialists.sum()
+    mentions = mentions[mentions > 0].astype('int64')
+    return mentions.sort_values(ascending=False, kind='stable').head(top)
+
+
+def experience_category_counts(df: pd.DataFrame) -> pd.Series:
+    """Providers per experience band"""
+    return ensure(df, 'experience_category')['experience_category'].value_counts().sort_index()
+
+
+def rating_category_counts(df: pd.DataFrame) -> pd.Series:
+    """Providers per rating band"""
+    return ensure(df, 'rating_category')['rating_category'].value_counts().sort_index()
+
+
+def visibility_counts(df: pd.DataFrame) -> pd.Series:
+    """Providers per visibility level"""
+    return ensure(df, 'visibility_level')['visibility_level'].value_counts().sort_index()
+
+
+def year_counts(df: pd.DataFrame, first: int = 2015, last: int = 2025) -> pd.Series:
+    """New providers per year joined"""
+    years = ensure(df, 'year_joined')['year_joined']
+    return years[years.notna() & (years >= first) & (years <= last)].value_counts().sort_index()
+
+
+def exp_rating(df: pd.DataFrame) -> pd.DataFrame:
+    """Mean rating and provider count per experience band"""
+    ensure(df, 'experience_category')
+    return df.groupby('experience_category', observed=False)['rating'].agg(['mean', 'count']).sort_index()
+
+
+def conversion_by_visibility(df: pd.DataFrame) -> pd.DataFrame:
+    """Votes, views and votes-per-100-views per visibility level"""
+    ensure(df, 'visibility_level')
+    conversion = df.groupby('visibility_level', observed=False).agg({'votes': 'sum', 'views': 'sum'}).dropna()
+    conversion['conversion_rate'] = conversion['votes'] / conversion['views'] * 100
+    return conversion
+
+
+def district_metrics(df: pd.DataFrame, top: int = 12) -> pd.DataFrame:
+    """Mean rating, total votes and views and provider count for the largest districts"""
+    top_districts = district_counts(df, top).index
+    metrics = df[df['district'].isin(top_districts)].groupby('district', observed=True).agg({
+        'rating': 'mean',
+        'votes': 'sum',
+        'views': 'sum',
+        'id': 'count'
+    }).rename(columns={'id': 'provider_count'})
+    return metrics.sort_values('rating', ascending=True)
+
+
+# Columns summary() reads
+SUMMARY_COLUMNS = ['rating', 'experience_years', 'votes', 'views', 'district', 'position', 'all_brands']
+
+
+def summary(df: pd.DataFrame) -> Dict:
+    """Headline numbers for the whole dataset"""
+    districts = district_counts(df, top=1)
+    positions = position_counts(df, top=1)
+    all_brands = int(ensure(df, 'all_brands')['all_brands'].sum())
+    return {
+        'providers': len(df),
+        'average_rating': df['rating'].mean(),
+        'median_experience': ensure(df, 'experience_years')['experience_years'].median(),
+        'total_votes': df['votes'].sum(),
+        'total_views': df['views'].sum(),
+        'top_district': (districts.index[0], districts.iloc[0]),
+        'top_position': (positions.index[0], positions.iloc[0]),
+        'all_brands': all_brands,
+        'all_brands_share': all_brands / len(df) if len(df) else 0.0,
+    }
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Analytics preprocessing benchmark
+Times the vectorised preprocessing in analytics.py on a synthetic dataset
+(1M rows by default) against the original per-row implementations and
+checks that both produce the same values
+"""
+
+import argparse
+import re
+import sys
+import time
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+import analytics
+
+DISTRICTS = ['Xətai', 'Binəqədi', 'Nizami', 'Yasamal', 'Nərimanov', 'Səbail', 'Nəsimi',
+             'Suraxanı', 'Sabunçu', 'Qaradağ', 'Xəzər', 'Abşeron', 'Sumqayıt', 'Gəncə']
+POSITIONS = ['Çilingər', 'Mühərrik ustası', 'Elektrik', 'Rəngsaz', 'Diaqnostika', 'Sürətlər qutusu',
+             'Kondisioner ustası', 'Hibrid mühərrik ustası', 'Turbo təmiri', 'Şin təmiri']
+CAR_BRANDS = [analytics.ALL_BRANDS, 'Mercedes, BMW', 'Toyota, Lexus', 'Kia, Hyundai', 'Nissan',
+              'Audi, Volkswagen', 'Honda, Toyota', 'Mercedes-Benz', 'BMW, Audi, Volkswagen', 'Opel']
+
+
+def synthetic_dataset(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Masters CSV-shaped DataFrame with realistic value repetition"""
+    rng = np.random.default_rng(seed)
+    years = rng.integers(1, 46, rows)
+    experience = np.char.add(years.astype(str), ' il').astype(object)
+    experience[rng.random(rows) < 0.05] = None
+
+    return pd.DataFrame({
+        'id': np.arange(rows).astype(str),
+        'name': np.char.add('Usta ', rng.integers(0, 50000, rows).astype(str)),
+        'position': rng.choice(POSITIONS, rows),
+        'car_brands': rng.choice(CAR_BRANDS, rows),
+        'location': np.char.add('Bakı, ', rng.choice(DISTRICTS, rows)),
+        'rating': rng.integers(0, 51, rows) / 10,
+        'votes': rng.integers(0, 2000, rows),
+        'experience': experience,
+        'views': rng.integers(10, 90000, rows),
+        'added_date': pd.to_datetime(rng.integers(1420070400, 1760000000, rows), unit='s').strftime('%Y-%m-%d'),
+    })
+
+
+# The per-row implementations analytics.py used to have, kept as the reference
+
+def extract_years(exp_str):
+    if pd.isna(exp_str):
+        return None
+    match = re.search(r'(\d+)', str(exp_str))
+    return int(match.group(1)) if match else None
+
+
+def legacy_brand_mentions(df: pd.DataFrame) -> Dict[str, int]:
+    specific_brands_df = df[df['car_brands'].str.contains('|'.join(analytics.SPECIALIST_BRANDS),
+                                                           case=False, na=False)]
+    mentions = {}
+    for brands in specific_brands_df['car_brands'].dropna():
+        for brand in analytics.BRANDS:
+            if brand.lower() in brands.lower():
+                mentions[brand] = mentions.get(brand, 0) + 1
+    return mentions
+
+
+LEGACY: Dict[str, Callable[[pd.DataFrame], object]] = {
+    'experience_years': lambda df: df['experience'].apply(extract_years),
+    'district': lambda df: df['location'].str.split(',').str[-1].str.strip(),
+    'added_at': lambda df: pd.to_datetime(df['added_date'], errors='coerce'),
+    'all_brands': lambda df: df['car_brands'].str.contains(analytics.ALL_BRANDS, na=False),
+    'brand_mentions': legacy_brand_mentions,
+}
+
+VECTORISED: Dict[str, Callable[[pd.DataFrame], object]] = {
+    'experience_years': lambda df: analytics.ensure(df, 'experience_years')['experience_years'],
+    'district': lambda df: analytics.ensure(df, 'district')['district'],
+    'added_at': lambda df: analytics.ensure(df, 'added_at')['added_at'],
+    'all_brands': lambda df: analytics.ensure(df, 'all_brands')['all_brands'],
+    'brand_mentions': lambda df: analytics.brand_mentions(df, top=len(analytics.BRANDS)).to_dict(),
+}
+
+
+def timed(func: Callable, *args) -> Tuple[float, object]:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def same(a, b) -> bool:
+    if isinstance(a, dict):
+        return a == b
+    return pd.Series(a).astype(object).where(pd.Series(a).notna(), None).tolist() == \
+        pd.Series(b).astype(object).where(pd.Series(b).notna(), None).tolist()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark analytics preprocessing on synthetic data')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Synthetic rows (default: 1000000)')
+    parser.add_argument('--skip-legacy', action='store_true', help='Only time the vectorised implementation')
+    args = parser.parse_args(argv)
+
+    print(f"Generating {args.rows:,} synthetic rows...")
+    raw = synthetic_dataset(args.rows)
+    # Loaded the way analytics.load() reads the CSV
+    typed = raw.astype({column: 'category' for column in analytics.CATEGORICAL_COLUMNS})
+
+    print(f"\n{'step':<18} {'per-row s':>10} {'vectorised s':>13} {'speedup':>8}  output")
+    mismatches = 0
+    for step in VECTORISED:
+        new_time, new_result = timed(VECTORISED[step], typed)
+        if args.skip_legacy:
+            print(f"{step:<18} {'-':>10} {new_time:>13.3f} {'-':>8}")
+            continue
+
+        old_time, old_result = timed(LEGACY[step], raw.copy())
+        matches = same(old_result, new_result)
+        mismatches += not matches
+        print(f"{step:<18} {old_time:>10.3f} {new_time:>13.3f} {old_time / new_time:>7.1f}x  "
+              f"{'identical' if matches else 'DIFFERS'}")
+
+    full_time, _ = timed(analytics.preprocess, raw.astype({c: 'category' for c in analytics.CATEGORICAL_COLUMNS}))
+    print(f"\nFull preprocess() on {args.rows:,} rows: {full_time:.2f}s")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
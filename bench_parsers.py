@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Parser backend benchmark
+Times every parser backend over saved HTML fixtures and checks that all of
+them extract the same data as the original html.parser backend
+
+Fixture layout (as written by the recording transport):
+    fixtures/listings/page_<N>.json   - /all?page=N responses
+    fixtures/profiles/<slug>.html     - /usta/<slug> profile pages
+    fixtures/phones/<id>.html         - /contact-phone/<id>/master fragments
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from parsers import PARSERS, get_parser
+
+REFERENCE = 'html.parser'
+BASE_URL = 'https://avtotemir.az'
+
+
+def load_fixtures(directory: str) -> Dict[str, List[Tuple[str, str]]]:
+    """Load fixture documents grouped by kind as (name, text) pairs"""
+    fixtures = {'listings': [], 'profiles': [], 'phones': []}
+
+    for path in sorted(glob.glob(os.path.join(directory, 'listings', '*.json'))):
+        with open(path, encoding='utf-8') as f:
+            fixtures['listings'].append((os.path.basename(path), json.load(f).get('html', '')))
+
+    for kind in ('profiles', 'phones'):
+        for path in sorted(glob.glob(os.path.join(directory, kind, '*.html'))):
+            with open(path, encoding='utf-8') as f:
+                fixtures[kind].append((os.path.basename(path), f.read()))
+
+    return fixtures
+
+
+def parse_all(parser, fixtures: Dict[str, List[Tuple[str, str]]]) -> Dict[str, list]:
+    """Run one backend over every fixture"""
+    return {
+        'listings': [parser.parse_listing(html, BASE_URL) for _, html in fixtures['listings']],
+        'profiles': [
+            parser.parse_profile(html, name, os.path.splitext(name)[0])
+            for name, html in fixtures['profiles']
+        ],
+        'phones': [parser.parse_phones(html) for _, html in fixtures['phones']],
+    }
+
+
+def time_kind(parser, kind: str, documents: List[Tuple[str, str]], repeat: int) -> float:
+    """Average seconds per document for one kind of fixture"""
+    if not documents:
+        return 0.0
+
+    parse = {
+        'listings': lambda name, html: parser.parse_listing(html, BASE_URL),
+        'profiles': lambda name, html: parser.parse_profile(html, name, None),
+        'phones': lambda name, html: parser.parse_phones(html),
+    }[kind]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for name, html in documents:
+            parse(name, html)
+    return (time.perf_counter() - start) / (repeat * len(documents))
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(description='Benchmark HTML parser backends on saved fixtures')
+    arg_parser.add_argument('--fixtures', default='fixtures', help='Fixture directory (default: fixtures)')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='Passes over the fixtures per backend')
+    args = arg_parser.parse_args(argv)
+
+    fixtures = load_fixtures(args.fixtures)
+    if not any(fixtures.values()):
+        print(f"No fixtures found in {args.fixtures}/ - record some with replay.py first")
+        return 1
+
+    print(f"Fixtures: {len(fixtures['listings'])} listings, "
+          f"{len(fixtures['profiles'])} profiles, {len(fixtures['phones'])} phones\n")
+
+    reference = parse_all(get_parser(REFERENCE), fixtures)
+    baseline = None
+    mismatches = 0
+
+    print(f"{'backend':<12} {'listing ms':>11} {'profile ms':>11} {'phone ms':>9} {'speedup':>8}  output")
+    for name in PARSERS:
+        parser = get_parser(name)
+        timings = {kind: time_kind(parser, kind, docs, args.repeat) * 1000 for kind, docs in fixtures.items()}
+        if baseline is None:
+            baseline = timings['profiles']
+
+        output = parse_all(parser, fixtures)
+        matches = output == reference
+        mismatches += not matches
+        speedup = baseline / timings['profiles'] if timings['profiles'] else 0.0
+
+        print(f"{name:<12} {timings['listings']:>11.3f} {timings['profiles']:>11.3f} "
+              f"{timings['phones']:>9.3f} {speedup:>7.1f}x  {'identical' if matches else 'DIFFERS'}")
+
+        if not matches:
+            for kind in output:
+                for (doc_name, _), got, expected in zip(fixtures[kind], output[kind], reference[kind]):
+                    if got != expected:
+                        print(f"    {kind}/{doc_name}: {got!r} != {expected!r}")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Offline crawl benchmark
+Runs the scraper against a local fixture server and reports throughput and
+per-stage latency, so crawl changes can be measured without touching avtotemir.az
+"""
+
+import argparse
+import logging
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from replay import FixtureServer, classify_url
+from scraper import AvtotemirScraper
+from transport import TRANSPORTS
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class TimedScraper(AvtotemirScraper):
+    """Scraper that records the latency of every request by endpoint"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.pages_completed = 0
+        self._timing_lock = threading.Lock()
+
+    def _get(self, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super()._get(url, **kwargs)
+        finally:
+            with self._timing_lock:
+                self.latencies[classify_url(url) or 'other'].append(time.perf_counter() - start)
+
+    def complete_page(self, page: int):
+        super().complete_page(page)
+        self.pages_completed += 1
+
+
+def run(args) -> Dict:
+    """Run one benchmark crawl and collect its measurements"""
+    with FixtureServer(args.fixtures, latency=args.latency, error_rate=args.error_rate) as server:
+        scraper = TimedScraper(
+            workers=args.workers,
+            requests_per_second=args.rps,
+            keep_in_memory=False,
+            parser=args.parser,
+            base_url=server.url,
+            parse_processes=args.parse_processes,
+            transport=args.transport,
+            pool_size=args.pool_size
+        )
+        start = time.perf_counter()
+        scraper.scrape_all_pages(start_page=1, max_pages=args.max_pages)
+        elapsed = time.perf_counter() - start
+
+    return {
+        'elapsed': elapsed,
+        'pages': scraper.pages_completed,
+        'profiles': scraper.masters_count,
+        'latencies': scraper.latencies,
+        'transport': scraper.transport_stats(),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the scraper against recorded fixtures')
+    parser.add_argument('--fixtures', default='fixtures', help='Fixture directory (default: fixtures)')
+    parser.add_argument('--workers', type=int, default=4, help='Scraper workers (default: 4)')
+    parser.add_argument('--rps', type=float, default=0, help='Rate limit, 0 for unlimited (default: 0)')
+    parser.add_argument('--parser', default='lxml', help='HTML parser backend (default: lxml)')
+    parser.add_argument('--parse-processes', type=int, default=0,
+                        help='Profile parse processes, 0 parses on the download threads (default: 0)')
+    parser.add_argument('--transport', choices=TRANSPORTS, default='pooled',
+                        help='HTTP transport (default: pooled)')
+    parser.add_argument('--pool-size', type=int, default=None,
+                        help='Connections kept open per host (default: the maximum requests in flight)')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Simulated server latency in seconds (default: 0.05)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of requests answered with 503 (default: 0)')
+    parser.add_argument('--max-pages', type=int, default=1000, help='Maximum number of pages to crawl')
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    result = run(args)
+    elapsed = result['elapsed']
+
+    print(f"Workers: {args.workers}  parse processes: {args.parse_processes}  parser: {args.parser}  latency: {args.latency * 1000:.0f} ms  "
+          f"error rate: {args.error_rate:.0%}")
+    print(f"Wall time: {elapsed:.2f}s")
+    print(f"Pages:    {result['pages']:>6}  ({result['pages'] / elapsed:.2f} pages/sec)")
+    print(f"Profiles: {result['profiles']:>6}  ({result['profiles'] / elapsed:.2f} profiles/sec)\n")
+
+    print(f"{'stage':<10} {'requests':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for stage in ('listing', 'profile', 'phone', 'other'):
+        values = result['latencies'].get(stage)
+        if values:
+            print(f"{stage:<10} {len(values):>9} {percentile(values, 50) * 1000:>9.1f} "
+                  f"{percentile(values, 95) * 1000:>9.1f}")
+
+    transport = result['transport']
+    print(f"\nTransport: {transport['transport']}  connections opened: {transport['connections_opened']}  "
+          f"requests: {transport['requests']}  ({transport['requests_per_connection'] or '-'} per connection)")
+
+    return 0 if result['profiles'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Durable crawl checkpoints for the Avtotemir.az scraper
+Lets an interrupted crawl resume without re-fetching finished pages or masters
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlCheckpoint:
+    """
+    Incrementally written crawl state
+
+    The checkpoint directory holds two files:
+        state.json    - last contiguous completed page plus pages finished out of order
+        records.jsonl - one scraped master per line, appended as soon as it is collected
+    """
+
+    STATE_FILE = 'state.json'
+    RECORDS_FILE = 'records.jsonl'
+
+    def __init__(self, directory: str = 'checkpoint'):
+        """
+        Args:
+            directory: Directory holding the checkpoint files
+        """
+        self.directory = directory
+        self.state_path = os.path.join(directory, self.STATE_FILE)
+        self.records_path = os.path.join(directory, self.RECORDS_FILE)
+
+        self.last_completed_page = 0
+        self.completed_pages = set()
+        self.scraped_keys = set()
+
+        self._lock = threading.Lock()
+        self._records_file = None
+
+    @staticmethod
+    def master_key(master: Dict) -> str:
+        """Key identifying a master, falling back to the URL when the ID is unknown"""
+        return str(master.get('id') or master.get('url'))
+
+    def reset(self, start_page: int = 1):
+        """
+        Discard any previous checkpoint and start a fresh one
+
+        Args:
+            start_page: First page of the new crawl
+        """
+        self.close()
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.last_completed_page = start_page - 1
+        self.completed_pages = set()
+        self.scraped_keys = set()
+        self._write_state()
+
+    def load(self, keep_records: bool = True) -> List[Dict]:
+        """
+        Load a previous checkpoint
+
+        Args:
+            keep_records: Return the collected records; when False only their keys are loaded
+
+        Returns:
+            Records collected before the interruption
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        records = []
+
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding='utf-8') as f:
+                state = json.load(f)
+            self.last_completed_page = state.get('last_completed_page', 0)
+            self.completed_pages = set(state.get('completed_pages', []))
+
+        for record in self.iter_records():
+            key = self.master_key(record)
+            if key not in self.scraped_keys:
+                self.scraped_keys.add(key)
+                if keep_records:
+                    records.append(record)
+
+        logger.info(
+            f"Loaded checkpoint: {len(self.scraped_keys)} masters, last completed page {self.last_completed_page}"
+        )
+        return records
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Stream the records stored in the checkpoint"""
+        if not os.path.exists(self.records_path):
+            return
+
+        with open(self.records_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash may leave the last line half-written
+                    logger.warning("Skipping truncated checkpoint record")
+
+    def is_scraped(self, master: Dict) -> bool:
+        """Check whether a listing entry was already scraped"""
+        return self.master_key(master) in self.scraped_keys
+
+    def add_record(self, master_data: Dict):
+        """Append a scraped master to the checkpoint"""
+        with self._lock:
+            if self._records_file is None:
+                self._records_file = open(self.records_path, 'a', encoding='utf-8')
+            self._records_file.write(json.dumps(master_data, ensure_ascii=False) + '\n')
+            self._records_file.flush()
+            self.scraped_keys.add(self.master_key(master_data))
+
+    def complete_page(self, page: int):
+        """Mark a page as fully scraped and persist the crawl state"""
+        with self._lock:
+            self.completed_pages.add(page)
+            # Advance the watermark over pages that finished out of order
+            while self.last_completed_page + 1 in self.completed_pages:
+                self.last_completed_page += 1
+                self.completed_pages.discard(self.last_completed_page)
+
+            if self._records_file:
+                os.fsync(self._records_file.fileno())
+            self._write_state()
+
+    def resume_page(self, start_page: int) -> int:
+        """First page that still needs to be crawled"""
+        return max(start_page, self.last_completed_page + 1)
+
+    def _write_state(self):
+        """Atomically replace the state file"""
+        state = {
+            'last_completed_page': self.last_completed_page,
+            'completed_pages': sorted(self.completed_pages),
+            'masters': len(self.scraped_keys),
+            'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+    def close(self):
+        """Flush and close the records file"""
+        with self._lock:
+            if self._records_file:
+                self._records_file.flush()
+                os.fsync(self._records_file.fileno())
+                self._records_file.close()
+                self._records_file = None
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Dead-letter queue for the Avtotemir.az scraper
+Listing pages, profiles and phone lookups that still fail after all retries are
+persisted here so they can be re-processed on their own instead of re-running the crawl
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def failure_attempts(error: Exception) -> int:
+    """Number of attempts the request scheduler made before giving up"""
+    attempts = getattr(error, 'attempts', None)
+    if attempts is None:
+        attempts = getattr(getattr(error, 'response', None), 'attempts', None)
+    return attempts or 1
+
+
+class DeadLetterQueue:
+    """
+    Append-only JSON Lines file of failed work items
+
+    Each entry records the kind of work ('listing', 'profile' or 'phone'), the URL and
+    master ID, the listing location, the error type and message, the total
+    number of attempts and, for phone failures, the profile record the phones
+    belong to.
+    """
+
+    def __init__(self, path: str = 'dead_letters.jsonl'):
+        """
+        Args:
+            path: JSON Lines file holding failed items
+        """
+        self.path = path
+        self.retrying_path = path + '.retrying'
+        self.count = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def entry_key(entry: Dict) -> str:
+        """Key identifying a failed item, so repeated failures are kept once"""
+        return f"{entry['kind']}:{entry.get('id') or entry.get('url')}"
+
+    def add(self, kind: str, url: str, master_id: Optional[str], error: Exception,
+            location: str = '', record: Optional[Dict] = None, previous_attempts: int = 0):
+        """
+        Persist a failed item
+
+        Args:
+            kind: 'listing', 'profile' or 'phone'
+            url: URL that failed
+            master_id: Master's ID
+            error: Exception raised for the failed request
+            location: Location from the listing page
+            record: Profile record a failed phone lookup belongs to
+            previous_attempts: Attempts made by earlier runs for this item
+        """
+        entry = {
+            'kind': kind,
+            'url': url,
+            'id': master_id,
+            'location': location,
+            'error_type': type(error).__name__,
+            'error': str(error),
+            'attempts': previous_attempts + failure_attempts(error),
+            'failed_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        if record is not None:
+            entry['record'] = record
+
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.count += 1
+
+    def _read(self, path: str) -> List[Dict]:
+        if not os.path.exists(path):
+            return []
+
+        entries = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping truncated entry in {path}")
+        return entries
+
+    def load(self) -> List[Dict]:
+        """
+        Load failed items, latest entry per item
+
+        Items left over from an interrupted retry run are included.
+        """
+        latest = {}
+        for entry in self._read(self.retrying_path) + self._read(self.path):
+            latest[self.entry_key(entry)] = entry
+        return list(latest.values())
+
+    def begin_retry(self) -> List[Dict]:
+        """
+        Take every failed item out of the queue for re-processing
+
+        Items that fail again are re-added through add(); call finish_retry()
+        once all of them have been processed.
+        """
+        with self._lock:
+            entries = self.load()
+            tmp_path = self.retrying_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            os.replace(tmp_path, self.retrying_path)
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        return entries
+
+    def finish_retry(self):
+        """Drop the items taken by begin_retry()"""
+        with self._lock:
+            if os.path.exists(self.retrying_path):
+                os.remove(self.retrying_path)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Incremental crawl state for the Avtotemir.az scraper
+Remembers every master's profile fingerprint between runs so unchanged
+profiles are neither re-parsed nor have their phones re-fetched
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Counters that change on almost every visit; they do not warrant a phone re-fetch
+VOLATILE_FIELDS = ('views', 'votes', 'rating', 'phone_numbers')
+
+
+def content_fingerprint(master_data: Dict) -> str:
+    """Hash of a master's stable fields (everything except view/vote counters and phones)"""
+    stable = {k: v for k, v in master_data.items() if k not in VOLATILE_FIELDS}
+    payload = json.dumps(stable, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def body_fingerprint(content: bytes) -> str:
+    """Hash of a raw profile response body"""
+    return hashlib.sha1(content).hexdigest()
+
+
+class ProfileStateStore:
+    """
+    Per-master state persisted between crawls
+
+    Each entry is keyed by master ID (or URL when the ID is unknown) and holds
+    the profile URL, response validators (ETag / Last-Modified), the body and
+    content fingerprints and the last scraped record.
+    """
+
+    def __init__(self, path: str = 'crawl_state.json'):
+        """
+        Args:
+            path: JSON file holding the state
+        """
+        self.path = path
+        self.entries = {}
+
+        self._seen = {}
+        self._delta = {'added': [], 'changed': [], 'removed': []}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def master_key(master: Dict) -> str:
+        """Key identifying a master, falling back to the URL when the ID is unknown"""
+        return str(master.get('id') or master.get('url'))
+
+    def load(self):
+        """Load state from the previous crawl, if any"""
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f).get('masters', {})
+        logger.info(f"Loaded incremental state for {len(self.entries)} masters")
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """Conditional request headers for a profile, from validators the server sent last time"""
+        entry = self.entries.get(key)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def reuse(self, key: str, response) -> Optional[Dict]:
+        """
+        Return the previous record if the profile response shows it is unchanged
+
+        Args:
+            key: Master key
+            response: Profile page response (may be 304 Not Modified)
+
+        Returns:
+            Copy of the previous record, or None when the profile must be re-parsed
+        """
+        entry = self.entries.get(key)
+        fingerprint = None if response.status_code == 304 else body_fingerprint(response.content)
+
+        with self._lock:
+            self._seen[key] = {
+                'etag': response.headers.get('ETag') or (entry or {}).get('etag'),
+                'last_modified': response.headers.get('Last-Modified') or (entry or {}).get('last_modified'),
+                'fingerprint': fingerprint or (entry or {}).get('fingerprint'),
+            }
+
+        if not entry:
+            return None
+        if response.status_code == 304 or fingerprint == entry.get('fingerprint'):
+            return copy.deepcopy(entry['record'])
+        return None
+
+    def needs_phone_lookup(self, master_data: Dict) -> bool:
+        """
+        New masters, masters whose stable content changed and masters stored
+        without phone numbers (a --skip-phones run or a failed lookup) get their
+        phones re-fetched
+        """
+        entry = self.entries.get(self.master_key(master_data))
+        if not entry or not entry.get('record', {}).get('phone_numbers'):
+            return True
+        return entry.get('content_fingerprint') != content_fingerprint(master_data)
+
+    def previous_phones(self, key: str) -> List[str]:
+        """Phone numbers recorded for a master in the previous crawl"""
+        entry = self.entries.get(key) or {}
+        return list(entry.get('record', {}).get('phone_numbers', []))
+
+    def observe(self, master_data: Dict):
+        """Record a collected master and classify it as added, changed or unchanged"""
+        key = self.master_key(master_data)
+        entry = self.entries.get(key)
+
+        with self._lock:
+            seen = self._seen.setdefault(key, {})
+            seen['url'] = master_data.get('url')
+            seen['content_fingerprint'] = content_fingerprint(master_data)
+            seen['record'] = master_data
+
+            if not entry:
+                self._delta['added'].append(master_data)
+                return
+
+            previous = entry.get('record', {})
+            changes = {
+                field: [previous.get(field), value]
+                for field, value in master_data.items()
+                if previous.get(field) != value
+            }
+            if changes:
+                self._delta['changed'].append({'id': master_data.get('id'), 'changes': changes})
+
+    def finish(self, complete: bool) -> Dict:
+        """
+        Fold this crawl's observations into the state and build the delta
+
+        Args:
+            complete: Whether the crawl reached the end of the listings; masters
+                missing from an incomplete crawl are not reported as removed
+
+        Returns:
+            Delta with 'added', 'changed' and 'removed' masters
+        """
+        with self._lock:
+            observed = {k: v for k, v in self._seen.items() if 'record' in v}
+
+            if complete:
+                self._delta['removed'] = sorted(k for k in self.entries if k not in observed)
+                self.entries = {}
+
+            for key, seen in observed.items():
+                self.entries[key] = seen
+
+            self._seen = {}
+            delta = self._delta
+            self._delta = {'added': [], 'changed': [], 'removed': []}
+
+        logger.info(
+            f"Delta: {len(delta['added'])} added, {len(delta['changed'])} changed, "
+            f"{len(delta['removed'])} removed"
+        )
+        return delta
+
+    def save(self):
+        """Atomically write the state file"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'masters': self.entries,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        logger.info(f"Incremental state saved to {self.path}")
+
+
+def save_delta(delta: Dict, filename: str = 'avtotemir_masters_delta.json'):
+    """Save a crawl delta to a JSON file"""
+    try:
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(delta, f, ensure_ascii=False, indent=2)
+        logger.info(f"Delta saved to {filename}")
+    except Exception as e:
+        logger.error(f"Error saving delta: {e}")
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Image gallery downloads for the Avtotemir.az scraper
+Downloads the #master_gallery images of scraped masters in background
+threads, stores every distinct file once by content hash, resumes partial
+transfers, skips unchanged images and writes thumbnails in a process pool
+
+Layout:
+    <dir>/media.db                   - SQLite index: image URLs, their file, ETag and size,
+                                       and which master shows which image
+    <dir>/files/<ab>/<sha256>.<ext>  - image files, one per distinct content
+    <dir>/thumbs/<ab>/<sha256>.jpg   - thumbnails (requires Pillow)
+    <dir>/partial/<url hash>.part    - interrupted transfers, resumed with HTTP Range requests
+"""
+
+import argparse
+import hashlib
+import logging
+import mimetypes
+import multiprocessing
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scheduler import RETRY_STATUSES, TokenBucket
+from sinks import iter_latest_records
+
+try:
+    from PIL import Image
+except ImportError:  # thumbnails are optional
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    url TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_type TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_images_hash ON images(hash);
+
+CREATE TABLE IF NOT EXISTS master_images (
+    master_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (master_id, idx)
+);
+CREATE INDEX IF NOT EXISTS idx_master_images_url ON master_images(url);
+"""
+
+CHUNK_SIZE = 64 * 1024
+
+# Marks the end of the download queue
+_DONE = object()
+
+
+def retryable(error: Exception) -> bool:
+    """Whether another attempt may succeed: dropped or timed-out transfers, throttling and 5xx responses"""
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in RETRY_STATUSES
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError))
+
+
+def make_thumbnail(source: str, destination: str, size: int) -> bool:
+    """Write a JPEG thumbnail no larger than size x size (runs in a worker process)"""
+    with Image.open(source) as image:
+        image.thumbnail((size, size))
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        tmp_path = destination + '.tmp'
+        image.save(tmp_path, 'JPEG', quality=85)
+    os.replace(tmp_path, destination)
+    return True
+
+
+class MediaDownloader:
+    """
+    Sink downloading the gallery images of every master written to it
+
+    write() only queues the image URLs, so the crawl never waits for image
+    I/O; downloads run on their own threads, session, connection pool and
+    rate limit. close() waits for the queued downloads and thumbnails.
+    """
+
+    def __init__(self, directory: str = 'media', workers: int = 4, requests_per_second: float = 4.0,
+                 thumbnail_size: Optional[int] = 256, thumbnail_processes: int = 1,
+                 base_url: str = 'https://avtotemir.az', max_attempts: int = 3):
+        """
+        Args:
+            directory: Media directory
+            workers: Concurrent downloads (also the connection pool size)
+            requests_per_second: Rate limit of the image requests (0 disables it)
+            thumbnail_size: Longest thumbnail side in pixels (None disables thumbnails)
+            thumbnail_processes: Processes writing thumbnails
+            base_url: Site relative image URLs belong to (also sent as Referer)
+            max_attempts: Attempts per image; each retry resumes the partial transfer
+        """
+        self.directory = directory
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.thumbnail_size = thumbnail_size if Image is not None else None
+        if thumbnail_size and Image is None:
+            logger.warning("Pillow is not installed; images are downloaded without thumbnails")
+        for subdirectory in ('files', 'thumbs', 'partial'):
+            os.makedirs(os.path.join(directory, subdirectory), exist_ok=True)
+
+        self.conn = sqlite3.connect(os.path.join(directory, 'media.db'), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'User-Agent': 'Mozilla/5.0 (compatible; avtotemir-media)'})
+        self.base_url = base_url.rstrip('/') + '/'
+        self.session.headers['Referer'] = self.base_url
+        self.bucket = TokenBucket(requests_per_second)
+
+        self.stats = {'queued': 0, 'downloaded': 0, 'resumed': 0, 'unchanged': 0, 'duplicates': 0,
+                      'failed': 0, 'bytes': 0, 'thumbnails': 0}
+        self._stats_lock = threading.Lock()
+        self._seen = set()
+        self._queue: queue.Queue = queue.Queue()
+        self._thumbnails = []
+        # Spawned, not forked: processes start from a download thread while other threads run
+        self._pool = (ProcessPoolExecutor(max_workers=max(1, thumbnail_processes),
+                                          mp_context=multiprocessing.get_context('spawn'))
+                      if self.thumbnail_size else None)
+        self._threads = [
+            threading.Thread(target=self._download_worker, name=f'media-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        self._closed = False
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def write(self, master: Dict):
+        """Queue a master's gallery images (never blocks on downloads)"""
+        master_id = master.get('id')
+        urls = [urljoin(self.base_url, url) for url in master.get('images') or [] if url]
+        if not master_id or not urls:
+            return
+        with self._db_lock:
+            with self.conn:
+                self.conn.execute('DELETE FROM master_images WHERE master_id = ?', (str(master_id),))
+                self.conn.executemany(
+                    'INSERT INTO master_images (master_id, idx, url) VALUES (?, ?, ?)',
+                    [(str(master_id), i, url) for i, url in enumerate(urls)]
+                )
+        for url in urls:
+            # The same image shown by several masters is fetched once per run
+            with self._stats_lock:
+                if url in self._seen:
+                    continue
+                self._seen.add(url)
+                self.stats['queued'] += 1
+            self._queue.put(url)
+
+    def flush(self):
+        """Nothing to do: downloads proceed in the background"""
+
+    def close(self):
+        """Wait for queued downloads and thumbnails, then close the index"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(_DONE)
+        for thread in self._threads:
+            thread.join()
+        for future in self._thumbnails:
+            try:
+                if future.result():
+                    self._count('thumbnails')
+            except Exception as e:
+                logger.warning(f"Thumbnail failed: {e}")
+        if self._pool:
+            self._pool.shutdown()
+        self.session.close()
+        with self._db_lock:
+            self.conn.close()
+        logger.info(f"Media: {self.stats}")
+
+    def _download_worker(self):
+        while True:
+            url = self._queue.get()
+            if url is _DONE:
+                return
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    self.download(url)
+                    break
+                except (requests.RequestException, OSError) as e:
+                    if not retryable(e) or attempt == self.max_attempts:
+                        logger.warning(f"Image download failed after {attempt} attempt(s): {url}: {e}")
+                        self._count('failed')
+                        break
+                    time.sleep(attempt)
+                except Exception as e:
+                    # Index or thumbnail errors: count the image as failed and keep the thread alive
+                    logger.exception(f"Image download failed: {url}: {e}")
+                    self._count('failed')
+                    break
+
+    def _known(self, url: str) -> Optional[Tuple[str, int, Optional[str], Optional[str], str]]:
+        with self._db_lock:
+            return self.conn.execute(
+                'SELECT path, size, etag, last_modified, hash FROM images WHERE url = ?', (url,)
+            ).fetchone()
+
+    def _unchanged(self, url: str, known) -> bool:
+        """Compare a stored image with the server's ETag, or its size and Last-Modified"""
+        path, size, etag, last_modified, _ = known
+        if not os.path.exists(os.path.join(self.directory, path)):
+            return False
+        self.bucket.acquire()
+        response = self.session.head(url, timeout=30, allow_redirects=True)
+        if response.status_code >= 400:
+            # Servers without HEAD support: fall back to a full download
+            return False
+        if etag and response.headers.get('ETag'):
+            return response.headers['ETag'] == etag
+        length = response.headers.get('Content-Length')
+        return (length is not None and int(length) == size
+                and response.headers.get('Last-Modified') == last_modified)
+
+    def _partial_path(self, url: str) -> str:
+        return os.path.join(self.directory, 'partial', hashlib.sha1(url.encode()).hexdigest() + '.part')
+
+    def download(self, url: str):
+        """Download one image unless the stored copy is unchanged, resuming a partial transfer"""
+        known = self._known(url)
+        if known and self._unchanged(url, known):
+            self._count('unchanged')
+            return
+
+        partial = self._partial_path(url)
+        offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+        headers = {}
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+            etag = self._partial_etag(partial)
+            if etag:
+                # The server sends the whole image instead if it changed since the partial transfer
+                headers['If-Range'] = etag
+
+        self.bucket.acquire()
+        with self.session.get(url, headers=headers, stream=True, timeout=60) as response:
+            if response.status_code == 416:
+                # Range beyond the end: the partial file is already complete
+                response.close()
+            else:
+                response.raise_for_status()
+                resumed = response.status_code == 206
+                if resumed:
+                    self._count('resumed')
+                else:
+                    offset = 0
+                if response.headers.get('ETag'):
+                    self._save_partial_etag(partial, response.headers['ETag'])
+                with open(partial, 'ab' if resumed else 'wb') as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        self._count('bytes', len(chunk))
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip() or None
+
+        self._store(url, partial, etag, last_modified, content_type)
+
+    @staticmethod
+    def _partial_etag(partial: str) -> Optional[str]:
+        try:
+            with open(partial + '.etag', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _save_partial_etag(partial: str, etag: str):
+        with open(partial + '.etag', 'w', encoding='utf-8') as f:
+            f.write(etag)
+
+    def _store(self, url: str, partial: str, etag: Optional[str], last_modified: Optional[str],
+               content_type: Optional[str]):
+        """Move a finished transfer to its content-addressed path and index it"""
+        digest = hashlib.sha256()
+        with open(partial, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+        size = os.path.getsize(partial)
+
+        extension = os.path.splitext(urlparse(url).path)[1].lower()
+        if not extension or len(extension) > 5:
+            extension = mimetypes.guess_extension(content_type or '') or '.bin'
+        path = os.path.join('files', content_hash[:2], content_hash + extension)
+        full_path = os.path.join(self.directory, path)
+
+        if os.path.exists(full_path):
+            # Same bytes already stored for another URL or master
+            os.remove(partial)
+            self._count('duplicates')
+        else:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.replace(partial, full_path)
+            self._count('downloaded')
+        if os.path.exists(partial + '.etag'):
+            os.remove(partial + '.etag')
+
+        with self._db_lock:
+            with self.conn:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO images (url, hash, path, size, etag, last_modified, content_type, '
+                    'fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (url, content_hash, path, size, etag, last_modified, content_type, time.time())
+                )
+
+        if self._pool:
+            thumbnail = os.path.join(self.directory, 'thumbs', content_hash[:2], content_hash + '.jpg')
+            if not os.path.exists(thumbnail):
+                self._thumbnails.append(self._pool.submit(make_thumbnail, full_path, thumbnail,
+                                                          self.thumbnail_size))
+
+
+def download_all(masters: Iterable[Dict], **kwargs) -> Dict[str, int]:
+    """Download the gallery images of already scraped masters"""
+    downloader = MediaDownloader(**kwargs)
+    for master in masters:
+        downloader.write(master)
+    downloader.close()
+    return downloader.stats
+
+
+def main(argv=None) -> int:
+    """Download the images of a JSON Lines crawl output"""
+    parser = argparse.ArgumentParser(description='Download gallery images of scraped Avtotemir masters')
+    parser.add_argument('jsonl', nargs='?', default='avtotemir_masters.jsonl',
+                        help='Crawl output (default: avtotemir_masters.jsonl)')
+    parser.add_argument('--dir', default='media', help='Media directory (default: media)')
+    parser.add_argument('--base-url', default='https://avtotemir.az',
+                        help='Site relative image URLs belong to (default: https://avtotemir.az)')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent downloads (default: 4)')
+    parser.add_argument('--rps', type=float, default=4.0, help='Image requests per second (default: 4)')
+    parser.add_argument('--thumbnail-size', type=int, default=256,
+                        help='Longest thumbnail side, 0 disables thumbnails (default: 256)')
+    parser.add_argument('--thumbnail-processes', type=int, default=1,
+                        help='Processes writing thumbnails (default: 1)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    stats = download_all(
+        iter_latest_records(args.jsonl),
+        directory=args.dir,
+        base_url=args.base_url,
+        workers=args.workers,
+        requests_per_second=args.rps,
+        thumbnail_size=args.thumbnail_size or None,
+        thumbnail_processes=args.thumbnail_processes
+    )
+    return 0 if not stats['failed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Live crawl metrics for the Avtotemir.az scraper
+Counts requests, errors and pages, keeps latency and parse-time histograms and
+publishes them as a status JSON file and a Prometheus-style HTTP endpoint
+(/metrics for Prometheus, /status for the same JSON as the file)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PARSE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, as Prometheus exposes them"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, observations <= bound) pairs ending with +Inf"""
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile"""
+        if not self.count:
+            return None
+        for bound, total in self.cumulative():
+            if total >= q * self.count:
+                return bound
+        return None
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+        }
+
+
+def _label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _bound(value: float) -> str:
+    return '+Inf' if value == float('inf') else repr(value)
+
+
+class CrawlMetrics:
+    """
+    Thread-safe crawl metrics
+
+    The scraper reports requests, parses, errors and completed pages; queue
+    depths and scheduler state are read from the callables given to attach()
+    whenever a snapshot is taken.
+    """
+
+    def __init__(self, status_file: Optional[str] = 'crawl_status.json', status_interval: float = 2.0):
+        """
+        Args:
+            status_file: JSON file rewritten with the current status (None disables it)
+            status_interval: Minimum seconds between status file writes
+        """
+        self.status_file = status_file
+        self.status_interval = status_interval
+
+        self.started = time.time()
+        self.state = 'starting'
+        self.requests: Dict[str, int] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self.parse_time: Dict[str, Histogram] = {}
+        self.errors: Dict[str, int] = {}
+        self.pages_completed = 0
+        self.last_page = None
+        self.masters = 0
+        self.start_page = 1
+        self.end_page = None
+        self.total_pages = None
+
+        self._queue_depths: Optional[Callable[[], Dict[str, int]]] = None
+        self._scheduler_stats: Optional[Callable[[], Dict[str, float]]] = None
+        self._transport_stats: Optional[Callable[[], Dict]] = None
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def attach(self, queue_depths: Optional[Callable[[], Dict[str, int]]] = None,
+               scheduler_stats: Optional[Callable[[], Dict[str, float]]] = None,
+               transport_stats: Optional[Callable[[], Dict]] = None):
+        """Register live sources read on every snapshot"""
+        if queue_depths is not None:
+            self._queue_depths = queue_depths
+        if scheduler_stats is not None:
+            self._scheduler_stats = scheduler_stats
+        if transport_stats is not None:
+            self._transport_stats = transport_stats
+
+    def start(self, start_page: int, end_page: Optional[int] = None, total_pages: Optional[int] = None):
+        """
+        Mark the crawl as running
+
+        Args:
+            start_page: First page of this run
+            end_page: Last page that may be crawled (an upper bound when the end is auto-detected)
+            total_pages: Number of listing pages, when known
+        """
+        with self._lock:
+            self.state = 'running'
+            self.start_page = start_page
+            self.end_page = end_page
+            self.total_pages = total_pages
+        self.write_status(force=True)
+
+    def set_total_pages(self, total_pages: int):
+        """Record the number of listing pages once it is known (discovered or the end was reached)"""
+        with self._lock:
+            self.total_pages = total_pages
+            if self.end_page is None or total_pages < self.end_page:
+                self.end_page = total_pages
+        self.write_status(force=True)
+
+    def observe_request(self, endpoint: str, seconds: float, error: Optional[str] = None):
+        """Count a request and its latency; error is the exception type or 'HTTP <status>'"""
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.latency.setdefault(endpoint, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            if error:
+                key = f"{endpoint}:{error}"
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def observe_parse(self, kind: str, seconds: float):
+        """Record the time spent parsing one document"""
+        with self._lock:
+            self.parse_time.setdefault(kind, Histogram(PARSE_BUCKETS)).observe(seconds)
+
+    def page_completed(self, page: int, masters: int):
+        """Count a completed listing page"""
+        with self._lock:
+            self.pages_completed += 1
+            self.last_page = page if self.last_page is None else max(self.last_page, page)
+            self.masters = masters
+        self.write_status()
+
+    def finish(self, masters: int):
+        """Mark the crawl as finished and write the final status"""
+        with self._lock:
+            self.state = 'finished'
+            self.masters = masters
+        self.write_status(force=True)
+
+    def _remaining_pages(self) -> Optional[int]:
+        if self.total_pages is not None:
+            return max(0, self.total_pages - (self.start_page - 1) - self.pages_completed)
+        if self.end_page is not None:
+            return max(0, self.end_page - (self.start_page - 1) - self.pages_completed)
+        return None
+
+    def snapshot(self) -> Dict:
+        """Current metrics as a JSON-serialisable dictionary"""
+        queue_depths = self._queue_depths() if self._queue_depths else {}
+        scheduler = self._scheduler_stats() if self._scheduler_stats else {}
+        transport = self._transport_stats() if self._transport_stats else {}
+
+        with self._lock:
+            elapsed = time.time() - self.started
+            pages_per_second = self.pages_completed / elapsed if elapsed > 0 else 0.0
+            remaining = self._remaining_pages()
+            eta = remaining / pages_per_second if remaining is not None and pages_per_second else None
+            if self.state == 'finished':
+                eta = 0
+            progress = None
+            if self.total_pages:
+                done = (self.start_page - 1) + self.pages_completed
+                progress = min(100.0, 100.0 * done / self.total_pages)
+
+            return {
+                'state': self.state,
+                'pid': os.getpid(),
+                'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'elapsed_seconds': round(elapsed, 1),
+                'pages_completed': self.pages_completed,
+                'last_page': self.last_page,
+                'total_pages': self.total_pages,
+                'progress_percent': round(progress, 1) if progress is not None else None,
+                'masters': self.masters,
+                'pages_per_second': round(pages_per_second, 3),
+                'masters_per_second': round(self.masters / elapsed, 3) if elapsed > 0 else 0.0,
+                'eta_seconds': round(eta) if eta is not None else None,
+                'requests': dict(self.requests),
+                'errors': dict(self.errors),
+                'latency': {endpoint: h.to_dict() for endpoint, h in self.latency.items()},
+                'parse_time': {kind: h.to_dict() for kind, h in self.parse_time.items()},
+                'queue_depths': queue_depths,
+                'scheduler': scheduler,
+                'transport': transport,
+            }
+
+    def write_status(self, force: bool = False):
+        """Rewrite the status file, at most once per status_interval unless forced"""
+        if not self.status_file:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_write < self.status_interval:
+                return
+            self._last_write = now
+
+        status = self.snapshot()
+        tmp_path = f"{self.status_file}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(status, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.status_file)
+        except OSError as e:
+            logger.warning(f"Could not write status file {self.status_file}: {e}")
+
+    def prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        status = self.snapshot()
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP avtotemir_{name} {help_text}")
+            lines.append(f"# TYPE avtotemir_{name} {kind}")
+
+        metric('requests_total', 'counter', 'Requests sent, by endpoint')
+        for endpoint, count in status['requests'].items():
+            lines.append(f'avtotemir_requests_total{{endpoint="{_label(endpoint)}"}} {count}')
+
+        metric('errors_total', 'counter', 'Failed requests, by endpoint and error type')
+        for key, count in status['errors'].items():
+            endpoint, _, error = key.partition(':')
+            lines.append(f'avtotemir_errors_total{{endpoint="{_label(endpoint)}",type="{_label(error)}"}} {count}')
+
+        with self._lock:
+            histograms = [
+                ('request_seconds', 'Request latency in seconds, by endpoint', 'endpoint', dict(self.latency)),
+                ('parse_seconds', 'Parse time per document in seconds, by document kind', 'kind',
+                 dict(self.parse_time)),
+            ]
+            for name, help_text, label, series in histograms:
+                metric(name, 'histogram', help_text)
+                for value, histogram in series.items():
+                    for bound, total in histogram.cumulative():
+                        lines.append(f'avtotemir_{name}_bucket{{{label}="{_label(value)}",le="{_bound(bound)}"}} {total}')
+                    lines.append(f'avtotemir_{name}_sum{{{label}="{_label(value)}"}} {histogram.sum}')
+                    lines.append(f'avtotemir_{name}_count{{{label}="{_label(value)}"}} {histogram.count}')
+
+        metric('queue_depth', 'gauge', 'Items waiting between pipeline stages')
+        for stage, depth in status['queue_depths'].items():
+            lines.append(f'avtotemir_queue_depth{{stage="{_label(stage)}"}} {depth}')
+
+        gauges = [
+            ('pages_completed', 'Listing pages completed in this run', status['pages_completed']),
+            ('masters', 'Masters collected', status['masters']),
+            ('pages_per_second', 'Average listing pages completed per second', status['pages_per_second']),
+            ('eta_seconds', 'Estimated seconds until the crawl finishes', status['eta_seconds']),
+            ('total_pages', 'Number of listing pages', status['total_pages']),
+            ('concurrency_limit', 'Current adaptive concurrency limit', status['scheduler'].get('concurrency_limit')),
+            ('retries', 'Retried requests', status['scheduler'].get('retries')),
+            ('connections_opened', 'HTTP connections opened (TCP/TLS handshakes)',
+             status['transport'].get('connections_opened')),
+            ('transport_requests', 'Requests sent by the HTTP transport', status['transport'].get('requests')),
+        ]
+        for name, help_text, value in gauges:
+            if value is not None:
+                metric(name, 'gauge', help_text)
+                lines.append(f'avtotemir_{name} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Local HTTP endpoint serving /metrics (Prometheus text) and /status (JSON)"""
+
+    def __init__(self, metrics: CrawlMetrics, host: str = '127.0.0.1', port: int = 9108):
+        """
+        Args:
+            metrics: Metrics to publish
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.metrics = metrics
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.url = f'http://{host}:{self.httpd.server_address[1]}'
+        self._thread = None
+
+    def _handler(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def do_GET(self):
+                path = self.path.split('?')[0].rstrip('/')
+                if path == '/metrics':
+                    body = metrics.prometheus().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif path in ('', '/status'):
+                    body = json.dumps(metrics.snapshot(), ensure_ascii=False).encode('utf-8')
+                    content_type = 'application/json'
+                else:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self) -> 'MetricsServer':
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+        logger.info(f"Serving metrics at {self.url}/metrics")
+        return self
+
+    def stop(self):
+        """Stop the server"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -1,5 +1,11 @@
 #!/bin/bash
 # Monitor scraper progress
+#
+# Reads the status file the scraper rewrites while it crawls (crawl_status.json,
+# see --status-file), or the /status endpoint when METRICS_URL is set, e.g.
+#   METRICS_URL=http://127.0.0.1:9108 ./monitor.sh   (crawl started with --metrics-port 9108)
+
+STATUS_FILE=${STATUS_FILE:-crawl_status.json}
 
 echo "======================================="
 echo "  Avtotemir.az Scraper Monitor"
@@ -21,25 +27,66 @@ fi
 echo ""
 
 # Show current progress
-if [ -f scraper.log ]; then
-    echo "--- Recent Activity (last 10 lines) ---"
-    tail -10 scraper.log
-    echo ""
-
-    # Count completed pages
-    PAGES=$(grep "Completed page" scraper.log | tail -1)
-    if [ ! -z "$PAGES" ]; then
-        echo "--- Progress ---"
-        echo "$PAGES"
-    fi
+if [ -n "$METRICS_URL" ]; then
+    STATUS=$(curl -sf "$METRICS_URL/status")
+elif [ -f "$STATUS_FILE" ]; then
+    STATUS=$(cat "$STATUS_FILE")
+fi
 
-    # Count total masters
-    TOTAL=$(grep "Total masters scraped:" scraper.log | tail -1)
-    if [ ! -z "$TOTAL" ]; then
-        echo "$TOTAL"
-    fi
+if [ -n "$STATUS" ]; then
+    python3 - "$STATUS" <<'PY'
+import json, sys
+
+s = json.loads(sys.argv[1])
+
+def duration(seconds):
+    if seconds is None:
+        return 'unknown'
+    seconds = int(seconds)
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m {seconds % 60:02d}s"
+
+def ms(value):
+    return f"{value * 1000:.0f}" if value is not None else '-'
+
+print('--- Progress ---')
+total = f" of {s['total_pages']}" if s.get('total_pages') else ''
+progress = f" ({s['progress_percent']:.1f}%)" if s.get('progress_percent') is not None else ''
+print(f"State:      {s['state']} (updated {s['updated_at']})")
+print(f"Pages:      {s['pages_completed']} completed{total}{progress}, last page {s['last_page']}")
+print(f"Masters:    {s['masters']:,}")
+print(f"Throughput: {s['pages_per_second']:.2f} pages/s, {s['masters_per_second']:.2f} masters/s")
+print(f"Elapsed:    {duration(s['elapsed_seconds'])}   ETA: {duration(s['eta_seconds'])}")
+
+print()
+print('--- Requests ---')
+print(f"{'endpoint':<10} {'requests':>9} {'mean ms':>8} {'p95 ms':>8} {'parse ms':>9}")
+for endpoint, count in s['requests'].items():
+    latency = s['latency'].get(endpoint, {})
+    parse = s['parse_time'].get(endpoint, {})
+    print(f"{endpoint:<10} {count:>9} {ms(latency.get('mean')):>8} {ms(latency.get('p95')):>8} "
+          f"{ms(parse.get('mean')):>9}")
+
+if s['errors']:
+    print()
+    print('--- Errors ---')
+    for key, count in sorted(s['errors'].items(), key=lambda item: -item[1]):
+        print(f"{key:<30} {count:>6}")
+
+print()
+if s['queue_depths']:
+    print('Queues:     ' + ', '.join(f"{stage} {depth}" for stage, depth in s['queue_depths'].items()))
+scheduler = s.get('scheduler') or {}
+if scheduler:
+    print('Scheduler:  ' + ', '.join(f"{key} {value}" for key, value in scheduler.items()))
+transport = s.get('transport') or {}
+if transport:
+    versions = ', '.join(f"{version} {count}" for version, count in transport['http_versions'].items())
+    print(f"Transport:  {transport['transport']}, {transport['connections_opened']} connections for "
+          f"{transport['requests']} requests ({transport['requests_per_connection'] or '-'} per connection, "
+          f"pool {transport['pool_size']}){'; ' + versions if versions else ''}")
+PY
 else
-    echo "No log file found yet"
+    echo "No status available yet ($STATUS_FILE not found)"
 fi
 
 echo ""
@@ -55,7 +102,8 @@ fi
 echo ""
 echo "======================================="
 echo "Commands:"
-echo "  Monitor live: tail -f scraper.log"
+echo "  Monitor live: watch -n 5 ./monitor.sh"
+echo "  Follow log:   tail -f scraper.log"
 echo "  Stop scraper: kill \$(cat scraper.pid)"
 echo "  Check status: ./monitor.sh"
 echo "======================================="
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+HTML parser backends for the Avtotemir.az scraper
+Every backend extracts exactly the same fields; they differ only in speed
+"""
+
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+
+
+def empty_profile(master_url: str, master_id: Optional[str], location: str = '') -> Dict:
+    """Profile record with every field present and empty"""
+    return {
+        'url': master_url,
+        'id': master_id,
+        'name': '',
+        'position': '',
+        'car_brands': '',
+        'location': location,
+        'rating': '',
+        'votes': '',
+        'experience': '',
+        'views': '',
+        'added_date': '',
+        'address': '',
+        'note': '',
+        'phone_numbers': [],
+        'services': [],
+        'images': []
+    }
+
+
+def apply_details(master_data: Dict, texts: List[str]):
+    """Fill experience, views and added date from the .master_details spans"""
+    for text in texts:
+        if 'Təcrübə:' in text:
+            master_data['experience'] = text.replace('Təcrübə:', '').strip()
+        elif 'Baxılıb:' in text:
+            master_data['views'] = text.replace('Baxılıb:', '').strip()
+        elif 'Əlavə olundu:' in text:
+            master_data['added_date'] = text.replace('Əlavə olundu:', '').strip()
+
+
+def apply_rating(master_data: Dict, rating_text: str):
+    """Fill rating and votes from text like "4.6 (9 səs)" """
+    rating_match = re.search(r'([\d.]+)\s*\((\d+)', rating_text)
+    if rating_match:
+        master_data['rating'] = rating_match.group(1)
+        master_data['votes'] = rating_match.group(2)
+
+
+class SoupParser:
+    """BeautifulSoup backend (html.parser is the original, slowest tree builder)"""
+
+    def __init__(self, features: str = 'html.parser'):
+        """
+        Args:
+            features: BeautifulSoup tree builder ('html.parser' or 'lxml')
+        """
+        self.features = features
+
+    def parse_listing(self, html: str, base_url: str) -> List[Dict[str, str]]:
+        """
+        Extract master profile links from listing HTML
+
+        Args:
+            html: HTML content from listings page
+            base_url: Site URL relative links are resolved against
+
+        Returns:
+            List of dictionaries with master URLs, IDs, and location
+        """
+        soup = BeautifulSoup(html, self.features)
+        masters = []
+
+        # Find all article elements
+        for article in soup.find_all('article'):
+            # Find the master profile link
+            link = article.find('a', href=re.compile(r'/usta/'))
+            if link:
+                master_url = link.get('href')
+                # Extract master ID from URL or data attributes
+                master_id = None
+                location = ''
+
+                # Try to find master ID from data-link attributes
+                info_link = article.find('a', class_='position open-modal-dialog')
+                if info_link and info_link.get('data-link'):
+                    match = re.search(r'/usta/(\d+)/info', info_link['data-link'])
+                    if match:
+                        master_id = match.group(1)
+
+                # Extract location from listing
+                location_li = article.find('i', class_=re.compile(r'fa-map-marker'))
+                if location_li and location_li.parent:
+                    location = location_li.parent.get_text(strip=True)
+
+                masters.append({
+                    'url': master_url if master_url.startswith('http') else urljoin(base_url, master_url),
+                    'id': master_id,
+                    'location': location
+                })
+
+        return masters
+
+    def parse_phones(self, html: str) -> List[str]:
+        """Extract phone numbers from the contact phone fragment"""
+        soup = BeautifulSoup(html, self.features)
+        phones = []
+
+        # Extract phone numbers from href="tel:..." links
+        for phone_link in soup.find_all('a', href=re.compile(r'tel:')):
+            phone_text = phone_link.get_text(strip=True)
+            # Remove icon text and get just the number
+            phone_number = re.sub(r'\s+', ' ', phone_text).strip()
+            if phone_number:
+                phones.append(phone_number)
+
+        return phones
+
+    def parse_profile(self, html: str, master_url: str, master_id: Optional[str], location: str = '') -> Dict:
+        """
+        Extract master's information from profile page HTML
+
+        Args:
+            html: Profile page HTML
+            master_url: URL of master's profile
+            master_id: Master's ID
+            location: Location from listing page
+
+        Returns:
+            Dictionary with master's information (without phone numbers)
+        """
+        soup = BeautifulSoup(html, self.features)
+        master_data = empty_profile(master_url, master_id, location)
+
+        # Extract name
+        name_elem = soup.select_one('.master_info .body h2')
+        if name_elem:
+            master_data['name'] = name_elem.get_text(strip=True)
+
+        # Extract position/profession
+        position_elem = soup.select_one('.master_info .body ul li span i.fa-wrench')
+        if position_elem and position_elem.parent:
+            master_data['position'] = position_elem.parent.get_text(strip=True)
+
+        # Extract car brands
+        car_elem = soup.select_one('.master_info .body ul li span i.fa-car')
+        if car_elem and car_elem.parent:
+            master_data['car_brands'] = car_elem.parent.get_text(strip=True)
+
+        # Extract location
+        location_elem = soup.select_one('.master_info .body ul li span i.fa-map-marker-alt')
+        if location_elem and location_elem.parent:
+            master_data['location'] = location_elem.parent.get_text(strip=True)
+
+        # Extract rating and votes
+        rating_elem = soup.select_one('#result')
+        if rating_elem:
+            apply_rating(master_data, rating_elem.get_text(strip=True))
+
+        # Extract experience, views, added date from master_details
+        details_main = soup.select_one('.master_details .main')
+        if details_main:
+            apply_details(master_data, [span.get_text(strip=True) for span in details_main.find_all('span')])
+
+        # Extract address
+        address_elem = soup.select_one('.master_address .marker-link span')
+        if address_elem:
+            master_data['address'] = address_elem.get_text(strip=True)
+
+        # Extract note/description
+        note_elem = soup.select_one('.master_service .text')
+        if note_elem:
+            # Get all paragraphs and combine them
+            note_paragraphs = note_elem.find_all('p')
+            master_data['note'] = ' '.join([p.get_text(strip=True) for p in note_paragraphs])
+
+        # Extract services from positions table
+        for row in soup.select('#positions tbody tr'):
+            cells = row.find_all('td')
+            if len(cells) >= 2:
+                master_data['services'].append({
+                    'position': cells[0].get_text(strip=True),
+                    'car': cells[1].get_text(strip=True)
+                })
+
+        # Extract images
+        for img in soup.select('#master_gallery img'):
+            img_src = img.get('src')
+            if img_src:
+                master_data['images'].append(img_src)
+
+        return master_data
+
+
+def _has_class(name: str) -> str:
+    """XPath predicate equivalent to the CSS class selector .name"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# BeautifulSoup's get_text() leaves out script and style contents as well as comments
+_SKIP_TEXT_TAGS = {'script', 'style', 'template'}
+
+
+def _collect_text(element, parts: List[str]):
+    """Gather text nodes the way BeautifulSoup does"""
+    if not isinstance(element.tag, str) or element.tag in _SKIP_TEXT_TAGS:
+        return
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        _collect_text(child, parts)
+        if child.tail:
+            parts.append(child.tail)
+
+
+def _text(element) -> str:
+    """Equivalent of BeautifulSoup's get_text(strip=True)"""
+    parts = []
+    _collect_text(element, parts)
+    return ''.join(part.strip() for part in parts)
+
+
+# Compiled XPath equivalents of the CSS selectors used by SoupParser
+_MASTER_INFO = f"//*[{_has_class('master_info')}]//*[{_has_class('body')}]"
+_ICON_SPAN = _MASTER_INFO + "//ul//li//span//i[" + "{}" + "]/.."
+_XPATHS = {
+    'name': etree.XPath(_MASTER_INFO + '//h2'),
+    'position': etree.XPath(_ICON_SPAN.format(_has_class('fa-wrench'))),
+    'car_brands': etree.XPath(_ICON_SPAN.format(_has_class('fa-car'))),
+    'location': etree.XPath(_ICON_SPAN.format(_has_class('fa-map-marker-alt'))),
+    'rating': etree.XPath("//*[@id='result']"),
+    'details': etree.XPath(f"//*[{_has_class('master_details')}]//*[{_has_class('main')}]"),
+    'address': etree.XPath(
+        f"//*[{_has_class('master_address')}]//*[{_has_class('marker-link')}]//span"
+    ),
+    'note': etree.XPath(f"//*[{_has_class('master_service')}]//*[{_has_class('text')}]"),
+    'services': etree.XPath("//*[@id='positions']//tbody//tr"),
+    'images': etree.XPath("//*[@id='master_gallery']//img"),
+}
+
+
+_XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+
+class LxmlParser:
+    """lxml backend using precompiled XPath, several times faster than BeautifulSoup"""
+
+    features = 'lxml'
+
+    @staticmethod
+    def _document(html: str):
+        """Parse HTML into an lxml tree, or None for empty input"""
+        if not html or not html.strip():
+            return None
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # lxml rejects str input carrying an XML encoding declaration; the text is already decoded
+            return lxml.html.document_fromstring(_XML_DECLARATION.sub('', html, count=1))
+
+    def parse_listing(self, html: str, base_url: str) -> List[Dict[str, str]]:
+        """Extract master profile links from listing HTML (see SoupParser.parse_listing)"""
+        doc = self._document(html)
+        if doc is None:
+            return []
+        masters = []
+
+        for article in doc.iter('article'):
+            link = next((a for a in article.iter('a') if re.search(r'/usta/', a.get('href') or '')), None)
+            if link is None:
+                continue
+
+            master_url = link.get('href')
+            master_id = None
+            location = ''
+
+            info_link = next((a for a in article.iter('a') if a.get('class') == 'position open-modal-dialog'), None)
+            if info_link is not None and info_link.get('data-link'):
+                match = re.search(r'/usta/(\d+)/info', info_link.get('data-link'))
+                if match:
+                    master_id = match.group(1)
+
+            location_i = next((i for i in article.iter('i') if 'fa-map-marker' in (i.get('class') or '')), None)
+            if location_i is not None and location_i.getparent() is not None:
+                location = _text(location_i.getparent())
+
+            masters.append({
+                'url': master_url if master_url.startswith('http') else urljoin(base_url, master_url),
+                'id': master_id,
+                'location': location
+            })
+
+        return masters
+
+    def parse_phones(self, html: str) -> List[str]:
+        """Extract phone numbers from the contact phone fragment"""
+        doc = self._document(html)
+        if doc is None:
+            return []
+        phones = []
+
+        for phone_link in doc.iter('a'):
+            if 'tel:' not in (phone_link.get('href') or ''):
+                continue
+            phone_number = re.sub(r'\s+', ' ', _text(phone_link)).strip()
+            if phone_number:
+                phones.append(phone_number)
+
+        return phones
+
+    def parse_profile(self, html: str, master_url: str, master_id: Optional[str], location: str = '') -> Dict:
+        """Extract master's information from profile page HTML (see SoupParser.parse_profile)"""
+        master_data = empty_profile(master_url, master_id, location)
+        doc = self._document(html)
+        if doc is None:
+            return master_data
+
+        for field in ('name', 'position', 'car_brands', 'location', 'address'):
+            found = _XPATHS[field](doc)
+            if found:
+                master_data[field] = _text(found[0])
+
+        found = _XPATHS['rating'](doc)
+        if found:
+            apply_rating(master_data, _text(found[0]))
+
+        found = _XPATHS['details'](doc)
+        if found:
+            apply_details(master_data, [_text(span) for span in found[0].iterdescendants('span')])
+
+        found = _XPATHS['note'](doc)
+        if found:
+            master_data['note'] = ' '.join(_text(p) for p in found[0].iterdescendants('p'))
+
+        for row in _XPATHS['services'](doc):
+            cells = list(row.iter('td'))
+            if len(cells) >= 2:
+                master_data['services'].append({
+                    'position': _text(cells[0]),
+                    'car': _text(cells[1])
+                })
+
+        for img in _XPATHS['images'](doc):
+            img_src = img.get('src')
+            if img_src:
+                master_data['images'].append(img_src)
+
+        return master_data
+
+
+PARSERS = {
+    'html.parser': lambda: SoupParser('html.parser'),
+    'bs4-lxml': lambda: SoupParser('lxml'),
+    'lxml': LxmlParser,
+}
+
+
+def get_parser(name: str = 'lxml'):
+    """
+    Create a parser backend by name
+
+    Args:
+        name: One of PARSERS ('html.parser', 'bs4-lxml', 'lxml')
+    """
+    if name not in PARSERS:
+        raise ValueError(f"Unknown parser '{name}', expected one of: {', '.join(PARSERS)}")
+    return PARSERS[name]()
+
+
+# Parser backend of a parse worker process, see init_parse_process()
+_process_parser = None
+
+
+def init_parse_process(name: str = 'lxml'):
+    """ProcessPoolExecutor initializer: create the parser backend of a parse worker process"""
+    global _process_parser
+    _process_parser = get_parser(name)
+
+
+def parse_profile_in_process(html: str, master_url: str, master_id: Optional[str], location: str = '') -> Dict:
+    """Parse a profile page in a parse worker process (see parse_profile)"""
+    return _process_parser.parse_profile(html, master_url, master_id, location)
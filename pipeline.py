@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Staged crawl pipeline for the Avtotemir.az scraper
+Runs listing discovery, profile parsing and phone lookups as separate
+stages connected by bounded queues
+"""
+
+import logging
+import queue
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class CrawlPipeline:
+    """
+    Producer/consumer pipeline: listings -> profiles -> phones -> collector
+
+    With parse workers (scraper.parse_pool set) the profile stage is split:
+    listings -> profile downloads -> parse -> phones -> collector. Download
+    threads then only fetch bytes, and parse threads hand the pages to the
+    scraper's process pool, so parsing scales across cores without holding
+    up the network side.
+
+    Every queue is bounded, so a slow downstream stage blocks the stages
+    feeding it instead of letting pending work pile up in memory.
+    """
+
+    def __init__(self, scraper, profile_workers: int = 4, phone_workers: int = 2, queue_size: int = 100,
+                 parse_workers: int = 0):
+        """
+        Args:
+            scraper: AvtotemirScraper used for fetching and parsing
+            profile_workers: Threads fetching (and without parse workers, parsing) profile pages
+            phone_workers: Threads fetching contact phone fragments
+            queue_size: Capacity of each inter-stage queue
+            parse_workers: Threads feeding downloaded profiles to scraper.parse_pool (0 disables the stage)
+        """
+        self.scraper = scraper
+        self.profile_workers = max(1, profile_workers)
+        self.phone_workers = max(1, phone_workers)
+        self.parse_workers = max(0, parse_workers) if scraper.parse_pool else 0
+        self.profile_queue = queue.Queue(maxsize=queue_size)
+        self.parse_queue = queue.Queue(maxsize=queue_size)
+        self.phone_queue = queue.Queue(maxsize=queue_size)
+        self.result_queue = queue.Queue(maxsize=queue_size)
+
+        # Outstanding masters per page, used to report pages as they complete
+        self._pending = {}
+        self._listed_pages = set()
+        self._lock = threading.Lock()
+
+    def run(self, start_page: int, end_page: Optional[int], last_page: int):
+        """
+        Crawl pages until the end of the listings, collecting into scraper.masters_data
+
+        Args:
+            start_page: Page to start from
+            end_page: Page to end at (None for auto-detect)
+            last_page: Hard upper bound on the page number
+        """
+        lister = threading.Thread(
+            target=self._list_pages, args=(start_page, end_page, last_page), name='listing', daemon=True
+        )
+        profile_threads = [
+            threading.Thread(target=self._profile_worker, name=f'profile-{i}', daemon=True)
+            for i in range(self.profile_workers)
+        ]
+        parse_threads = [
+            threading.Thread(target=self._parse_worker, name=f'parse-{i}', daemon=True)
+            for i in range(self.parse_workers)
+        ]
+        phone_threads = [
+            threading.Thread(target=self._phone_worker, name=f'phone-{i}', daemon=True)
+            for i in range(self.phone_workers)
+        ]
+
+        for thread in [lister] + profile_threads + parse_threads + phone_threads:
+            thread.start()
+
+        # Shut stages down in order once their producers have finished
+        closer = threading.Thread(
+            target=self._close_stages, args=(lister, profile_threads, parse_threads, phone_threads), daemon=True
+        )
+        closer.start()
+
+        self._collect()
+        closer.join()
+
+    def _close_stages(self, lister, profile_threads, parse_threads, phone_threads):
+        """Propagate end-of-input markers from one stage to the next"""
+        lister.join()
+        for _ in profile_threads:
+            self.profile_queue.put(_DONE)
+
+        for thread in profile_threads:
+            thread.join()
+        for _ in parse_threads:
+            self.parse_queue.put(_DONE)
+
+        for thread in parse_threads:
+            thread.join()
+        for _ in phone_threads:
+            self.phone_queue.put(_DONE)
+
+        for thread in phone_threads:
+            thread.join()
+        self.result_queue.put(_DONE)
+
+    def _list_pages(self, start_page: int, end_page: Optional[int], last_page: int):
+        """Listing stage: discover masters page by page, ahead of the profile stage"""
+        try:
+            for page, masters in self.scraper.iter_listings(start_page, end_page, last_page):
+                with self._lock:
+                    self._pending[page] = self._pending.get(page, 0) + len(masters)
+
+                for master_info in masters:
+                    self.profile_queue.put((page, master_info))
+
+                with self._lock:
+                    self._listed_pages.add(page)
+                # Pages whose masters all finished before listing completed
+                self._report_page(page)
+        except Exception as e:
+            logger.error(f"Listing stage failed: {e}")
+
+    def _profile_worker(self):
+        """Profile stage: fetch and parse profile pages, or only fetch them when there are parse workers"""
+        while True:
+            item = self.profile_queue.get()
+            if item is _DONE:
+                return
+
+            page, master_info = item
+            if self.parse_workers:
+                self._download_profile(page, master_info)
+                continue
+
+            master_data = None
+            try:
+                master_data = self.scraper.scrape_master_profile(
+                    master_info['url'],
+                    master_info['id'],
+                    master_info.get('location', ''),
+                    fetch_phone=False
+                )
+            except Exception as e:
+                logger.error(f"Unexpected error scraping {master_info['url']}: {e}")
+                self.scraper.record_failure('profile', master_info['url'], master_info['id'], e,
+                                            master_info.get('location', ''))
+
+            self.phone_queue.put((page, master_data or None))
+
+    def _download_profile(self, page: int, master_info: Dict[str, str]):
+        """Fetch a profile page and pass it on to the parse stage"""
+        previous, html = None, None
+        try:
+            previous, html = self.scraper.fetch_master_profile(
+                master_info['url'], master_info['id'], master_info.get('location', '')
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error scraping {master_info['url']}: {e}")
+            self.scraper.record_failure('profile', master_info['url'], master_info['id'], e,
+                                        master_info.get('location', ''))
+
+        if html is None:
+            # Unchanged since the last crawl, or failed: nothing to parse
+            self.phone_queue.put((page, previous))
+        else:
+            self.parse_queue.put((page, master_info, html))
+
+    def _parse_worker(self):
+        """Parse stage: parse downloaded profile pages in the scraper's process pool"""
+        while True:
+            item = self.parse_queue.get()
+            if item is _DONE:
+                return
+
+            page, master_info, html = item
+            master_data = None
+            try:
+                master_data = self.scraper.parse_master_profile(
+                    html, master_info['url'], master_info['id'], master_info.get('location', '')
+                )
+                master_data = self.scraper.complete_master_profile(master_data, fetch_phone=False)
+            except Exception as e:
+                logger.error(f"Unexpected error parsing {master_info['url']}: {e}")
+                self.scraper.record_failure('profile', master_info['url'], master_info['id'], e,
+                                            master_info.get('location', ''))
+
+            self.phone_queue.put((page, master_data))
+
+    def _phone_worker(self):
+        """Phone stage: attach contact phone numbers to parsed profiles"""
+        while True:
+            item = self.phone_queue.get()
+            if item is _DONE:
+                return
+
+            page, master_data = item
+            if master_data and self.scraper.needs_phone_lookup(master_data):
+                try:
+                    self.scraper.attach_phones(master_data)
+                except Exception as e:
+                    logger.error(f"Unexpected error fetching phone for master {master_data['id']}: {e}")
+
+            self.result_queue.put((page, master_data))
+
+    def _collect(self):
+        """Collector stage: the only place results are handed to the scraper"""
+        while True:
+            item = self.result_queue.get()
+            if item is _DONE:
+                return
+
+            page, master_data = item
+            if master_data:
+                self.scraper.add_master(master_data)
+
+            with self._lock:
+                self._pending[page] -= 1
+            self._report_page(page)
+
+    def _report_page(self, page: int):
+        """Log a page as completed once it is fully listed and all its masters are done"""
+        with self._lock:
+            if page not in self._listed_pages or self._pending.get(page):
+                return
+            del self._pending[page]
+            self._listed_pages.discard(page)
+
+        self.scraper.complete_page(page)
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Current number of items waiting in each stage's queue"""
+        return {
+            'profile': self.profile_queue.qsize(),
+            'parse': self.parse_queue.qsize(),
+            'phone': self.phone_queue.qsize(),
+            'result': self.result_queue.qsize(),
+        }
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Opt-in crawl profiling for the Avtotemir.az scraper
+Times every crawl stage (listing fetch and parse, profile fetch and parse,
+phone lookups, rate-limit waits, network, output writing) in wall and CPU
+time, keeps the slowest URLs and can dump a cProfile/pstats file
+"""
+
+import cProfile
+import heapq
+import logging
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StageStats:
+    """Accumulated timings of one stage"""
+
+    __slots__ = ('calls', 'wall', 'self_wall', 'cpu', 'self_cpu', 'max_wall')
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.self_wall = 0.0
+        self.cpu = 0.0
+        self.self_cpu = 0.0
+        self.max_wall = 0.0
+
+
+class StageProfiler:
+    """
+    Wall and CPU time per crawl stage, summed over all threads
+
+    Stages nest: a profile stage contains its network request, which contains
+    the rate-limit wait. "self" columns exclude time spent in nested stages,
+    so they add up to the time the instrumented code actually spent. CPU time
+    is per thread (time.thread_time), so wall minus CPU is time spent blocked
+    on the network, sleeps and locks.
+    """
+
+    def __init__(self, top: int = 10, pstats_file: Optional[str] = None):
+        """
+        Args:
+            top: Number of slowest URLs kept for the report
+            pstats_file: Also run cProfile in every thread and dump merged stats here
+        """
+        self.top = top
+        self.pstats_file = pstats_file
+        self.stages: Dict[str, StageStats] = {}
+        self._slow: List[Tuple[float, str]] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self._started = None
+        self._wall = 0.0
+        self._cpu = 0.0
+        self._profiles: List[cProfile.Profile] = []
+
+    @contextmanager
+    def stage(self, name: str, url: Optional[str] = None):
+        """Time the enclosed block as one call of a stage, optionally for a URL"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        # Time spent in nested stages: [wall, cpu]
+        nested = [0.0, 0.0]
+        stack.append(nested)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            stack.pop()
+            if stack:
+                stack[-1][0] += wall
+                stack[-1][1] += cpu
+
+            with self._lock:
+                stats = self.stages.get(name)
+                if stats is None:
+                    stats = self.stages[name] = StageStats()
+                stats.calls += 1
+                stats.wall += wall
+                stats.self_wall += wall - nested[0]
+                stats.cpu += cpu
+                stats.self_cpu += cpu - nested[1]
+                stats.max_wall = max(stats.max_wall, wall)
+                if url and self.top:
+                    entry = (wall, url)
+                    if len(self._slow) < self.top:
+                        heapq.heappush(self._slow, entry)
+                    elif entry > self._slow[0]:
+                        heapq.heapreplace(self._slow, entry)
+
+    def wrap(self, obj, attribute: str, name: str, url: Optional[Callable[..., Optional[str]]] = None):
+        """
+        Time every call of obj.attribute as a stage
+
+        Args:
+            obj: Object whose method is replaced by a timed wrapper on the instance
+            attribute: Method name
+            name: Stage name
+            url: Function of the call arguments returning the URL the call handles
+        """
+        method = getattr(obj, attribute)
+
+        def timed(*args, **kwargs):
+            with self.stage(name, url(*args, **kwargs) if url else None):
+                return method(*args, **kwargs)
+
+        timed.__wrapped__ = method
+        setattr(obj, attribute, timed)
+
+    def instrument(self, scraper):
+        """Wrap the stages of an AvtotemirScraper, its scheduler, session and sinks"""
+        self.wrap(scraper, 'get_page_listings', 'listing: fetch')
+        self.wrap(scraper, 'extract_master_links', 'listing: parse')
+        self.wrap(scraper, 'scrape_master_profile', 'profile')
+        self.wrap(scraper, 'parse_master_profile', 'profile: parse')
+        self.wrap(scraper, 'fetch_phones', 'phone')
+        self.wrap(scraper.parser, 'parse_phones', 'phone: parse')
+        # Self time of a request is its retry backoff sleeps; its total is what a URL cost, retries included
+        self.wrap(scraper.scheduler, 'request', 'http: request + backoff',
+                  url=lambda session, url, **kwargs: url)
+        self.wrap(scraper.scheduler.limit, 'acquire', 'wait: concurrency limit')
+        self.wrap(scraper.scheduler.bucket, 'acquire', 'wait: rate limit')
+        self.wrap(scraper.session, 'get', 'http: network')
+
+        for sink in scraper.sinks:
+            for method in ('write', 'flush', 'close'):
+                self.wrap(sink, method, f"output: {type(sink).__name__}")
+        for method in ('save_to_json', 'save_to_csv', 'save_to_parquet'):
+            self.wrap(scraper, method, 'output: save')
+        if scraper.checkpoint:
+            for method in ('add_record', 'complete_page'):
+                self.wrap(scraper.checkpoint, method, 'checkpoint')
+        if scraper.dead_letters:
+            self.wrap(scraper.dead_letters, 'add', 'output: dead letters')
+
+    def _profile_thread(self, *args):
+        """threading.setprofile hook: start a cProfile profiler in each new thread"""
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active (e.g. one profiler already covers every thread)
+            return
+        with self._lock:
+            self._profiles.append(profile)
+
+    def start(self):
+        """Start the run clock and, with pstats_file, cProfile in this and every new thread"""
+        self._started = (time.perf_counter(), time.process_time())
+        if self.pstats_file:
+            profile = cProfile.Profile()
+            profile.enable()
+            self._profiles.append(profile)
+            threading.setprofile(self._profile_thread)
+
+    def stop(self):
+        """Stop the run clock and write the pstats file"""
+        if self._started is None:
+            return
+        self._wall = time.perf_counter() - self._started[0]
+        self._cpu = time.process_time() - self._started[1]
+        self._started = None
+        if self.pstats_file:
+            threading.setprofile(None)
+            self.dump(self.pstats_file)
+
+    def dump(self, filename: str):
+        """Merge every thread's cProfile stats into one pstats file"""
+        # Reading a profile disables profiling in the calling thread, so this thread's comes first
+        profiles = list(self._profiles)
+        if not profiles:
+            return
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(filename)
+        logger.info(f"cProfile stats of {len(profiles)} threads saved to {filename} "
+                    f"(view with: python -m pstats {filename})")
+
+    def slowest(self) -> List[Tuple[float, str]]:
+        """(seconds, URL) of the slowest calls, slowest first"""
+        with self._lock:
+            return sorted(self._slow, reverse=True)
+
+    def report(self) -> str:
+        """Per-stage wall/CPU breakdown and the slowest URLs as text"""
+        lines = [
+            'Crawl timing by stage (seconds summed over all threads; self = excluding nested stages)',
+            f"{'stage':<28} {'calls':>7} {'wall':>9} {'self wall':>10} {'cpu':>8} {'self cpu':>9} "
+            f"{'mean ms':>8} {'max ms':>8}",
+        ]
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1].self_wall, reverse=True)
+        for name, s in stages:
+            lines.append(
+                f"{name:<28} {s.calls:>7} {s.wall:>9.2f} {s.self_wall:>10.2f} {s.cpu:>8.2f} {s.self_cpu:>9.2f} "
+                f"{1000 * s.wall / s.calls:>8.1f} {1000 * s.max_wall:>8.1f}"
+            )
+        if self._wall:
+            lines.append(f"Run: {self._wall:.2f}s wall, {self._cpu:.2f}s process CPU "
+                         f"({100 * self._cpu / self._wall:.0f}% of one core)")
+
+        slowest = self.slowest()
+        if slowest:
+            lines.append('')
+            lines.append(f"Slowest {len(slowest)} URLs")
+            for seconds, url in slowest:
+                lines.append(f"{1000 * seconds:>9.1f} ms  {url}")
+        return '\n'.join(lines)
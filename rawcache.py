@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of raw responses for the Avtotemir.az scraper
+Every listing, profile and phone response the crawl receives is stored
+compressed on disk, so a fixed selector can be applied to the whole site
+again by re-parsing the cache (reparse) instead of re-crawling it
+
+Layout:
+    <dir>/index.db                 - SQLite index: which URL returned which body, and when
+    <dir>/objects/<ab>/<sha256>.gz - response bodies keyed by their SHA-256, gzip compressed
+                                     (.zst when the zstandard package is installed)
+
+Identical bodies (e.g. empty listing pages) are stored once. A URL whose
+content changed keeps one entry per version; reads return the latest.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+
+from parsers import get_parser
+from replay import classify_url
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT NOT NULL,
+    hash TEXT NOT NULL REFERENCES objects(hash),
+    kind TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (url, hash)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_kind ON entries(kind, url, fetched_at);
+CREATE INDEX IF NOT EXISTS idx_entries_fetched ON entries(fetched_at);
+CREATE INDEX IF NOT EXISTS idx_entries_hash ON entries(hash);
+"""
+
+CODEC_EXTENSIONS = {'gzip': 'gz', 'zstd': 'zst'}
+
+
+def compress(body: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(body)
+    return gzip.compress(body, compresslevel=6)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImportError('zstandard is required to read zstd-compressed cache entries')
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def object_path(directory: str, content_hash: str, codec: str) -> str:
+    """File holding a compressed body"""
+    return os.path.join(directory, 'objects', content_hash[:2], f"{content_hash}.{CODEC_EXTENSIONS[codec]}")
+
+
+def read_object(directory: str, content_hash: str, codec: str) -> bytes:
+    """Decompressed body of a stored object"""
+    with open(object_path(directory, content_hash, codec), 'rb') as f:
+        return decompress(f.read(), codec)
+
+
+class RawCache:
+    """
+    On-disk cache of raw listing, profile and phone responses
+
+    Thread-safe; bodies are written to their final path atomically, so a
+    crash never leaves a truncated object behind an index entry.
+    """
+
+    def __init__(self, directory: str = 'raw_cache', codec: Optional[str] = None,
+                 max_bytes: Optional[int] = None, max_age_days: Optional[float] = None):
+        """
+        Args:
+            directory: Cache directory
+            codec: 'zstd' or 'gzip' (default: zstd when zstandard is installed)
+            max_bytes: Compressed size evict() trims the cache to
+            max_age_days: Age after which evict() drops entries
+        """
+        if codec is None:
+            codec = 'zstd' if zstandard is not None else 'gzip'
+        if codec == 'zstd' and zstandard is None:
+            raise ImportError('zstandard is required for zstd compression (pip install zstandard)')
+        if codec not in CODEC_EXTENSIONS:
+            raise ValueError(f"Unknown codec '{codec}', expected one of: {', '.join(CODEC_EXTENSIONS)}")
+
+        self.directory = directory
+        self.codec = codec
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+
+        self.conn = sqlite3.connect(os.path.join(directory, 'index.db'), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def put(self, url: str, body: bytes, kind: Optional[str] = None) -> str:
+        """
+        Store a response body for a URL
+
+        Returns:
+            SHA-256 of the body
+        """
+        content_hash = hashlib.sha256(body).hexdigest()
+        kind = kind or classify_url(url) or 'other'
+
+        with self._lock:
+            row = self.conn.execute('SELECT codec FROM objects WHERE hash = ?', (content_hash,)).fetchone()
+            codec = row[0] if row else self.codec
+            stored_size = None
+            if row is None or not os.path.exists(object_path(self.directory, content_hash, codec)):
+                path = object_path(self.directory, content_hash, codec)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                data = compress(body, codec)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                stored_size = len(data)
+
+            with self.conn:
+                if stored_size is not None:
+                    self.conn.execute(
+                        'INSERT OR REPLACE INTO objects (hash, codec, size, stored_size) VALUES (?, ?, ?, ?)',
+                        (content_hash, codec, len(body), stored_size)
+                    )
+                self.conn.execute(
+                    'INSERT INTO entries (url, hash, kind, fetched_at) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT(url, hash) DO UPDATE SET fetched_at = excluded.fetched_at',
+                    (url, content_hash, kind, time.time())
+                )
+        return content_hash
+
+    def latest(self, kind: Optional[str] = None) -> Dict[str, Tuple[str, str]]:
+        """Latest (hash, codec) of every cached URL, optionally of one kind"""
+        sql = (
+            'SELECT e.url, e.hash, o.codec FROM entries e JOIN objects o ON o.hash = e.hash '
+            'WHERE e.fetched_at = (SELECT MAX(fetched_at) FROM entries WHERE url = e.url)'
+        )
+        params: tuple = ()
+        if kind:
+            sql += ' AND e.kind = ?'
+            params = (kind,)
+        with self._lock:
+            return {url: (content_hash, codec) for url, content_hash, codec in self.conn.execute(sql, params)}
+
+    def get(self, url: str) -> Optional[bytes]:
+        """Latest cached body of a URL, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT e.hash, o.codec FROM entries e JOIN objects o ON o.hash = e.hash '
+                'WHERE e.url = ? ORDER BY e.fetched_at DESC LIMIT 1', (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return read_object(self.directory, *row)
+        except FileNotFoundError:
+            return None
+
+    def evict(self, max_bytes: Optional[int] = None, max_age_days: Optional[float] = None) -> Dict[str, int]:
+        """
+        Drop entries older than max_age_days, then the oldest entries until the
+        compressed size fits max_bytes, and delete objects no entry refers to
+
+        Args:
+            max_bytes: Size limit (default: the cache's max_bytes)
+            max_age_days: Age limit (default: the cache's max_age_days)
+
+        Returns:
+            Number of entries and objects removed and bytes freed
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        removed_entries = 0
+
+        with self._lock:
+            with self.conn:
+                if max_age_days is not None:
+                    cursor = self.conn.execute('DELETE FROM entries WHERE fetched_at < ?',
+                                               (time.time() - max_age_days * 86400,))
+                    removed_entries += cursor.rowcount
+
+                if max_bytes is not None:
+                    total = self.conn.execute('SELECT COALESCE(SUM(stored_size), 0) FROM objects '
+                                              'WHERE hash IN (SELECT hash FROM entries)').fetchone()[0]
+                    if total > max_bytes:
+                        # Oldest versions go first; an object goes once its last entry is gone
+                        rows = self.conn.execute(
+                            'SELECT e.url, e.hash, o.stored_size, '
+                            '(SELECT COUNT(*) FROM entries WHERE hash = e.hash) AS refs '
+                            'FROM entries e JOIN objects o ON o.hash = e.hash ORDER BY e.fetched_at'
+                        ).fetchall()
+                        refs = {content_hash: count for _, content_hash, _, count in rows}
+                        doomed = []
+                        for url, content_hash, stored_size, _ in rows:
+                            if total <= max_bytes:
+                                break
+                            doomed.append((url, content_hash))
+                            refs[content_hash] -= 1
+                            if not refs[content_hash]:
+                                total -= stored_size
+                        self.conn.executemany('DELETE FROM entries WHERE url = ? AND hash = ?', doomed)
+                        removed_entries += len(doomed)
+
+                orphans = self.conn.execute(
+                    'SELECT hash, codec, stored_size FROM objects WHERE hash NOT IN (SELECT hash FROM entries)'
+                ).fetchall()
+                self.conn.executemany('DELETE FROM objects WHERE hash = ?', [(row[0],) for row in orphans])
+
+        for content_hash, codec, _ in orphans:
+            try:
+                os.remove(object_path(self.directory, content_hash, codec))
+            except FileNotFoundError:
+                pass
+
+        result = {'entries': removed_entries, 'objects': len(orphans), 'bytes': sum(row[2] for row in orphans)}
+        if removed_entries or orphans:
+            logger.info(f"Evicted {result['entries']} entries and {result['objects']} objects "
+                        f"({result['bytes'] / 1e6:.2f} MB) from {self.directory}")
+        return result
+
+    def stats(self) -> Dict:
+        """Entries by kind, distinct bodies and raw vs compressed size"""
+        with self._lock:
+            kinds = dict(self.conn.execute('SELECT kind, COUNT(DISTINCT url) FROM entries GROUP BY kind'))
+            objects, size, stored_size = self.conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM objects'
+            ).fetchone()
+        return {'urls': kinds, 'objects': objects, 'bytes': size, 'stored_bytes': stored_size,
+                'ratio': round(size / stored_size, 2) if stored_size else None}
+
+    def close(self):
+        """Apply the configured eviction limits and close the index"""
+        if self.max_bytes is not None or self.max_age_days is not None:
+            self.evict()
+        with self._lock:
+            self.conn.close()
+
+
+class CachingAdapter(BaseAdapter):
+    """Transport adapter that stores successful listing, profile and phone responses in a RawCache"""
+
+    def __init__(self, inner: BaseAdapter, cache: RawCache):
+        """
+        Args:
+            inner: Adapter that actually sends the requests (network, recording or replay)
+            cache: Cache the responses are stored in
+        """
+        super().__init__()
+        self.inner = inner
+        self.cache = cache
+
+    def send(self, request, **kwargs):
+        response = self.inner.send(request, **kwargs)
+        kind = classify_url(request.url)
+        if kind and response.status_code == 200:
+            try:
+                self.cache.put(request.url, response.content, kind)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Could not cache {request.url}: {e}")
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+def cache_responses(session: requests.Session, cache: RawCache):
+    """Store every listing, profile and phone response the session receives in the cache"""
+    for prefix in ('https://', 'http://'):
+        session.mount(prefix, CachingAdapter(session.get_adapter(prefix), cache))
+
+
+# Per-process parser and cache directory of the reparse workers
+_worker_parser = None
+_worker_directory = None
+
+
+def _init_reparse_worker(directory: str, parser: str):
+    global _worker_parser, _worker_directory
+    _worker_parser = get_parser(parser)
+    _worker_directory = directory
+
+
+def _reparse_master(task) -> Optional[Dict]:
+    """Parse one cached profile and its phone fragment in a worker process"""
+    master_info, profile, phone = task
+    html = read_object(_worker_directory, *profile).decode('utf-8', errors='replace')
+    master_data = _worker_parser.parse_profile(html, master_info['url'], master_info['id'],
+                                               master_info.get('location', ''))
+    if phone:
+        fragment = read_object(_worker_directory, *phone).decode('utf-8', errors='replace')
+        master_data['phone_numbers'] = _worker_parser.parse_phones(fragment)
+    return master_data
+
+
+def cached_listings(cache: RawCache, parser: str = 'lxml') -> Iterator[Dict[str, str]]:
+    """Listing entries of every cached listing page in page order, each master once"""
+    listing_parser = get_parser(parser)
+    pages = []
+    for url, ref in cache.latest('listing').items():
+        parsed = urlparse(url)
+        page = int(parse_qs(parsed.query).get('page', ['1'])[0])
+        pages.append((page, url, ref, f"{parsed.scheme}://{parsed.netloc}"))
+
+    seen = set()
+    for page, url, ref, base_url in sorted(pages):
+        try:
+            html = json.loads(read_object(cache.directory, *ref)).get('html', '')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping cached listing {url}: {e}")
+            continue
+        for master_info in listing_parser.parse_listing(html, base_url):
+            key = master_info['id'] or master_info['url']
+            if key not in seen:
+                seen.add(key)
+                yield master_info
+
+
+def reparse(cache: RawCache, sinks, parser: str = 'lxml', processes: Optional[int] = None,
+            chunksize: int = 64) -> Dict[str, int]:
+    """
+    Rebuild every master record from cached responses with the current parsers
+
+    Listing pages are parsed in this process; profiles and phone fragments are
+    decompressed and parsed by a pool of processes (one per core by default).
+
+    Args:
+        cache: Cache filled by a crawl with --cache
+        sinks: Sinks every rebuilt master is written to
+        parser: HTML parser backend (see parsers.PARSERS)
+        processes: Parse processes (default: os.cpu_count())
+        chunksize: Profiles sent to a worker at a time
+
+    Returns:
+        Counts of masters rebuilt and of listed masters without a cached profile or phone fragment
+    """
+    profiles = cache.latest('profile')
+    phones = {}
+    for url, ref in cache.latest('phone').items():
+        match = re.search(r'/contact-phone/([^/]+)/master', urlparse(url).path)
+        if match:
+            phones[match.group(1)] = ref
+
+    counts = {'masters': 0, 'missing_profiles': 0, 'missing_phones': 0}
+
+    def tasks():
+        for master_info in cached_listings(cache, parser):
+            # Cached under the URL requests sent, which percent-encodes non-ASCII slugs
+            profile = profiles.get(requests.Request('GET', master_info['url']).prepare().url)
+            if profile is None:
+                counts['missing_profiles'] += 1
+                continue
+            phone = phones.get(str(master_info['id']))
+            if phone is None:
+                counts['missing_phones'] += 1
+            yield master_info, profile, phone
+
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count(), initializer=_init_reparse_worker,
+                             initargs=(cache.directory, parser)) as executor:
+        for master_data in executor.map(_reparse_master, tasks(), chunksize=chunksize):
+            for sink in sinks:
+                sink.write(master_data)
+            counts['masters'] += 1
+
+    logger.info(f"Re-parsed {counts['masters']} masters from {cache.directory} "
+                f"({counts['missing_profiles']} listed without a cached profile, "
+                f"{counts['missing_phones']} without cached phones)")
+    return counts
+
+
+def main(argv=None) -> int:
+    """Show cache statistics or evict old entries"""
+    parser = argparse.ArgumentParser(description='Inspect or trim the raw response cache')
+    parser.add_argument('--dir', default='raw_cache', help='Cache directory (default: raw_cache)')
+    parser.add_argument('--evict', action='store_true', help='Apply --max-mb and --max-age-days')
+    parser.add_argument('--max-mb', type=float, default=None, help='Trim the cache to this compressed size')
+    parser.add_argument('--max-age-days', type=float, default=None, help='Drop entries older than this')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    cache = RawCache(args.dir)
+    if args.evict:
+        max_bytes = int(args.max_mb * 1e6) if args.max_mb is not None else None
+        print(json.dumps(cache.evict(max_bytes, args.max_age_days)))
+    print(json.dumps(cache.stats(), indent=2))
+    cache.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Record/replay transport for the Avtotemir.az scraper
+Saves listing, profile and phone responses as on-disk fixtures and serves
+them back, either in-process through a requests transport adapter or from a
+local stand-in HTTP server with configurable latency and error rate
+
+Fixture layout:
+    <dir>/listings/page_<N>.json   - /all?page=N responses
+    <dir>/profiles/<slug>.html     - /usta/<slug> profile pages
+    <dir>/phones/<id>.html         - /contact-phone/<id>/master fragments
+"""
+
+import argparse
+import logging
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+SITE_URL = 'https://avtotemir.az'
+
+EMPTY_LISTING = b'{"html": ""}'
+
+CONTENT_TYPES = {
+    'listings': 'application/json',
+    'profiles': 'text/html; charset=UTF-8',
+    'phones': 'text/html; charset=UTF-8',
+}
+
+
+def classify_url(url: str) -> Optional[str]:
+    """Endpoint a URL belongs to: 'listing', 'profile', 'phone' or None"""
+    path = urlparse(url).path
+    if path.rstrip('/') == '/all':
+        return 'listing'
+    if path.startswith('/usta/'):
+        return 'profile'
+    if path.startswith('/contact-phone/'):
+        return 'phone'
+    return None
+
+
+class FixtureStore:
+    """Maps scraper URLs to fixture files"""
+
+    def __init__(self, directory: str = 'fixtures'):
+        """
+        Args:
+            directory: Root of the fixture corpus
+        """
+        self.directory = directory
+
+    def path_for(self, url: str) -> Optional[Tuple[str, str]]:
+        """
+        Fixture file for a URL
+
+        Returns:
+            Tuple of (kind, path), or None for URLs that are not recorded
+        """
+        parsed = urlparse(url)
+        endpoint = classify_url(url)
+
+        if endpoint == 'listing':
+            page = parse_qs(parsed.query).get('page', ['1'])[0]
+            return 'listings', os.path.join(self.directory, 'listings', f'page_{int(page)}.json')
+        if endpoint == 'profile':
+            slug = parsed.path[len('/usta/'):].strip('/').replace('/', '_')
+            return 'profiles', os.path.join(self.directory, 'profiles', f'{slug}.html')
+        if endpoint == 'phone':
+            match = re.match(r'/contact-phone/([^/]+)/master', parsed.path)
+            if match:
+                return 'phones', os.path.join(self.directory, 'phones', f'{match.group(1)}.html')
+        return None
+
+    def load(self, url: str) -> Optional[Tuple[str, bytes]]:
+        """Fixture body for a URL as (kind, body), or None if it was never recorded"""
+        found = self.path_for(url)
+        if not found:
+            return None
+        if not os.path.exists(found[1]):
+            # Like the real site, pages past the end of the listings are empty rather than missing
+            return (found[0], EMPTY_LISTING) if found[0] == 'listings' else None
+        with open(found[1], 'rb') as f:
+            return found[0], f.read()
+
+    def save(self, url: str, body: bytes):
+        """Store a response body for a URL"""
+        found = self.path_for(url)
+        if not found:
+            return
+        os.makedirs(os.path.dirname(found[1]), exist_ok=True)
+        with open(found[1], 'wb') as f:
+            f.write(body)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Transport adapter that forwards requests and saves successful responses as fixtures"""
+
+    def __init__(self, store: FixtureStore, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if response.status_code == 200:
+            self.store.save(request.url, response.content)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Transport adapter that answers requests from fixtures without touching the network"""
+
+    def __init__(self, store: FixtureStore, latency: float = 0.0, error_rate: float = 0.0):
+        """
+        Args:
+            store: Fixture corpus to serve
+            latency: Simulated seconds per response
+            error_rate: Fraction of requests answered with 503
+        """
+        super().__init__()
+        self.store = store
+        self.latency = latency
+        self.error_rate = error_rate
+
+    def send(self, request, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.encoding = 'utf-8'
+
+        found = self.store.load(request.url)
+        if self.error_rate and random.random() < self.error_rate:
+            response.status_code = 503
+            response._content = b''
+        elif found is None:
+            response.status_code = 404
+            response._content = b''
+        else:
+            kind, body = found
+            response.status_code = 200
+            response.headers['Content-Type'] = CONTENT_TYPES[kind]
+            response._content = body
+        return response
+
+    def close(self):
+        pass
+
+
+def record(session: requests.Session, directory: str = 'fixtures'):
+    """Record every response the session receives into a fixture directory"""
+    adapter = RecordingAdapter(FixtureStore(directory))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+
+def replay(session: requests.Session, directory: str = 'fixtures', latency: float = 0.0, error_rate: float = 0.0):
+    """Serve every request the session makes from a fixture directory"""
+    adapter = ReplayAdapter(FixtureStore(directory), latency=latency, error_rate=error_rate)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+
+def _escaped(url: str) -> str:
+    """URL as it appears in JSON with escaped slashes"""
+    return url.replace('/', '\\/')
+
+
+class FixtureServer:
+    """
+    Local stand-in for avtotemir.az serving a fixture corpus over HTTP
+
+    Absolute links to the real site inside fixtures are rewritten to point at
+    the server, so a scraper created with base_url=server.url never leaves localhost.
+    """
+
+    def __init__(self, directory: str = 'fixtures', host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, error_rate: float = 0.0):
+        """
+        Args:
+            directory: Fixture corpus to serve
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            latency: Simulated seconds per response
+            error_rate: Fraction of requests answered with 503
+        """
+        self.store = FixtureStore(directory)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.url = f'http://{host}:{self.httpd.server_address[1]}'
+        self._thread = None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep connections open like the real site, so benchmarks measure connection reuse
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if server.error_rate and random.random() < server.error_rate:
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                found = server.store.load(SITE_URL + self.path)
+                if found is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                kind, body = found
+                # Listing JSON escapes slashes, so rewrite both spellings of the site URL
+                for site, local in ((SITE_URL, server.url), (_escaped(SITE_URL), _escaped(server.url))):
+                    body = body.replace(site.encode(), local.encode())
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPES[kind])
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self) -> 'FixtureServer':
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        logger.info(f"Serving fixtures from {self.store.directory} at {self.url}")
+        return self
+
+    def stop(self):
+        """Stop the server"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    """Serve a fixture corpus until interrupted"""
+    parser = argparse.ArgumentParser(description='Serve recorded avtotemir.az fixtures locally')
+    parser.add_argument('--fixtures', default='fixtures', help='Fixture directory (default: fixtures)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on (default: 8000)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of delay per response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = FixtureServer(args.fixtures, port=args.port, latency=args.latency, error_rate=args.error_rate)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
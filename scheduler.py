@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Central request scheduler for the Avtotemir.az scraper
+Combines a token-bucket rate limit, retries with exponential backoff and
+jitter, Retry-After handling and an AIMD concurrency limit driven by the
+observed latency and error rate
+"""
+
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: throttling and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by all workers"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate: Tokens added per second (0 disables limiting)
+            capacity: Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif not self.rate:
+                    return
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for a while, e.g. when the server asks us to back off"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+            self._updated = self._paused_until
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit adjusted with additive-increase / multiplicative-decrease
+
+    The limit grows by roughly one slot per window of healthy responses and is
+    halved when requests fail or latency climbs well above the best seen so far.
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 16,
+                 latency_tolerance: float = 2.0, adaptive: bool = True):
+        """
+        Args:
+            initial: Starting number of concurrent requests
+            minimum: Lower bound for the limit
+            maximum: Upper bound for the limit
+            latency_tolerance: Latency above this multiple of the baseline counts as congestion
+            adaptive: Keep the limit fixed at maximum when False
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.adaptive = adaptive
+        self.limit = float(min(self.maximum, max(self.minimum, initial)) if adaptive else self.maximum)
+        self.latency_tolerance = latency_tolerance
+
+        self.in_flight = 0
+        self.latency_ewma = None
+        self.baseline_latency = None
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Wait for a free slot"""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        """Free a slot"""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self, latency: float):
+        """Grow the limit while latency stays near the baseline, shrink it when it degrades"""
+        if not self.adaptive:
+            return
+
+        with self._condition:
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * latency
+            if self.baseline_latency is None or self.latency_ewma < self.baseline_latency:
+                self.baseline_latency = self.latency_ewma
+
+            if self.latency_ewma > self.baseline_latency * self.latency_tolerance:
+                self._decrease()
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                self._condition.notify_all()
+
+    def on_failure(self):
+        """Halve the limit after a throttled, failed or timed-out request"""
+        if not self.adaptive:
+            return
+        with self._condition:
+            self._decrease()
+
+    def _decrease(self):
+        # Decrease at most once per second so a burst of failures counts as one signal
+        now = time.monotonic()
+        if now - self._last_decrease < 1.0:
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit / 2)
+        logger.info(f"Reducing concurrency to {int(self.limit)}")
+
+
+def retry_after_seconds(response: Optional[requests.Response]) -> Optional[float]:
+    """Delay requested by a Retry-After header (seconds or HTTP date), if any"""
+    if response is None:
+        return None
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RequestScheduler:
+    """Sends every scraper request through the rate limit, concurrency limit and retry policy"""
+
+    def __init__(self, requests_per_second: float = 2.0, max_concurrency: int = 4,
+                 max_retries: int = 4, backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 adaptive: bool = True):
+        """
+        Args:
+            requests_per_second: Token-bucket rate shared by all workers (0 disables it)
+            max_concurrency: Upper bound on requests in flight
+            max_retries: Retries after the first attempt for retryable failures
+            backoff_base: First backoff delay in seconds, doubled on every retry
+            backoff_max: Cap on a single backoff delay
+            adaptive: Adjust concurrency from observed latency and errors (AIMD)
+        """
+        self.bucket = TokenBucket(requests_per_second)
+        self.limit = AdaptiveLimit(
+            initial=max(1, max_concurrency // 2),
+            maximum=max_concurrency,
+            adaptive=adaptive
+        )
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+        self._stats_lock = threading.Lock()
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given retry attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, session: requests.Session, url: str, **kwargs) -> requests.Response:
+        """
+        Send a GET request, retrying throttled, failed and timed-out attempts
+
+        Returns:
+            The final response; non-retryable error statuses and the last retryable
+            one are returned for the caller's raise_for_status()
+
+        Raises:
+            requests.RequestException: When the last attempt failed without a response
+        """
+        for attempt in range(self.max_retries + 1):
+            response = None
+            error = None
+
+            self.limit.acquire()
+            try:
+                self.bucket.acquire()
+                start = time.monotonic()
+                response = session.get(url, **kwargs)
+                latency = time.monotonic() - start
+            except (requests.Timeout, requests.ConnectionError) as e:
+                error = e
+            finally:
+                self.limit.release()
+
+            if error is None and response.status_code not in RETRY_STATUSES:
+                self.limit.on_success(latency)
+                response.attempts = attempt + 1
+                return response
+
+            self.limit.on_failure()
+            with self._stats_lock:
+                if response is not None and response.status_code == 429:
+                    self.throttled += 1
+
+            if attempt == self.max_retries:
+                with self._stats_lock:
+                    self.failures += 1
+                # Callers report how hard we tried, e.g. in the dead-letter queue
+                if error is not None:
+                    error.attempts = attempt + 1
+                    raise error
+                response.attempts = attempt + 1
+                return response
+
+            delay = retry_after_seconds(response)
+            if delay is not None:
+                # The server told everyone to back off, not just this worker
+                self.bucket.pause(delay)
+            else:
+                delay = self.backoff(attempt)
+
+            reason = f"HTTP {response.status_code}" if error is None else type(error).__name__
+            logger.warning(f"{reason} for {url}, retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            with self._stats_lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def stats(self) -> Dict[str, float]:
+        """Retry and throttling counters plus the current concurrency limit"""
+        with self._stats_lock:
+            return {
+                'retries': self.retries,
+                'throttled': self.throttled,
+                'failures': self.failures,
+                'concurrency_limit': int(self.limit.limit),
+            }
@@ -5,15 +5,41 @@ Scrapes master mechanic profiles from avtotemir.az
 """
 
 import requests
-from bs4 import BeautifulSoup
+import argparse
 import json
 import csv
-import re
+import multiprocessing
+import os
+import sys
 import time
-from typing import Dict, List, Optional
-from urllib.parse import urljoin
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 import logging
 
+from checkpoint import CrawlCheckpoint
+from deadletter import DeadLetterQueue
+from incremental import ProfileStateStore, save_delta
+from media import MediaDownloader
+from parsers import PARSERS, get_parser, init_parse_process, parse_profile_in_process
+from pipeline import CrawlPipeline
+from metrics import CrawlMetrics, MetricsServer
+from profiling import StageProfiler
+from rawcache import RawCache, cache_responses, reparse
+from replay import classify_url, record, replay
+from scheduler import RequestScheduler
+from search import SearchIndex
+from storage import SqliteStore
+from timeseries import TimeSeriesSink, TimeSeriesStore
+from transport import TRANSPORTS, http2_available, mount_transport
+from workqueue import CrawlWorker, WorkQueue
+from sinks import (
+    CSV_FIELDNAMES, CsvSink, JsonlSink, ParquetSink, flatten_record, iter_latest_records, jsonl_to_csv,
+    jsonl_keys, jsonl_to_json, jsonl_to_parquet
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,8 +54,85 @@ class AvtotemirScraper:
     BASE_URL = "https://avtotemir.az"
     ALL_URL = f"{BASE_URL}/all"
 
-    def __init__(self):
+    # Keys of the /all JSON response that may carry the number of listing pages
+    # Failed listing fetches in a row after which a walk stops (the site is likely down)
+    MAX_CONSECUTIVE_FAILURES = 5
+
+    PAGINATION_KEYS = ('last_page', 'lastPage', 'total_pages', 'totalPages', 'page_count', 'pages')
+
+    def __init__(self, workers: int = 1, requests_per_second: float = 2.0,
+                 phone_workers: Optional[int] = None, queue_size: int = 100,
+                 checkpoint: Optional[CrawlCheckpoint] = None,
+                 profile_state: Optional[ProfileStateStore] = None,
+                 sinks: Optional[List] = None, keep_in_memory: bool = True,
+                 parser: str = 'lxml', base_url: Optional[str] = None,
+                 max_retries: int = 4, adaptive: bool = True,
+                 dead_letters: Optional[DeadLetterQueue] = None, skip_phones: bool = False,
+                 metrics: Optional[CrawlMetrics] = None, parse_processes: int = 0,
+                 transport: str = 'pooled', pool_size: Optional[int] = None):
+        """
+        Args:
+            workers: Number of profiles fetched concurrently
+            requests_per_second: Global request rate shared by all workers
+            phone_workers: Number of concurrent phone lookups (defaults to half the workers)
+            queue_size: Capacity of each queue between pipeline stages
+            checkpoint: Optional checkpoint store written as the crawl progresses
+            profile_state: Optional incremental state; unchanged profiles are reused
+            sinks: Streaming sinks every scraped master is written to
+            keep_in_memory: Also accumulate masters in masters_data
+            parser: HTML parser backend (see parsers.PARSERS)
+            base_url: Site to crawl instead of BASE_URL (e.g. a local fixture server)
+            max_retries: Retries for throttled, failed and timed-out requests
+            adaptive: Adjust concurrency from observed latency and error rate
+            dead_letters: Queue receiving profiles and phone lookups that keep failing
+            skip_phones: Leave phone numbers empty; fill them in later with enrich_phones()
+            metrics: Optional live metrics updated with every request, parse and page
+            parse_processes: Parse profile pages in this many processes while the
+                workers only download them (0 parses on the downloading threads)
+            transport: HTTP transport of the session (see transport.TRANSPORTS)
+            pool_size: Connections kept open per host (defaults to the maximum requests in flight)
+        """
+        if base_url:
+            self.BASE_URL = base_url.rstrip('/')
+            self.ALL_URL = f"{self.BASE_URL}/all"
+
+        self.workers = max(1, workers)
+        self.phone_workers = phone_workers or max(1, self.workers // 2)
+        self.queue_size = queue_size
+        # Listing, profile and phone stages share one rate and concurrency budget
+        max_concurrency = 1 if self.workers == 1 else self.workers + self.phone_workers + 1
+        self.scheduler = RequestScheduler(
+            requests_per_second=requests_per_second,
+            max_concurrency=max_concurrency,
+            max_retries=max_retries,
+            adaptive=adaptive
+        )
+        self.checkpoint = checkpoint
+        self.dead_letters = dead_letters
+        self._prior_attempts = {}
+        self.profile_state = profile_state
+        self.parser_name = parser
+        self.parser = get_parser(parser)
+        self.parse_processes = max(0, parse_processes)
+        # Process pool parsing profiles during scrape_all_pages() when parse_processes > 0
+        self.parse_pool: Optional[ProcessPoolExecutor] = None
+        self.sinks = sinks or []
+        self.keep_in_memory = keep_in_memory
+        self.masters_count = 0
+        self.reached_end = False
+        # Listing pages whose fetch failed during the last iter_listings() walk
+        self.failed_pages: List[int] = []
+        self.total_pages = None
+        # Listing HTML fetched while discovering the page count, reused by the crawl
+        self._probed_listings: Dict[int, str] = {}
+        self._reused_phones = set()
+        self.skip_phones = skip_phones
+        self.metrics = metrics
+        # Raw response cache, see build_scraper(); closed by close()
+        self.raw_cache: Optional[RawCache] = None
         self.session = requests.Session()
+        # Sized so every request in flight gets a kept-alive connection instead of a fresh handshake
+        self.transport = mount_transport(self.session, transport, pool_size or max_concurrency + 1)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36',
             'Accept-Language': 'en-GB,en-US;q=0.9,en;q=0.8,ru;q=0.7,az;q=0.6',
@@ -39,6 +142,36 @@ class AvtotemirScraper:
         })
         self.masters_data = []
 
+    def close(self):
+        """Close the HTTP session and the raw response cache"""
+        self.session.close()
+        if self.raw_cache:
+            self.raw_cache.close()
+
+    def transport_stats(self) -> Dict:
+        """Connection reuse of the session's transport ({} when record or replay replaced it)"""
+        return self.transport.stats() if self.transport else {}
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request through the shared session via the request scheduler"""
+        if not self.metrics:
+            return self.scheduler.request(self.session, url, **kwargs)
+
+        endpoint = classify_url(url) or 'other'
+        start = time.perf_counter()
+        try:
+            response = self.scheduler.request(self.session, url, **kwargs)
+        except requests.RequestException as e:
+            self.metrics.observe_request(endpoint, time.perf_counter() - start, type(e).__name__)
+            raise
+        error = f"HTTP {response.status_code}" if response.status_code >= 400 else None
+        self.metrics.observe_request(endpoint, time.perf_counter() - start, error)
+        return response
+
+    def _observe_parse(self, kind: str, start: float):
+        if self.metrics:
+            self.metrics.observe_parse(kind, time.perf_counter() - start)
+
     def get_page_listings(self, page: int) -> Optional[str]:
         """
         Fetch listings HTML from a specific page
@@ -49,6 +182,22 @@ class AvtotemirScraper:
         Returns:
             HTML content or None if request fails
         """
+        html = self._probed_listings.pop(page, None)
+        if html is not None:
+            return html
+        data = self.get_page_data(page)
+        return data.get('html', '') if data is not None else None
+
+    def get_page_data(self, page: int) -> Optional[Dict]:
+        """
+        Fetch the JSON response of a listings page
+
+        Args:
+            page: Page number to fetch
+
+        Returns:
+            Decoded response (listing HTML and any pagination metadata) or None if request fails
+        """
         try:
             logger.info(f"Fetching page {page}...")
             # Add AJAX headers for this endpoint
@@ -56,7 +205,7 @@ class AvtotemirScraper:
                 'Accept': 'application/json, text/javascript, */*; q=0.01',
                 'X-Requested-With': 'XMLHttpRequest',
             }
-            response = self.session.get(
+            response = self._get(
                 self.ALL_URL,
                 params={'page': page},
                 headers=headers,
@@ -64,12 +213,105 @@ class AvtotemirScraper:
             )
             response.raise_for_status()
 
-            data = response.json()
-            return data.get('html', '')
+            return response.json()
 
         except requests.RequestException as e:
             logger.error(f"Error fetching page {page}: {e}")
+            self.record_failure('listing', self.listing_url(page), None, e)
+            return None
+
+    def pagination_total(self, data: Dict) -> Optional[int]:
+        """Number of listing pages from pagination metadata in an /all response, if present"""
+        for container in (data, data.get('pagination'), data.get('meta')):
+            if not isinstance(container, dict):
+                continue
+            for key in self.PAGINATION_KEYS:
+                value = container.get(key)
+                if isinstance(value, (int, str)) and str(value).isdigit():
+                    return int(value)
+            total, per_page = container.get('total'), container.get('per_page')
+            if isinstance(total, int) and isinstance(per_page, int) and per_page > 0:
+                return -(-total // per_page)
+        return None
+
+    def page_has_masters(self, page: int, data: Optional[Dict] = None) -> Optional[bool]:
+        """
+        Check whether a listing page lists any masters, keeping its HTML for the crawl
+
+        Args:
+            page: Page number
+            data: Already fetched response of the page
+
+        Returns:
+            None if the page could not be fetched
+        """
+        if data is None:
+            data = self.get_page_data(page)
+        if data is None:
             return None
+        html = data.get('html', '')
+        has_masters = bool(html.strip()) and bool(self.parser.parse_listing(html, self.BASE_URL))
+        if has_masters:
+            self._probed_listings[page] = html
+        return has_masters
+
+    def discover_page_count(self, start_page: int = 1, limit: Optional[int] = None) -> Optional[int]:
+        """
+        Find the last listing page before crawling
+
+        Uses pagination metadata of the /all response when the site provides it,
+        otherwise probes pages start_page + 1, 2, 4, 8, ... until one is empty and
+        binary-searches between the last full and the first empty page. That is
+        about 2 * log2(pages) requests; probed pages are reused by the crawl.
+
+        Args:
+            start_page: First page of the crawl, expected to list masters
+            limit: Highest page number worth probing
+
+        Returns:
+            Last page with masters (start_page - 1 if there are none), or None if a probe failed
+        """
+        data = self.get_page_data(start_page)
+        if data is None:
+            return None
+        has_masters = self.page_has_masters(start_page, data)
+        total = self.pagination_total(data)
+        if total is not None:
+            logger.info(f"Listings have {total} pages (pagination metadata)")
+            return min(total, limit) if limit else total
+
+        if not has_masters:
+            return start_page - 1
+
+        low, high, step = start_page, None, 1
+        while high is None:
+            probe = start_page + step if limit is None else min(start_page + step, limit)
+            has_masters = self.page_has_masters(probe)
+            if has_masters is None:
+                return None
+            if not has_masters:
+                high = probe
+            elif probe == limit:
+                return limit
+            else:
+                low, step = probe, step * 2
+
+        while high - low > 1:
+            middle = (low + high) // 2
+            has_masters = self.page_has_masters(middle)
+            if has_masters is None:
+                return None
+            if has_masters:
+                low = middle
+            else:
+                high = middle
+
+        logger.info(f"Listings have {low} pages (probed)")
+        return low
+
+    def listing_url(self, page: int) -> str:
+        """URL of a listing page"""
+        return f"{self.ALL_URL}?page={page}"
 
     def extract_master_links(self, html: str) -> List[Dict[str, str]]:
         """
@@ -81,40 +323,44 @@ class AvtotemirScraper:
         Returns:
             List of dictionaries with master URLs, IDs, and location
         """
-        soup = BeautifulSoup(html, 'html.parser')
-        masters = []
-
-        # Find all article elements
-        for article in soup.find_all('article'):
-            # Find the master profile link
-            link = article.find('a', href=re.compile(r'/usta/'))
-            if link:
-                master_url = link.get('href')
-                # Extract master ID from URL or data attributes
-                master_id = None
-                location = ''
-
-                # Try to find master ID from data-link attributes
-                info_link = article.find('a', class_='position open-modal-dialog')
-                if info_link and info_link.get('data-link'):
-                    match = re.search(r'/usta/(\d+)/info', info_link['data-link'])
-                    if match:
-                        master_id = match.group(1)
-
-                # Extract location from listing
-                location_li = article.find('i', class_=re.compile(r'fa-map-marker'))
-                if location_li and location_li.parent:
-                    location = location_li.parent.get_text(strip=True)
-
-                masters.append({
-                    'url': master_url if master_url.startswith('http') else urljoin(self.BASE_URL, master_url),
-                    'id': master_id,
-                    'location': location
-                })
-
+        start = time.perf_counter()
+        masters = self.parser.parse_listing(html, self.BASE_URL)
+        self._observe_parse('listing', start)
         logger.info(f"Found {len(masters)} masters on this page")
         return masters
 
+    def fetch_phones(self, master_id: str) -> List[str]:
+        """
+        Fetch master's phone numbers from contact endpoint
+
+        Args:
+            master_id: Master's ID
+
+        Returns:
+            List of phone numbers
+
+        Raises:
+            requests.RequestException: When the request fails after all retries
+        """
+        url = self.phone_url(master_id)
+        # Add AJAX headers for this endpoint
+        headers = {
+            'Accept': 'text/html, */*; q=0.01',
+            'X-Requested-With': 'XMLHttpRequest',
+        }
+        response = self._get(url, headers=headers, timeout=15)
+        response.raise_for_status()
+
+        start = time.perf_counter()
+        phones = self.parser.parse_phones(response.text)
+        self._observe_parse('phone', start)
+        logger.info(f"Found {len(phones)} phone numbers for master {master_id}")
+        return phones
+
+    def phone_url(self, master_id: str) -> str:
+        """URL of a master's contact phone fragment"""
+        return f"{self.BASE_URL}/contact-phone/{master_id}/master"
+
     def get_master_phone(self, master_id: str) -> List[str]:
         """
         Get master's phone numbers from contact endpoint
@@ -129,34 +375,40 @@ class AvtotemirScraper:
             return []
 
         try:
-            url = f"{self.BASE_URL}/contact-phone/{master_id}/master"
-            # Add AJAX headers for this endpoint
-            headers = {
-                'Accept': 'text/html, */*; q=0.01',
-                'X-Requested-With': 'XMLHttpRequest',
-            }
-            response = self.session.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            phones = []
+            return self.fetch_phones(master_id)
+        except requests.RequestException as e:
+            logger.error(f"Error fetching phone for master {master_id}: {e}")
+            return []
 
-            # Extract phone numbers from href="tel:..." links
-            for phone_link in soup.find_all('a', href=re.compile(r'tel:')):
-                phone_text = phone_link.get_text(strip=True)
-                # Remove icon text and get just the number
-                phone_number = re.sub(r'\s+', ' ', phone_text).strip()
-                if phone_number:
-                    phones.append(phone_number)
+    def attach_phones(self, master_data: Dict) -> bool:
+        """
+        Fetch phone numbers into a scraped profile
 
-            logger.info(f"Found {len(phones)} phone numbers for master {master_id}")
-            return phones
+        A failed lookup leaves the phones empty and sends the profile to the dead-letter queue.
 
+        Returns:
+            True if the phone numbers were fetched
+        """
+        master_id = master_data.get('id')
+        try:
+            master_data['phone_numbers'] = self.fetch_phones(master_id)
+            return True
         except requests.RequestException as e:
             logger.error(f"Error fetching phone for master {master_id}: {e}")
-            return []
+            self.record_failure('phone', self.phone_url(master_id), master_id, e,
+                                master_data.get('location', ''), record=master_data)
+            return False
+
+    def record_failure(self, kind: str, url: str, master_id: Optional[str], error: Exception,
+                       location: str = '', record: Optional[Dict] = None):
+        """Send a failed profile or phone lookup to the dead-letter queue"""
+        if not self.dead_letters:
+            return
+        previous_attempts = self._prior_attempts.get(f"{kind}:{master_id or url}", 0)
+        self.dead_letters.add(kind, url, master_id, error, location, record, previous_attempts)
 
-    def scrape_master_profile(self, master_url: str, master_id: Optional[str], location: str = '') -> Dict:
+    def scrape_master_profile(self, master_url: str, master_id: Optional[str], location: str = '',
+                              fetch_phone: bool = True) -> Dict:
         """
         Scrape detailed information from master's profile page
 
@@ -164,120 +416,119 @@ class AvtotemirScraper:
             master_url: URL of master's profile
             master_id: Master's ID
             location: Location from listing page
+            fetch_phone: Also fetch phone numbers from the contact endpoint
 
         Returns:
             Dictionary with master's information
         """
         try:
-            logger.info(f"Scraping profile: {master_url}")
-            response = self.session.get(master_url, timeout=30)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            master_data = {
-                'url': master_url,
-                'id': master_id,
-                'name': '',
-                'position': '',
-                'car_brands': '',
-                'location': location,
-                'rating': '',
-                'votes': '',
-                'experience': '',
-                'views': '',
-                'added_date': '',
-                'address': '',
-                'note': '',
-                'phone_numbers': [],
-                'services': [],
-                'images': []
-            }
+            previous, html = self.fetch_master_profile(master_url, master_id, location)
+            if previous is not None:
+                if fetch_phone and self.needs_phone_lookup(previous):
+                    self.attach_phones(previous)
+                return previous
+            if html is None:
+                return {}
 
-            # Extract name
-            name_elem = soup.select_one('.master_info .body h2')
-            if name_elem:
-                master_data['name'] = name_elem.get_text(strip=True)
-
-            # Extract position/profession
-            position_elem = soup.select_one('.master_info .body ul li span i.fa-wrench')
-            if position_elem and position_elem.parent:
-                master_data['position'] = position_elem.parent.get_text(strip=True)
-
-            # Extract car brands
-            car_elem = soup.select_one('.master_info .body ul li span i.fa-car')
-            if car_elem and car_elem.parent:
-                master_data['car_brands'] = car_elem.parent.get_text(strip=True)
-
-            # Extract location
-            location_elem = soup.select_one('.master_info .body ul li span i.fa-map-marker-alt')
-            if location_elem and location_elem.parent:
-                master_data['location'] = location_elem.parent.get_text(strip=True)
-
-            # Extract rating and votes
-            rating_elem = soup.select_one('#result')
-            if rating_elem:
-                rating_text = rating_elem.get_text(strip=True)
-                # Parse "4.6 (9 səs)"
-                rating_match = re.search(r'([\d.]+)\s*\((\d+)', rating_text)
-                if rating_match:
-                    master_data['rating'] = rating_match.group(1)
-                    master_data['votes'] = rating_match.group(2)
-
-            # Extract experience, views, added date from master_details
-            details_main = soup.select_one('.master_details .main')
-            if details_main:
-                for span in details_main.find_all('span'):
-                    text = span.get_text(strip=True)
-                    if 'Təcrübə:' in text:
-                        master_data['experience'] = text.replace('Təcrübə:', '').strip()
-                    elif 'Baxılıb:' in text:
-                        master_data['views'] = text.replace('Baxılıb:', '').strip()
-                    elif 'Əlavə olundu:' in text:
-                        master_data['added_date'] = text.replace('Əlavə olundu:', '').strip()
-
-            # Extract address
-            address_elem = soup.select_one('.master_address .marker-link span')
-            if address_elem:
-                master_data['address'] = address_elem.get_text(strip=True)
-
-            # Extract note/description
-            note_elem = soup.select_one('.master_service .text')
-            if note_elem:
-                # Get all paragraphs and combine them
-                note_paragraphs = note_elem.find_all('p')
-                master_data['note'] = ' '.join([p.get_text(strip=True) for p in note_paragraphs])
-
-            # Extract services from positions table
-            positions_table = soup.select('#positions tbody tr')
-            for row in positions_table:
-                cells = row.find_all('td')
-                if len(cells) >= 2:
-                    service = {
-                        'position': cells[0].get_text(strip=True),
-                        'car': cells[1].get_text(strip=True)
-                    }
-                    master_data['services'].append(service)
-
-            # Extract images
-            for img in soup.select('#master_gallery img'):
-                img_src = img.get('src')
-                if img_src:
-                    master_data['images'].append(img_src)
-
-            # Get phone numbers
-            if master_id:
-                master_data['phone_numbers'] = self.get_master_phone(master_id)
-                time.sleep(0.5)  # Small delay between requests
-
-            logger.info(f"Successfully scraped: {master_data['name']}")
-            return master_data
+            master_data = self.parse_master_profile(html, master_url, master_id, location)
+            return self.complete_master_profile(master_data, fetch_phone)
 
         except requests.RequestException as e:
             logger.error(f"Error scraping profile {master_url}: {e}")
+            self.record_failure('profile', master_url, master_id, e, location)
             return {}
 
-    def scrape_all_pages(self, start_page: int = 1, end_page: Optional[int] = None, max_pages: int = 100):
+    def fetch_master_profile(self, master_url: str, master_id: Optional[str],
+                             location: str = '') -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Download a profile page without parsing it
+
+        Args:
+            master_url: URL of master's profile
+            master_id: Master's ID
+            location: Location from listing page
+
+        Returns:
+            (previous record, None) when the page is unchanged since the last crawl,
+            (None, HTML) when it has to be parsed, or (None, None) if the request failed
+        """
+        try:
+            logger.info(f"Scraping profile: {master_url}")
+            key = str(master_id or master_url)
+            headers = self.profile_state.conditional_headers(key) if self.profile_state else {}
+            response = self._get(master_url, headers=headers, timeout=30)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.error(f"Error scraping profile {master_url}: {e}")
+            self.record_failure('profile', master_url, master_id, e, location)
+            return None, None
+
+        if self.profile_state:
+            previous = self.profile_state.reuse(key, response)
+            if previous is not None:
+                # Profile page is unchanged since the last crawl - skip parsing, and the
+                # phone lookup unless the previous crawl stored no phone numbers
+                if not self.profile_state.needs_phone_lookup(previous):
+                    self._reused_phones.add(key)
+                logger.info(f"Unchanged since last crawl: {master_url}")
+                return previous, None
+
+        return None, response.text
+
+    def complete_master_profile(self, master_data: Dict, fetch_phone: bool = True) -> Dict:
+        """
+        Fill phone numbers into a parsed profile, reusing the previous crawl's when possible
+
+        Args:
+            master_data: Parsed profile
+            fetch_phone: Also fetch phone numbers from the contact endpoint
+
+        Returns:
+            The completed profile
+        """
+        key = ProfileStateStore.master_key(master_data)
+        if self.profile_state and not self.profile_state.needs_phone_lookup(master_data):
+            master_data['phone_numbers'] = self.profile_state.previous_phones(key)
+            self._reused_phones.add(key)
+
+        # Get phone numbers
+        if fetch_phone and self.needs_phone_lookup(master_data):
+            self.attach_phones(master_data)
+
+        logger.info(f"Successfully scraped: {master_data['name']}")
+        return master_data
+
+    def needs_phone_lookup(self, master_data: Dict) -> bool:
+        """Check whether a scraped master still needs its phone numbers fetched"""
+        if self.skip_phones or not master_data.get('id'):
+            return False
+        return str(master_data['id']) not in self._reused_phones
+
+    def parse_master_profile(self, html: str, master_url: str, master_id: Optional[str], location: str = '') -> Dict:
+        """
+        Extract master's information from profile page HTML
+
+        Args:
+            html: Profile page HTML
+            master_url: URL of master's profile
+            master_id: Master's ID
+            location: Location from listing page
+
+        Returns:
+            Dictionary with master's information (without phone numbers)
+        """
+        start = time.perf_counter()
+        if self.parse_pool:
+            # Runs in a parse process; this thread only waits, without holding the GIL
+            master_data = self.parse_pool.submit(parse_profile_in_process, html, master_url, master_id,
+                                                 location).result()
+        else:
+            master_data = self.parser.parse_profile(html, master_url, master_id, location)
+        self._observe_parse('profile', start)
+        return master_data
+
+    def scrape_all_pages(self, start_page: int = 1, end_page: Optional[int] = None, max_pages: int = 100,
+                         discover: bool = True):
         """
         Scrape all pages of master listings
 
@@ -285,21 +536,127 @@ class AvtotemirScraper:
             start_page: Page to start from
             end_page: Page to end at (None for auto-detect)
             max_pages: Maximum number of pages to scrape
+            discover: Find the page count up front (see discover_page_count) when end_page is None
+        """
+        last_page = start_page + max_pages
+        self.reached_end = False
+        if self.checkpoint:
+            start_page = self.checkpoint.resume_page(start_page)
+            logger.info(f"Resuming from page {start_page}")
+        if self.metrics:
+            self.metrics.attach(scheduler_stats=self.scheduler.stats, transport_stats=self.transport_stats)
+            self.metrics.start(start_page, end_page if end_page is not None else last_page)
+        if discover and end_page is None:
+            self.total_pages = self.discover_page_count(start_page, last_page)
+            if self.total_pages is not None:
+                end_page = self.total_pages
+                if self.metrics:
+                    self.metrics.set_total_pages(self.total_pages)
+
+        if end_page is not None and end_page < start_page:
+            # E.g. discovery found no masters at all (page count 0), or a resumed crawl had finished
+            logger.info(f"No listing pages to crawl from page {start_page} (last page {end_page})")
+            self.reached_end = True
+            if self.checkpoint:
+                self.checkpoint.close()
+            if self.metrics:
+                self.metrics.finish(self.masters_count)
+            return
+
+        if self.workers > 1:
+            # Listing, profile and phone stages run concurrently behind bounded queues
+            if self.parse_processes:
+                # Spawned, not forked: the first submit comes from a parse thread while the
+                # fetch threads may hold logging, sqlite or urllib3 locks a fork would copy
+                self.parse_pool = ProcessPoolExecutor(
+                    max_workers=self.parse_processes, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_parse_process, initargs=(self.parser_name,)
+                )
+            pipeline = CrawlPipeline(
+                self,
+                profile_workers=self.workers,
+                phone_workers=self.phone_workers,
+                queue_size=self.queue_size,
+                parse_workers=2 * self.parse_processes
+            )
+            if self.metrics:
+                self.metrics.attach(queue_depths=pipeline.queue_depths)
+            try:
+                pipeline.run(start_page, end_page, last_page)
+            finally:
+                if self.parse_pool:
+                    self.parse_pool.shutdown()
+                    self.parse_pool = None
+        else:
+            for page, masters in self.iter_listings(start_page, end_page, last_page):
+                # Politeness is enforced by the rate limiter
+                for master_info in masters:
+                    master_data = self.scrape_master_profile(
+                        master_info['url'],
+                        master_info['id'],
+                        master_info.get('location', '')
+                    )
+                    if master_data:
+                        self.add_master(master_data)
+
+                self.complete_page(page)
+
+        if self.checkpoint:
+            self.checkpoint.close()
+        if self.metrics:
+            self.metrics.finish(self.masters_count)
+
+        logger.info(f"Scraping completed. Total masters collected: {self.masters_count}")
+        logger.info(f"Request stats: {self.scheduler.stats()}")
+        logger.info(f"Connection stats: {self.transport_stats()}")
+
+    def iter_listings(self, start_page: int, end_page: Optional[int], last_page: int) -> Iterator[Tuple[int, List[Dict[str, str]]]]:
+        """
+        Walk listing pages until the end of the listings is detected
+
+        Args:
+            start_page: Page to start from
+            end_page: Page to end at (None for auto-detect)
+            last_page: Hard upper bound on the page number
+
+        Pages whose fetch failed are collected in failed_pages; unlike empty
+        pages they never count towards the end of the listings.
+
+        Yields:
+            Tuples of (page number, masters found on that page)
         """
         current_page = start_page
         consecutive_empty = 0
+        consecutive_failures = 0
+        self.failed_pages = []
 
-        while current_page <= (end_page or start_page + max_pages):
+        while current_page <= (end_page if end_page is not None else last_page):
             # Get listings for current page
             html = self.get_page_listings(current_page)
 
-            if not html or not html.strip():
+            if html is None:
+                # Request failed (already dead-lettered): the page may well have masters
+                self.failed_pages.append(current_page)
+                consecutive_failures += 1
+                if consecutive_failures >= self.MAX_CONSECUTIVE_FAILURES:
+                    logger.error(f"Giving up after {consecutive_failures} failed listing pages in a row "
+                                 f"(page {current_page})")
+                    break
+                current_page += 1
+                continue
+            consecutive_failures = 0
+
+            if not html.strip():
                 consecutive_empty += 1
                 logger.warning(f"Page {current_page} returned no content ({consecutive_empty} consecutive empty)")
 
                 # If we get 3 consecutive empty pages, assume we've reached the end
                 if consecutive_empty >= 3:
                     logger.info(f"Reached end of listings at page {current_page}")
+                    self.reached_end = True
+                    if self.total_pages is None and self.metrics:
+                        # The end is known now, so progress can reach 100%
+                        self.metrics.set_total_pages(current_page - consecutive_empty)
                     break
 
                 current_page += 1
@@ -316,26 +673,106 @@ class AvtotemirScraper:
                 current_page += 1
                 continue
 
-            # Scrape each master profile
-            for master_info in masters:
-                master_data = self.scrape_master_profile(
-                    master_info['url'],
-                    master_info['id'],
-                    master_info.get('location', '')
-                )
-                if master_data:
-                    self.masters_data.append(master_data)
+            if self.checkpoint:
+                # Skip masters already collected before a restart
+                masters = [m for m in masters if not self.checkpoint.is_scraped(m)]
 
-                # Be polite - delay between requests
-                time.sleep(1)
+            yield current_page, masters
+            current_page += 1
 
-            logger.info(f"Completed page {current_page}. Total masters scraped: {len(self.masters_data)}")
+        if self.total_pages is not None and current_page > self.total_pages:
+            self.reached_end = True
 
-            # Delay between pages
-            time.sleep(2)
-            current_page += 1
+    def retry_failed(self):
+        """
+        Re-process only the items in the dead-letter queue
+
+        Failed listing pages are fetched and all their masters scraped, failed
+        profiles are scraped again (including phones) and failed phone lookups are
+        retried, emitting their stored profile record with the phones filled in.
+        Items that fail again go back into the queue with their attempt count carried over.
+        """
+        entries = self.dead_letters.begin_retry()
+        self._prior_attempts = {DeadLetterQueue.entry_key(entry): entry['attempts'] for entry in entries}
+        logger.info(f"Retrying {len(entries)} failed items")
+
+        def process(entry: Dict) -> List[Dict]:
+            if entry['kind'] == 'listing':
+                page = int(parse_qs(urlparse(entry['url']).query)['page'][0])
+                html = self.get_page_listings(page)
+                return [self._scrape_master(master_info) for master_info in self.extract_master_links(html or '')]
+
+            if entry['kind'] == 'profile':
+                return [self.scrape_master_profile(entry['url'], entry['id'], entry.get('location', ''))]
+
+            master_data = entry['record']
+            return [master_data] if self.attach_phones(master_data) else []
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for results in executor.map(process, entries):
+                for master_data in results:
+                    if master_data:
+                        self.add_master(master_data)
+
+        self.dead_letters.finish_retry()
+        self._prior_attempts = {}
+        logger.info(f"Recovered {self.masters_count} masters from {len(entries)} failed items, "
+                    f"{self.dead_letters.count} still failing")
+
+    def enrich_phones(self, masters: Iterable[Dict], batch_size: int = 100) -> int:
+        """
+        Fetch phone numbers for already scraped masters and emit the updated records
 
-        logger.info(f"Scraping completed. Total masters collected: {len(self.masters_data)}")
+        Runs with this scraper's own workers and rate budget, independently of any crawl.
+
+        Args:
+            masters: Records to enrich (may be a lazy iterator)
+            batch_size: Records in flight at a time, bounding memory for large inputs
+
+        Returns:
+            Number of masters whose phones were fetched
+        """
+        enriched = 0
+        masters = (m for m in masters if m.get('id'))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                batch = list(islice(masters, batch_size))
+                if not batch:
+                    break
+                for master_data, fetched in zip(batch, executor.map(self.attach_phones, batch)):
+                    if fetched:
+                        self.add_master(master_data)
+                        enriched += 1
+
+        logger.info(f"Enriched {enriched} masters with phone numbers")
+        return enriched
+
+    def _scrape_master(self, master_info: Dict[str, str]) -> Dict:
+        """Scrape a single listing entry"""
+        return self.scrape_master_profile(master_info['url'], master_info['id'], master_info.get('location', ''))
+
+    def add_master(self, master_data: Dict):
+        """Collect a scraped master, stream it to the sinks and record it in the checkpoint"""
+        self.masters_count += 1
+        if self.keep_in_memory:
+            self.masters_data.append(master_data)
+        for sink in self.sinks:
+            sink.write(master_data)
+        if self.checkpoint:
+            self.checkpoint.add_record(master_data)
+        if self.profile_state:
+            self.profile_state.observe(master_data)
+
+    def complete_page(self, page: int):
+        """Mark a listing page as fully scraped"""
+        for sink in self.sinks:
+            sink.flush()
+        if self.checkpoint:
+            self.checkpoint.complete_page(page)
+        if self.metrics:
+            self.metrics.page_completed(page, self.masters_count)
+        logger.info(f"Completed page {page}. Total masters scraped: {self.masters_count}")
 
     def save_to_json(self, filename: str = 'avtotemir_masters.json'):
         """Save scraped data to JSON file"""
@@ -353,46 +790,500 @@ class AvtotemirScraper:
             return
 
         try:
-            # Flatten the data for CSV
-            flattened_data = []
-            for master in self.masters_data:
-                flat_master = master.copy()
-                # Convert lists to strings
-                flat_master['phone_numbers'] = '; '.join(master.get('phone_numbers', []))
-                flat_master['services'] = '; '.join([
-                    f"{s.get('position', '')} ({s.get('car', '')})"
-                    for s in master.get('services', [])
-                ])
-                flat_master['images'] = '; '.join(master.get('images', []))
-                flattened_data.append(flat_master)
-
-            # Get all possible fieldnames
-            fieldnames = [
-                'id', 'name', 'position', 'car_brands', 'location',
-                'rating', 'votes', 'experience', 'views', 'added_date',
-                'address', 'phone_numbers', 'services', 'note', 'images', 'url'
-            ]
-
             with open(filename, 'w', encoding='utf-8', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES, extrasaction='ignore')
                 writer.writeheader()
-                writer.writerows(flattened_data)
+                for master in self.masters_data:
+                    writer.writerow(flatten_record(master))
 
             logger.info(f"Data saved to {filename}")
         except Exception as e:
             logger.error(f"Error saving to CSV: {e}")
 
-
-def main():
-    """Main function to run the scraper"""
-    scraper = AvtotemirScraper()
+    def save_to_parquet(self, filename: str = 'avtotemir_masters.parquet'):
+        """Save scraped data to a typed Parquet file (requires pyarrow)"""
+        try:
+            sink = ParquetSink(filename)
+            for master in self.masters_data:
+                sink.write(master)
+            sink.close()
+        except Exception as e:
+            logger.error(f"Error saving to Parquet: {e}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    # Options shared by every command
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--workers', type=int, default=4,
+                        help='Number of profiles fetched concurrently (default: 4)')
+    common.add_argument('--rps', type=float, default=2.0,
+                        help='Global requests per second across all workers (default: 2.0)')
+    common.add_argument('--max-retries', type=int, default=4,
+                        help='Retries for throttled (429), 5xx and timed-out requests (default: 4)')
+    common.add_argument('--no-adaptive', action='store_true',
+                        help='Keep concurrency fixed instead of adapting it to latency and errors')
+    common.add_argument('--parser', choices=sorted(PARSERS), default='lxml',
+                        help='HTML parser backend (default: lxml)')
+    common.add_argument('--base-url', default=None,
+                        help='Crawl another host instead of avtotemir.az (e.g. a replay.py fixture server)')
+    common.add_argument('--transport', choices=TRANSPORTS, default='pooled',
+                        help='HTTP transport: pooled keep-alive connections, or http2 to multiplex requests '
+                             'over a few HTTP/2 connections (requires httpx[http2]) (default: pooled)')
+    common.add_argument('--pool-size', type=int, default=None,
+                        help='Connections kept open per host (default: the maximum requests in flight)')
+    common.add_argument('--record', metavar='DIR', default=None,
+                        help='Save every listing, profile and phone response as fixtures in DIR')
+    common.add_argument('--replay', metavar='DIR', default=None,
+                        help='Answer every request from fixtures in DIR instead of the network')
+    common.add_argument('--db', metavar='PATH', default=None,
+                        help='Also upsert masters into this SQLite database (see storage.py)')
+    common.add_argument('--cache', metavar='DIR', default=None,
+                        help='Keep compressed raw listing, profile and phone responses in DIR for reparse')
+    common.add_argument('--cache-max-mb', type=float, default=None,
+                        help='With --cache: trim the cache to this compressed size at the end of the run')
+    common.add_argument('--cache-max-age-days', type=float, default=None,
+                        help='With --cache: drop cached responses older than this at the end of the run')
+    common.add_argument('--dead-letters', default='dead_letters.jsonl',
+                        help='File collecting profiles and phone lookups that keep failing '
+                             '(default: dead_letters.jsonl)')
+    common.add_argument('--profile', action='store_true',
+                        help='Time every stage (fetch, parse, waits, output) and print a report at the end')
+    common.add_argument('--profile-top', type=int, default=10, metavar='N',
+                        help='With --profile: number of slowest URLs reported (default: 10)')
+    common.add_argument('--profile-dump', metavar='FILE', default=None,
+                        help='Also write cProfile stats of all threads to FILE (implies --profile)')
+
+    parser = argparse.ArgumentParser(description='Scrape master profiles from avtotemir.az')
+    commands = parser.add_subparsers(dest='command')
+
+    crawl = commands.add_parser('crawl', parents=[common], help='Crawl the listings (default command)')
+    crawl.add_argument('--phone-workers', type=int, default=None,
+                       help='Number of concurrent phone lookups (default: half of --workers)')
+    crawl.add_argument('--parse-processes', type=int, default=0,
+                       help='Parse profile pages in this many processes while --workers threads only download '
+                            '(default: 0, parse on the downloading threads)')
+    crawl.add_argument('--queue-size', type=int, default=100,
+                       help='Capacity of each queue between pipeline stages (default: 100)')
+    crawl.add_argument('--start-page', type=int, default=1, help='Page to start from')
+    crawl.add_argument('--max-pages', type=int, default=1000, help='Maximum number of pages to scrape')
+    crawl.add_argument('--no-discover', action='store_true',
+                       help='Do not look up the page count first; stop after 3 empty pages instead')
+    crawl.add_argument('--checkpoint-dir', default='checkpoint',
+                       help='Directory for crawl checkpoints (default: checkpoint)')
+    crawl.add_argument('--resume', action='store_true',
+                       help='Resume from the checkpoint instead of starting over')
+    crawl.add_argument('--skip-phones', action='store_true',
+                       help='Do not fetch phone numbers; fill them in later with enrich-phones')
+    crawl.add_argument('--no-stream', action='store_true',
+                       help='Keep all masters in memory and write the output files only at the end')
+    crawl.add_argument('--parquet', action='store_true',
+                       help='Also write avtotemir_masters.parquet with typed columns (requires pyarrow)')
+    crawl.add_argument('--timeseries', metavar='FILE', nargs='?', const='timeseries.jsonl.gz', default=None,
+                       help='Append views, votes and rating of this crawl to a time series '
+                            '(default file: timeseries.jsonl.gz, with its state in FILE.state.json; '
+                            'see timeseries.py)')
+    crawl.add_argument('--search-index', metavar='FILE', nargs='?', const='avtotemir_search.db', default=None,
+                       help='Keep a full-text search index of the masters up to date '
+                            '(default file: avtotemir_search.db, query it with search.py)')
+    crawl.add_argument('--media', metavar='DIR', nargs='?', const='media', default=None,
+                       help='Download gallery images in the background, deduplicated by content, with '
+                            'thumbnails (default directory: media, see media.py)')
+    crawl.add_argument('--media-workers', type=int, default=4,
+                       help='Concurrent image downloads (default: 4)')
+    crawl.add_argument('--media-rps', type=float, default=4.0,
+                       help='Image requests per second, separate from --rps (default: 4)')
+    crawl.add_argument('--thumbnail-size', type=int, default=256,
+                       help='Longest thumbnail side in pixels, 0 disables thumbnails (default: 256)')
+    crawl.add_argument('--thumbnail-processes', type=int, default=1,
+                       help='Processes writing thumbnails (default: 1)')
+    crawl.add_argument('--status-file', default='crawl_status.json',
+                       help="Live status JSON read by monitor.sh (default: crawl_status.json, '' disables it)")
+    crawl.add_argument('--metrics-port', type=int, default=None,
+                       help='Serve Prometheus metrics on http://127.0.0.1:PORT/metrics (and JSON on /status)')
+    crawl.add_argument('--incremental', action='store_true',
+                       help='Reuse unchanged profiles from the previous crawl and write a delta')
+    crawl.add_argument('--state-file', default='crawl_state.json',
+                       help='Incremental crawl state file (default: crawl_state.json)')
+    crawl.add_argument('--delta-file', default='avtotemir_masters_delta.json',
+                       help='Output file for added/changed/removed masters (default: avtotemir_masters_delta.json)')
+
+    commands.add_parser('retry-failed', parents=[common],
+                        help='Re-process only the items in the dead-letter queue')
+
+    enrich = commands.add_parser('enrich-phones', parents=[common],
+                                 help='Fetch phone numbers for masters crawled with --skip-phones')
+    enrich.add_argument('--district', action='append', default=[],
+                        help='Only masters in this district (repeatable)')
+    enrich.add_argument('--ids', default=None, help='Only these comma-separated master IDs')
+    enrich.add_argument('--delta', metavar='FILE', default=None,
+                        help='Only masters added in this incremental crawl delta file')
+    enrich.add_argument('--all', action='store_true',
+                        help='Also re-fetch masters that already have phone numbers')
+
+    coordinator = commands.add_parser('coordinator',
+                                      help='Seed a shared work queue for workers, wait for them and export results')
+    coordinator.add_argument('--queue', default='crawl_queue.db',
+                             help='SQLite work queue shared with the workers (default: crawl_queue.db)')
+    coordinator.add_argument('--start-page', type=int, default=1, help='Page to start from')
+    coordinator.add_argument('--max-pages', type=int, default=1000, help='Maximum number of pages to scrape')
+    coordinator.add_argument('--discover', action='store_true',
+                             help='Look up the page count first and only queue pages that exist')
+    coordinator.add_argument('--base-url', default=None,
+                             help='With --discover: site the workers crawl instead of avtotemir.az')
+    coordinator.add_argument('--range-size', type=int, default=10,
+                             help='Listing pages per work item (default: 10)')
+    coordinator.add_argument('--poll', type=float, default=10.0,
+                             help='Seconds between progress reports while waiting (default: 10)')
+    coordinator.add_argument('--no-wait', action='store_true',
+                             help='Only seed the queue; export later with --export-only')
+    coordinator.add_argument('--export-only', action='store_true',
+                             help='Do not seed or wait; export the results collected so far')
+    coordinator.add_argument('--parquet', action='store_true',
+                             help='Also write avtotemir_masters.parquet (requires pyarrow)')
+    coordinator.add_argument('--db', metavar='PATH', default=None,
+                             help='Also upsert the results into this SQLite database (see storage.py)')
+
+    worker = commands.add_parser('worker', parents=[common],
+                                 help='Lease pages and masters from a coordinator queue until it is drained')
+    worker.add_argument('--queue', default='crawl_queue.db',
+                        help='SQLite work queue written by the coordinator (default: crawl_queue.db)')
+    worker.add_argument('--worker-id', default=None, help='Unique worker name (default: host-pid-random)')
+    worker.add_argument('--lease', type=float, default=120.0,
+                        help='Seconds a leased item stays reserved without a heartbeat (default: 120)')
+    worker.add_argument('--skip-phones', action='store_true',
+                        help='Do not fetch phone numbers; fill them in later with enrich-phones')
+
+    reparse_command = commands.add_parser('reparse',
+                                          help='Rebuild the output files from a raw response cache without fetching')
+    reparse_command.add_argument('--cache', metavar='DIR', default='raw_cache',
+                                 help='Cache written by a crawl with --cache (default: raw_cache)')
+    reparse_command.add_argument('--parser', choices=sorted(PARSERS), default='lxml',
+                                 help='HTML parser backend (default: lxml)')
+    reparse_command.add_argument('--processes', type=int, default=None,
+                                 help='Parse processes (default: one per CPU core)')
+    reparse_command.add_argument('--parquet', action='store_true',
+                                 help='Also write avtotemir_masters.parquet (requires pyarrow)')
+    reparse_command.add_argument('--db', metavar='PATH', default=None,
+                                 help='Also upsert masters into this SQLite database (see storage.py)')
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Plain `scraper.py [options]` keeps meaning a crawl
+    if not argv or argv[0] not in commands.choices and argv[0] not in ('-h', '--help'):
+        argv = ['crawl'] + argv
+    args = parser.parse_args(argv)
+    if getattr(args, 'transport', None) == 'http2' and not http2_available():
+        parser.error('--transport http2 requires httpx: pip install "httpx[http2]"')
+    return args
+
+
+def build_scraper(args: argparse.Namespace, profiler: Optional[StageProfiler] = None, **kwargs) -> AvtotemirScraper:
+    """Create a scraper from the shared command line options, instrumented when a profiler is given"""
+    scraper = AvtotemirScraper(
+        workers=args.workers,
+        requests_per_second=args.rps,
+        parser=args.parser,
+        base_url=args.base_url,
+        max_retries=args.max_retries,
+        adaptive=not args.no_adaptive,
+        dead_letters=DeadLetterQueue(args.dead_letters),
+        transport=args.transport,
+        pool_size=args.pool_size,
+        **kwargs
+    )
+
+    if args.record or args.replay:
+        # The fixture adapter replaces the transport; release its connections (and httpx client)
+        scraper.transport.close()
+        scraper.transport = None
+    if args.record:
+        record(scraper.session, args.record)
+    elif args.replay:
+        replay(scraper.session, args.replay)
+    if args.cache:
+        # Wraps whichever transport is mounted, so recorded and replayed responses are cached too
+        scraper.raw_cache = RawCache(
+            args.cache,
+            max_bytes=int(args.cache_max_mb * 1e6) if args.cache_max_mb is not None else None,
+            max_age_days=args.cache_max_age_days
+        )
+        cache_responses(scraper.session, scraper.raw_cache)
+    if profiler:
+        profiler.instrument(scraper)
+    return scraper
+
+
+def crawl(args: argparse.Namespace, profiler: Optional[StageProfiler] = None):
+    """Crawl the listings and save every master"""
+    checkpoint = CrawlCheckpoint(args.checkpoint_dir)
+    stream = not args.no_stream
+    profile_state = None
+    if args.incremental:
+        profile_state = ProfileStateStore(args.state_file)
+        profile_state.load()
+
+    if args.resume:
+        loaded = checkpoint.load(keep_records=not stream)
+    else:
+        checkpoint.reset(args.start_page)
+
+    sinks = []
+    written = set()
+    if stream:
+        if args.resume:
+            written = jsonl_keys('avtotemir_masters.jsonl')
+        # On resume, keep appending to the output of the interrupted run
+        sinks = [
+            JsonlSink('avtotemir_masters.jsonl', append=args.resume),
+            CsvSink('avtotemir_masters.csv', append=args.resume),
+        ]
+        if args.parquet and not args.resume:
+            # Parquet cannot be appended to; a resumed crawl rebuilds it from the JSON Lines file
+            sinks.append(ParquetSink('avtotemir_masters.parquet'))
+    if args.db:
+        sinks.append(SqliteStore(args.db, kind='crawl'))
+    series = TimeSeriesSink(TimeSeriesStore(args.timeseries)) if args.timeseries else None
+    if series:
+        sinks.append(series)
+    if args.search_index:
+        sinks.append(SearchIndex(args.search_index))
+    if args.media:
+        sinks.append(MediaDownloader(
+            args.media,
+            workers=args.media_workers,
+            requests_per_second=args.media_rps,
+            thumbnail_size=args.thumbnail_size or None,
+            thumbnail_processes=args.thumbnail_processes,
+            base_url=args.base_url or AvtotemirScraper.BASE_URL
+        ))
+
+    metrics = CrawlMetrics(status_file=args.status_file or None)
+    server = MetricsServer(metrics, port=args.metrics_port).start() if args.metrics_port is not None else None
+
+    scraper = build_scraper(
+        args,
+        profiler=profiler,
+        metrics=metrics,
+        phone_workers=args.phone_workers,
+        parse_processes=args.parse_processes,
+        queue_size=args.queue_size,
+        checkpoint=checkpoint,
+        profile_state=profile_state,
+        sinks=sinks,
+        keep_in_memory=not stream,
+        skip_phones=args.skip_phones
+    )
+
+    if args.resume:
+        scraper.masters_data = loaded
+        scraper.masters_count = len(checkpoint.scraped_keys)
+        recovered = 0
+        for master_data in checkpoint.iter_records():
+            if profile_state:
+                profile_state.observe(master_data)
+            if series:
+                # Masters from the interrupted run belong to the same crawl
+                series.write(master_data)
+            if stream and CrawlCheckpoint.master_key(master_data) not in written:
+                # Checkpointed before the interrupted run flushed its output buffers
+                for sink in sinks:
+                    if sink is not series:
+                        sink.write(master_data)
+                written.add(CrawlCheckpoint.master_key(master_data))
+                recovered += 1
+        if recovered:
+            for sink in sinks:
+                sink.flush()
+            logger.info(f"Recovered {recovered} checkpointed masters missing from the output")
 
     # Scrape all pages (will auto-detect end)
-    scraper.scrape_all_pages(start_page=1, max_pages=1000)
+    scraper.scrape_all_pages(start_page=args.start_page, max_pages=args.max_pages, discover=not args.no_discover)
+    scraper.close()
 
     # Save results
-    scraper.save_to_json('avtotemir_masters.json')
-    scraper.save_to_csv('avtotemir_masters.csv')
+    for sink in sinks:
+        sink.close()
+    with profiler.stage('output: finalize') if profiler else nullcontext():
+        if stream:
+            jsonl_to_json('avtotemir_masters.jsonl', 'avtotemir_masters.json')
+            if args.parquet and args.resume:
+                jsonl_to_parquet('avtotemir_masters.jsonl', 'avtotemir_masters.parquet')
+        else:
+            scraper.save_to_json('avtotemir_masters.json')
+            scraper.save_to_csv('avtotemir_masters.csv')
+            if args.parquet:
+                scraper.save_to_parquet('avtotemir_masters.parquet')
+
+    if profile_state:
+        # Masters on failed listing pages were not seen, but were not removed either
+        save_delta(profile_state.finish(complete=scraper.reached_end and not scraper.failed_pages), args.delta_file)
+        profile_state.save()
+
+    if server:
+        server.stop()
+
+    if scraper.dead_letters.count:
+        logger.warning(f"{scraper.dead_letters.count} items failed, see {args.dead_letters} "
+                       f"(re-run them with: scraper.py retry-failed)")
+
+
+def retry_failed(args: argparse.Namespace, profiler: Optional[StageProfiler] = None):
+    """Re-process the dead-letter queue and merge recovered masters into the output"""
+    sinks = [JsonlSink('avtotemir_masters.jsonl', append=True)]
+    if args.db:
+        sinks.append(SqliteStore(args.db, kind='retry-failed'))
+    scraper = build_scraper(args, profiler=profiler, sinks=sinks, keep_in_memory=False)
+    scraper.retry_failed()
+    scraper.close()
+    for sink in sinks:
+        sink.close()
+
+    # Recovered records supersede earlier copies of the same master
+    with profiler.stage('output: finalize') if profiler else nullcontext():
+        jsonl_to_json('avtotemir_masters.jsonl', 'avtotemir_masters.json')
+        jsonl_to_csv('avtotemir_masters.jsonl', 'avtotemir_masters.csv')
+        if os.path.exists('avtotemir_masters.parquet'):
+            jsonl_to_parquet('avtotemir_masters.jsonl', 'avtotemir_masters.parquet')
+
+
+def enrich_phones(args: argparse.Namespace, profiler: Optional[StageProfiler] = None):
+    """Batch phone enrichment for a chosen subset of the crawled masters"""
+    wanted_ids = set(args.ids.split(',')) if args.ids else None
+    if args.delta:
+        with open(args.delta, encoding='utf-8') as f:
+            added = {str(m.get('id')) for m in json.load(f).get('added', [])}
+        wanted_ids = added if wanted_ids is None else wanted_ids & added
+    districts = {d.strip().lower() for d in args.district}
+
+    def selected(master: Dict) -> bool:
+        if not args.all and master.get('phone_numbers'):
+            return False
+        if wanted_ids is not None and str(master.get('id')) not in wanted_ids:
+            return False
+        if districts and master.get('location', '').split(',')[-1].strip().lower() not in districts:
+            return False
+        return True
+
+    # Streamed in batches; records the sink appends meanwhile are past the lines
+    # iter_latest_records() indexed up front, so they are not read back
+    masters = (m for m in iter_latest_records('avtotemir_masters.jsonl') if selected(m))
+
+    sinks = [JsonlSink('avtotemir_masters.jsonl', append=True)]
+    if args.db:
+        sinks.append(SqliteStore(args.db, kind='enrich-phones'))
+    scraper = build_scraper(args, profiler=profiler, sinks=sinks, keep_in_memory=False)
+    scraper.enrich_phones(masters)
+    scraper.close()
+    for sink in sinks:
+        sink.close()
+
+    # Enriched records supersede the copies crawled without phones
+    with profiler.stage('output: finalize') if profiler else nullcontext():
+        jsonl_to_json('avtotemir_masters.jsonl', 'avtotemir_masters.json')
+        jsonl_to_csv('avtotemir_masters.jsonl', 'avtotemir_masters.csv')
+        if os.path.exists('avtotemir_masters.parquet'):
+            jsonl_to_parquet('avtotemir_masters.jsonl', 'avtotemir_masters.parquet')
+
+
+def coordinate(args: argparse.Namespace):
+    """Seed the shared work queue, wait until the workers drained it and export the results"""
+    queue = WorkQueue(args.queue)
+    if not args.export_only:
+        max_pages = args.max_pages
+        if args.discover:
+            total_pages = AvtotemirScraper(base_url=args.base_url).discover_page_count(
+                args.start_page, args.start_page + args.max_pages - 1
+            )
+            if total_pages is not None:
+                max_pages = max(0, total_pages - args.start_page + 1)
+        queue.seed_pages(args.start_page, max_pages, args.range_size)
+        if args.no_wait:
+            logger.info(f"Queue {args.queue} seeded; start workers with: scraper.py worker --queue {args.queue}")
+            queue.close()
+            return
+        while queue.outstanding():
+            status = queue.status(stale_after=args.poll * 3)
+            alive = sum(worker['alive'] for worker in status['workers'])
+            logger.info(f"Queue: {json.dumps(status['items'])}, {status['results']} masters, "
+                        f"{alive}/{len(status['workers'])} workers alive")
+            time.sleep(args.poll)
+
+    # Results hold one record per master ID, however often it was scraped
+    sinks = [JsonlSink('avtotemir_masters.jsonl'), CsvSink('avtotemir_masters.csv')]
+    if args.db:
+        sinks.append(SqliteStore(args.db, kind='coordinator'))
+    for master_data in queue.iter_results():
+        for sink in sinks:
+            sink.write(master_data)
+    for sink in sinks:
+        sink.close()
+    jsonl_to_json('avtotemir_masters.jsonl', 'avtotemir_masters.json')
+    if args.parquet:
+        jsonl_to_parquet('avtotemir_masters.jsonl', 'avtotemir_masters.parquet')
+
+    status = queue.status()
+    failed = sum(states.get('failed', 0) for states in status['items'].values())
+    if failed:
+        logger.warning(f"{failed} work items failed after {queue.max_attempts} attempts, see the items table "
+                       f"in {args.queue}")
+    queue.close()
+
+
+def worker(args: argparse.Namespace, profiler: Optional[StageProfiler] = None):
+    """Lease page ranges and masters from the shared queue until it is drained"""
+    sinks = [SqliteStore(args.db, kind='worker')] if args.db else []
+    scraper = build_scraper(args, profiler=profiler, sinks=sinks, keep_in_memory=False,
+                            skip_phones=args.skip_phones)
+    queue = WorkQueue(args.queue)
+    CrawlWorker(scraper, queue, worker_id=args.worker_id, lease_seconds=args.lease).run()
+    scraper.close()
+    for sink in sinks:
+        sink.close()
+    queue.close()
+
+
+def reparse_cache(args: argparse.Namespace):
+    """Rebuild the output files from cached raw responses with the current parsers"""
+    sinks = [JsonlSink('avtotemir_masters.jsonl'), CsvSink('avtotemir_masters.csv')]
+    if args.parquet:
+        sinks.append(ParquetSink('avtotemir_masters.parquet'))
+    if args.db:
+        sinks.append(SqliteStore(args.db, kind='reparse'))
+
+    cache = RawCache(args.cache)
+    reparse(cache, sinks, parser=args.parser, processes=args.processes)
+    cache.close()
+    for sink in sinks:
+        sink.close()
+    jsonl_to_json('avtotemir_masters.jsonl', 'avtotemir_masters.json')
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main function to run the scraper"""
+    args = parse_args(argv)
+    if args.command == 'coordinator':
+        coordinate(args)
+        return
+    if args.command == 'reparse':
+        reparse_cache(args)
+        return
+    profiler = None
+    if args.profile or args.profile_dump:
+        profiler = StageProfiler(top=args.profile_top, pstats_file=args.profile_dump)
+        profiler.start()
+
+    if args.command == 'retry-failed':
+        retry_failed(args, profiler)
+    elif args.command == 'enrich-phones':
+        enrich_phones(args, profiler)
+    elif args.command == 'worker':
+        worker(args, profiler)
+    else:
+        crawl(args, profiler)
+
+    if profiler:
+        profiler.stop()
+        print(profiler.report())
 
     logger.info("Scraping completed!")
 
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Full-text search over scraped Avtotemir.az masters
+Builds a SQLite FTS5 index over name, position, car brands, note and the
+services table, and answers free-text queries ranked by BM25 instead of
+scanning the crawl output with pandas str.contains
+
+Text is folded to plain Latin before indexing and querying (ə→e, ı/İ→i, ö→o,
+ü→u, ğ→g, ş→s, ç→c, case and other diacritics dropped), so "muherrik"
+finds "Mühərrik" and "Şəki" finds "SEKI". Query terms match word prefixes.
+
+Tables:
+    documents   - one row per master: ID and the fields shown in results
+    masters_fts - FTS5 index of the folded text, rowid = documents.rowid
+"""
+
+import argparse
+import json
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+from sinks import iter_latest_records
+
+logger = logging.getLogger(__name__)
+
+# Indexed columns and their BM25 weights: a match in the name counts most, one in the free-text note least
+FIELDS = {
+    'name': 10.0,
+    'position': 5.0,
+    'car_brands': 4.0,
+    'services': 3.0,
+    'note': 1.0,
+}
+
+# Fields kept for result display
+RESULT_FIELDS = ('name', 'position', 'car_brands', 'location', 'rating', 'votes', 'url')
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS documents (
+    rowid INTEGER PRIMARY KEY,
+    master_id TEXT NOT NULL UNIQUE,
+    {', '.join(f'{field} TEXT' for field in RESULT_FIELDS)}
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS masters_fts USING fts5(
+    {', '.join(FIELDS)},
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+# Azerbaijani letters that Unicode decomposition does not reduce to ASCII (ə, ı) or
+# that lower() gets wrong (İ becomes i + combining dot); the rest are folded as well for clarity
+AZERBAIJANI_FOLD = str.maketrans({
+    'Ə': 'e', 'ə': 'e',
+    'I': 'i', 'İ': 'i', 'ı': 'i',
+    'Ö': 'o', 'ö': 'o',
+    'Ü': 'u', 'ü': 'u',
+    'Ğ': 'g', 'ğ': 'g',
+    'Ş': 's', 'ş': 's',
+    'Ç': 'c', 'ç': 'c',
+})
+
+_TERM = re.compile(r'\w+')
+
+
+def normalize(text: Optional[str]) -> str:
+    """Fold Azerbaijani letters, case and diacritics so spelling variants index alike"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text.translate(AZERBAIJANI_FOLD).lower())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def fts_query(query: str, prefix: bool = True) -> str:
+    """
+    Turn free text into an FTS5 query: every term must match, as a word prefix by default
+
+    Terms are quoted, so FTS5 operators and punctuation in user input cannot
+    break the query.
+    """
+    terms = _TERM.findall(normalize(query))
+    return ' '.join(f'"{term}"*' if prefix else f'"{term}"' for term in terms)
+
+
+def document_fields(master: Dict) -> Dict[str, str]:
+    """Folded text of each indexed field of a scraped master"""
+    services = ' '.join(
+        f"{service.get('position', '')} {service.get('car', '')}" for service in master.get('services') or []
+    )
+    return {
+        'name': normalize(master.get('name')),
+        'position': normalize(master.get('position')),
+        'car_brands': normalize(master.get('car_brands')),
+        'services': normalize(services),
+        'note': normalize(master.get('note')),
+    }
+
+
+class SearchIndex:
+    """
+    Sink maintaining the full-text index, and the query API over it
+
+    Records are buffered and indexed in one transaction per batch (and on
+    every flush()); a master written again replaces its previous document.
+    """
+
+    def __init__(self, path: str = 'avtotemir_search.db', batch_size: int = 500):
+        """
+        Args:
+            path: SQLite database file holding the index
+            batch_size: Records indexed per transaction
+        """
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.count = 0
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        try:
+            self.conn.executescript(SCHEMA)
+        except sqlite3.OperationalError as e:
+            raise RuntimeError(f"SQLite {sqlite3.sqlite_version} was built without FTS5: {e}") from e
+
+        self._pending: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def write(self, master: Dict):
+        """Buffer a record, indexing a batch every batch_size records"""
+        if not master.get('id'):
+            return
+        with self._lock:
+            self._pending.append(master)
+            if len(self._pending) >= self.batch_size:
+                self._write_batch()
+
+    def add_many(self, masters: Iterable[Dict]):
+        """Index many records in batched transactions"""
+        for master in masters:
+            self.write(master)
+        self.flush()
+
+    def _write_batch(self):
+        if not self._pending:
+            return
+
+        latest = {str(master['id']): master for master in self._pending}
+        with self.conn:
+            for master_id, master in latest.items():
+                row = self.conn.execute('SELECT rowid FROM documents WHERE master_id = ?', (master_id,)).fetchone()
+                values = [str(master.get(field) or '') for field in RESULT_FIELDS]
+                if row is None:
+                    rowid = self.conn.execute(
+                        f"INSERT INTO documents (master_id, {', '.join(RESULT_FIELDS)}) "
+                        f"VALUES (?, {', '.join('?' * len(RESULT_FIELDS))})",
+                        [master_id] + values
+                    ).lastrowid
+                else:
+                    rowid = row['rowid']
+                    self.conn.execute(
+                        f"UPDATE documents SET {', '.join(f'{field} = ?' for field in RESULT_FIELDS)} "
+                        "WHERE rowid = ?",
+                        values + [rowid]
+                    )
+                    self.conn.execute('DELETE FROM masters_fts WHERE rowid = ?', (rowid,))
+                fields = document_fields(master)
+                self.conn.execute(
+                    f"INSERT INTO masters_fts (rowid, {', '.join(FIELDS)}) VALUES (?, {', '.join('?' * len(FIELDS))})",
+                    [rowid] + [fields[field] for field in FIELDS]
+                )
+
+        self.count += len(self._pending)
+        self._pending = []
+
+    def flush(self):
+        """Index buffered records in one transaction"""
+        with self._lock:
+            self._write_batch()
+
+    def optimize(self):
+        """Merge the index segments into one, for the fastest queries"""
+        with self._lock:
+            with self.conn:
+                self.conn.execute("INSERT INTO masters_fts (masters_fts) VALUES ('optimize')")
+
+    def close(self):
+        """Index the remaining records and close the database"""
+        with self._lock:
+            if self.conn is None:
+                return
+            self._write_batch()
+            self.conn.close()
+            self.conn = None
+        if self.count:
+            logger.info(f"Indexed {self.count} records in {self.path}")
+
+    def search(self, query: str, limit: Optional[int] = 20, fields: Optional[Iterable[str]] = None,
+               prefix: bool = True) -> List[Dict]:
+        """
+        Masters matching every term of a free-text query, best match first
+
+        Args:
+            query: Free text, e.g. "hibrid", "turbo mercedes" or "mühərrik"
+            limit: Maximum results (None for all)
+            fields: Only match in these indexed fields (see FIELDS)
+            prefix: Match terms as word prefixes ("turb" finds "turbo")
+
+        Returns:
+            Result fields of each master with its ID and BM25 score (lower is better)
+        """
+        match = fts_query(query, prefix)
+        if not match:
+            return []
+        if fields:
+            unknown = set(fields) - set(FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown search fields: {', '.join(sorted(unknown))}")
+            match = f"{{{' '.join(fields)}}} : ({match})"
+
+        sql = (
+            f"SELECT d.master_id AS id, {', '.join(f'd.{field}' for field in RESULT_FIELDS)}, "
+            f"bm25(masters_fts, {', '.join(str(weight) for weight in FIELDS.values())}) AS score "
+            "FROM masters_fts JOIN documents d ON d.rowid = masters_fts.rowid "
+            "WHERE masters_fts MATCH ? ORDER BY score"
+        )
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, (match,))]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+
+def build_index(jsonl_filename: str, path: str, batch_size: int = 500) -> int:
+    """Index the latest copy of every master in a JSON Lines file"""
+    index = SearchIndex(path, batch_size=batch_size)
+    index.add_many(iter_latest_records(jsonl_filename))
+    index.optimize()
+    index.close()
+    return index.count
+
+
+def main(argv=None) -> int:
+    """Build the index from scraper output or search it"""
+    parser = argparse.ArgumentParser(description='Full-text search over scraped Avtotemir masters')
+    parser.add_argument('query', nargs='*', help='Search terms, e.g. hibrid, turbo or "mercedes muherrik"')
+    parser.add_argument('--index', default='avtotemir_search.db',
+                        help='Search index database (default: avtotemir_search.db)')
+    parser.add_argument('--build', metavar='JSONL', nargs='?', const='avtotemir_masters.jsonl', default=None,
+                        help='(Re)index a JSON Lines file written by the scraper (default: avtotemir_masters.jsonl)')
+    parser.add_argument('--field', action='append', choices=list(FIELDS), default=None,
+                        help='Only match in this field (repeatable)')
+    parser.add_argument('--exact', action='store_true', help='Match whole words instead of word prefixes')
+    parser.add_argument('--limit', type=int, default=20, help='Maximum results (default: 20)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON Lines')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.build:
+        build_index(args.build, args.index)
+    if not args.query:
+        return 0
+
+    index = SearchIndex(args.index)
+    try:
+        start = time.perf_counter()
+        results = index.search(' '.join(args.query), limit=args.limit, fields=args.field, prefix=not args.exact)
+        elapsed = time.perf_counter() - start
+        total = len(index)
+    finally:
+        index.close()
+
+    for master in results:
+        if args.json:
+            print(json.dumps(master, ensure_ascii=False))
+        else:
+            print(f"{master['score']:>8.2f}  {master['id']:>8}  {master['name']}  |  {master['position']}  |  "
+                  f"{master['car_brands']}  |  {master['location']}")
+    if not args.json:
+        print(f"{len(results)} results from {total} masters in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    return 0 if results else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Streaming output sinks for the Avtotemir.az scraper
+Records are written as they are scraped, so memory use does not grow with
+the crawl and partial output is usable while the crawl is still running
+"""
+
+import csv
+import json
+import logging
+import os
+import re
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterator, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+CSV_FIELDNAMES = [
+    'id', 'name', 'position', 'car_brands', 'location',
+    'rating', 'votes', 'experience', 'views', 'added_date',
+    'address', 'phone_numbers', 'services', 'note', 'images', 'url'
+]
+
+
+def flatten_record(master: Dict) -> Dict:
+    """Convert a master's list fields to '; '-joined strings for CSV output"""
+    flat_master = master.copy()
+    flat_master['phone_numbers'] = '; '.join(master.get('phone_numbers', []))
+    flat_master['services'] = '; '.join([
+        f"{s.get('position', '')} ({s.get('car', '')})"
+        for s in master.get('services', [])
+    ])
+    flat_master['images'] = '; '.join(master.get('images', []))
+    return flat_master
+
+
+# Formats the profile pages use for "Əlavə olundu:"
+DATE_FORMATS = ('%d.%m.%Y', '%Y-%m-%d', '%d/%m/%Y', '%d.%m.%Y %H:%M')
+
+
+def parse_int(value) -> Optional[int]:
+    """Integer from scraped text like "1 234" or "5", None if there are no digits"""
+    if isinstance(value, int):
+        return value
+    digits = re.sub(r'\D', '', str(value or ''))
+    return int(digits) if digits else None
+
+
+def parse_float(value) -> Optional[float]:
+    """Float from scraped text like "4.6", None if it is not a number"""
+    try:
+        return float(str(value).replace(',', '.'))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_date(value) -> Optional[date]:
+    """Date from the added-date text, None if no known format matches"""
+    text = str(value or '').strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def typed_record(master: Dict) -> Dict:
+    """Convert a master's scraped text fields to the types of PARQUET_SCHEMA"""
+    experience = re.search(r'(\d+)', str(master.get('experience') or ''))
+    return {
+        'id': str(master['id']) if master.get('id') is not None else None,
+        'name': master.get('name', ''),
+        'position': master.get('position', ''),
+        'car_brands': master.get('car_brands', ''),
+        'location': master.get('location', ''),
+        'rating': parse_float(master.get('rating')),
+        'votes': parse_int(master.get('votes')),
+        'experience': master.get('experience', ''),
+        'experience_years': int(experience.group(1)) if experience else None,
+        'views': parse_int(master.get('views')),
+        'added_date': parse_date(master.get('added_date')),
+        'address': master.get('address', ''),
+        'phone_numbers': list(master.get('phone_numbers', [])),
+        'services': [
+            {'position': s.get('position', ''), 'car': s.get('car', '')}
+            for s in master.get('services', [])
+        ],
+        'note': master.get('note', ''),
+        'images': list(master.get('images', [])),
+        'url': master.get('url', ''),
+    }
+
+
+def parquet_schema():
+    """Arrow schema of the Parquet output"""
+    if pa is None:
+        raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+    return pa.schema([
+        ('id', pa.string()),
+        ('name', pa.string()),
+        ('position', pa.string()),
+        ('car_brands', pa.string()),
+        ('location', pa.string()),
+        ('rating', pa.float64()),
+        ('votes', pa.int64()),
+        ('experience', pa.string()),
+        ('experience_years', pa.int64()),
+        ('views', pa.int64()),
+        ('added_date', pa.date32()),
+        ('address', pa.string()),
+        ('phone_numbers', pa.list_(pa.string())),
+        ('services', pa.list_(pa.struct([('position', pa.string()), ('car', pa.string())]))),
+        ('note', pa.string()),
+        ('images', pa.list_(pa.string())),
+        ('url', pa.string()),
+    ])
+
+
+def truncate_partial_line(filename: str) -> bool:
+    """
+    Cut a file after its last newline, dropping a half-written last line
+
+    Returns:
+        True if the file was truncated
+    """
+    if not os.path.exists(filename):
+        return False
+    with open(filename, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            step = min(4096, position)
+            f.seek(position - step)
+            newline = f.read(step).rfind(b'\n')
+            if newline != -1:
+                position = position - step + newline + 1
+                break
+            position -= step
+        if position == end:
+            return False
+        f.truncate(position)
+    logger.warning(f"Dropped a partial last line of {filename} ({end - position} bytes)")
+    return True
+
+
+class StreamingSink:
+    """Base class for append-only file sinks with periodic flush and fsync"""
+
+    def __init__(self, filename: str, flush_every: int = 50, append: bool = False):
+        """
+        Args:
+            filename: Output file
+            flush_every: Records written between flushes to disk
+            append: Append to an existing file instead of truncating it
+        """
+        self.filename = filename
+        self.flush_every = max(1, flush_every)
+        self.append = append
+        self.count = 0
+
+        self._lock = threading.Lock()
+        if append:
+            # A crash may leave the last record half-written; the next one must start on a new line
+            truncate_partial_line(filename)
+        self._file = open(filename, 'a' if append else 'w', encoding='utf-8', newline='')
+        self._unflushed = 0
+
+    def write(self, master: Dict):
+        """Append a record, flushing to disk every flush_every records"""
+        with self._lock:
+            self._write(master)
+            self.count += 1
+            self._unflushed += 1
+            if self._unflushed >= self.flush_every:
+                self._flush()
+
+    def _write(self, master: Dict):
+        raise NotImplementedError
+
+    def flush(self):
+        """Flush buffered records and fsync the file"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unflushed = 0
+
+    def close(self):
+        """Flush and close the file"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush()
+            self._file.close()
+        logger.info(f"Streamed {self.count} records to {self.filename}")
+
+
+class JsonlSink(StreamingSink):
+    """Writes one JSON record per line"""
+
+    def _write(self, master: Dict):
+        self._file.write(json.dumps(master, ensure_ascii=False) + '\n')
+
+
+class CsvSink(StreamingSink):
+    """Writes flattened records as CSV rows"""
+
+    def __init__(self, filename: str, flush_every: int = 50, append: bool = False):
+        has_header = append and os.path.exists(filename) and os.path.getsize(filename) > 0
+        super().__init__(filename, flush_every, append)
+        self._writer = csv.DictWriter(self._file, fieldnames=CSV_FIELDNAMES, extrasaction='ignore')
+        if not has_header:
+            self._writer.writeheader()
+
+    def _write(self, master: Dict):
+        self._writer.writerow(flatten_record(master))
+
+
+class ParquetSink:
+    """
+    Writes typed records to a Parquet file (requires pyarrow)
+
+    Numbers are real ints and floats, added_date is a date and phone numbers,
+    services and images are list columns. Records are buffered and written one
+    row group at a time; Parquet files cannot be appended to, so the file is
+    written under a temporary name and only replaces the destination on close().
+    """
+
+    def __init__(self, filename: str, row_group_size: int = 5000):
+        """
+        Args:
+            filename: Output file
+            row_group_size: Records per Parquet row group
+        """
+        self.filename = filename
+        self.row_group_size = max(1, row_group_size)
+        self.count = 0
+
+        self._schema = parquet_schema()
+        self._tmp_filename = filename + '.tmp'
+        self._writer = pq.ParquetWriter(self._tmp_filename, self._schema, compression='zstd')
+        self._rows = []
+        self._lock = threading.Lock()
+
+    def write(self, master: Dict):
+        """Buffer a record, writing a row group every row_group_size records"""
+        with self._lock:
+            self._rows.append(typed_record(master))
+            self.count += 1
+            if len(self._rows) >= self.row_group_size:
+                self._write_row_group()
+
+    def _write_row_group(self):
+        if self._rows:
+            self._writer.write_table(pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def flush(self):
+        """Nothing to do: small row groups would defeat columnar reads, and the file is only readable after close()"""
+
+    def close(self):
+        """Write the remaining records and move the file into place"""
+        with self._lock:
+            if self._writer is None:
+                return
+            self._write_row_group()
+            self._writer.close()
+            self._writer = None
+            os.replace(self._tmp_filename, self.filename)
+        logger.info(f"Wrote {self.count} records to {self.filename}")
+
+
+def iter_latest_records(jsonl_filename: str) -> Iterator[Dict]:
+    """
+    Stream the records of a JSON Lines file, keeping only the last copy of each master
+
+    Masters written more than once (after a resumed crawl or a retry run) are
+    yielded once, at the position of their latest copy. Lines appended to the
+    file while the records are being consumed are not read.
+    """
+    # First pass only remembers the last line of each master
+    last_line = {}
+    with open(jsonl_filename, encoding='utf-8') as src:
+        for line_number, line in enumerate(src):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            last_line[str(record.get('id') or record.get('url'))] = line_number
+    keep = set(last_line.values())
+    last = max(keep, default=-1)
+    del last_line
+
+    with open(jsonl_filename, encoding='utf-8') as src:
+        for line_number, line in enumerate(src):
+            if line_number > last:
+                break
+            if line_number in keep:
+                yield json.loads(line)
+
+
+def jsonl_keys(jsonl_filename: str) -> set:
+    """IDs (or URLs) of the masters in a JSON Lines file; empty if it does not exist"""
+    keys = set()
+    if not os.path.exists(jsonl_filename):
+        return keys
+    with open(jsonl_filename, encoding='utf-8') as src:
+        for line in src:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            keys.add(str(record.get('id') or record.get('url')))
+    return keys
+
+
+def jsonl_to_json(jsonl_filename: str, json_filename: str):
+    """
+    Convert a JSON Lines file into a JSON array one record at a time
+
+    Args:
+        jsonl_filename: Source JSON Lines file
+        json_filename: Destination JSON file
+    """
+    try:
+        with open(json_filename, 'w', encoding='utf-8') as dst:
+            dst.write('[')
+            first = True
+            for record in iter_latest_records(jsonl_filename):
+                dst.write('\n' if first else ',\n')
+                # Indent as json.dump(records, indent=2) would
+                pretty = json.dumps(record, ensure_ascii=False, indent=2)
+                dst.write('\n'.join('  ' + row for row in pretty.split('\n')))
+                first = False
+            dst.write('\n]\n' if not first else ']\n')
+        logger.info(f"Data saved to {json_filename}")
+    except Exception as e:
+        logger.error(f"Error converting {jsonl_filename} to JSON: {e}")
+
+
+def jsonl_to_csv(jsonl_filename: str, csv_filename: str):
+    """
+    Rebuild the CSV output from a JSON Lines file one record at a time
+
+    Args:
+        jsonl_filename: Source JSON Lines file
+        csv_filename: Destination CSV file
+    """
+    try:
+        with open(csv_filename, 'w', encoding='utf-8', newline='') as dst:
+            writer = csv.DictWriter(dst, fieldnames=CSV_FIELDNAMES, extrasaction='ignore')
+            writer.writeheader()
+            for record in iter_latest_records(jsonl_filename):
+                writer.writerow(flatten_record(record))
+        logger.info(f"Data saved to {csv_filename}")
+    except Exception as e:
+        logger.error(f"Error converting {jsonl_filename} to CSV: {e}")
+
+
+def jsonl_to_parquet(jsonl_filename: str, parquet_filename: str):
+    """
+    Rebuild the Parquet output from a JSON Lines file one record at a time
+
+    Args:
+        jsonl_filename: Source JSON Lines file
+        parquet_filename: Destination Parquet file
+    """
+    try:
+        sink = ParquetSink(parquet_filename)
+        for record in iter_latest_records(jsonl_filename):
+            sink.write(record)
+        sink.close()
+    except Exception as e:
+        logger.error(f"Error converting {jsonl_filename} to Parquet: {e}")
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+SQLite store for the Avtotemir.az scraper
+Masters are upserted into a normalised embedded database, so consumers can
+look them up by district, service, car brand or ID through indexes instead of
+scanning the JSON/CSV dumps
+
+Tables:
+    crawls        - one row per scraper run
+    masters       - one row per master, latest scraped values
+    services      - rows of the profile's #positions table (position, car)
+    master_brands - car brands from car_brands, one row per brand
+    phones        - phone numbers
+    images        - image URLs in page order
+    snapshots     - rating, votes and views of every master in every crawl
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from sinks import iter_latest_records, typed_record
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    masters INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS masters (
+    id TEXT PRIMARY KEY,
+    url TEXT,
+    name TEXT,
+    position TEXT,
+    car_brands TEXT,
+    location TEXT,
+    district TEXT,
+    rating REAL,
+    votes INTEGER,
+    experience TEXT,
+    experience_years INTEGER,
+    views INTEGER,
+    added_date TEXT,
+    address TEXT,
+    note TEXT,
+    crawl_id INTEGER REFERENCES crawls(id),
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_masters_district ON masters(district);
+CREATE INDEX IF NOT EXISTS idx_masters_position ON masters(position);
+
+CREATE TABLE IF NOT EXISTS services (
+    master_id TEXT NOT NULL REFERENCES masters(id),
+    position TEXT,
+    car TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_services_position_car ON services(position, car);
+CREATE INDEX IF NOT EXISTS idx_services_car ON services(car);
+CREATE INDEX IF NOT EXISTS idx_services_master ON services(master_id);
+
+CREATE TABLE IF NOT EXISTS master_brands (
+    master_id TEXT NOT NULL REFERENCES masters(id),
+    brand TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_master_brands_brand ON master_brands(brand);
+CREATE INDEX IF NOT EXISTS idx_master_brands_master ON master_brands(master_id);
+
+CREATE TABLE IF NOT EXISTS phones (
+    master_id TEXT NOT NULL REFERENCES masters(id),
+    phone TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_phones_master ON phones(master_id);
+CREATE INDEX IF NOT EXISTS idx_phones_phone ON phones(phone);
+
+CREATE TABLE IF NOT EXISTS images (
+    master_id TEXT NOT NULL REFERENCES masters(id),
+    idx INTEGER NOT NULL,
+    url TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_images_master ON images(master_id);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    crawl_id INTEGER NOT NULL REFERENCES crawls(id),
+    master_id TEXT NOT NULL,
+    rating REAL,
+    votes INTEGER,
+    views INTEGER,
+    PRIMARY KEY (crawl_id, master_id)
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_master ON snapshots(master_id);
+"""
+
+MASTER_COLUMNS = [
+    'id', 'url', 'name', 'position', 'car_brands', 'location', 'district', 'rating', 'votes',
+    'experience', 'experience_years', 'views', 'added_date', 'address', 'note', 'crawl_id', 'updated_at'
+]
+
+UPSERT_MASTER = (
+    f"INSERT INTO masters ({', '.join(MASTER_COLUMNS)}) VALUES ({', '.join('?' * len(MASTER_COLUMNS))}) "
+    f"ON CONFLICT(id) DO UPDATE SET "
+    + ', '.join(f"{column} = excluded.{column}" for column in MASTER_COLUMNS if column != 'id')
+)
+
+
+def district_of(location: Optional[str]) -> str:
+    """District from a listing location like "Bakı, Nizami" """
+    return (location or '').split(',')[-1].strip()
+
+
+def split_brands(car_brands: Optional[str]) -> List[str]:
+    """Individual brands from a car_brands text like "Mercedes, BMW" """
+    return [brand.strip() for brand in (car_brands or '').split(',') if brand.strip()]
+
+
+class SqliteStore:
+    """
+    Sink that upserts scraped masters into a SQLite database
+
+    Records are buffered and written in one transaction per batch (and on
+    every flush(), i.e. once per completed listing page). Every run is
+    registered in the crawls table and writes one snapshot row per master.
+    """
+
+    def __init__(self, path: str = 'avtotemir.db', batch_size: int = 500, kind: str = 'crawl'):
+        """
+        Args:
+            path: SQLite database file
+            batch_size: Records written per transaction
+            kind: Kind of run recorded in the crawls table ('crawl', 'retry-failed', ...)
+        """
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.count = 0
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO crawls (kind, started_at) VALUES (?, ?)', (kind, time.strftime('%Y-%m-%dT%H:%M:%S'))
+            )
+        self.crawl_id = cursor.lastrowid
+
+        self._pending: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def write(self, master: Dict):
+        """Buffer a record, writing a batch every batch_size records"""
+        if not master.get('id'):
+            return
+        with self._lock:
+            self._pending.append(master)
+            if len(self._pending) >= self.batch_size:
+                self._write_batch()
+
+    def upsert_many(self, masters: Iterable[Dict]):
+        """Upsert many records in batched transactions"""
+        for master in masters:
+            self.write(master)
+        self.flush()
+
+    def _write_batch(self):
+        if not self._pending:
+            return
+
+        now = time.strftime('%Y-%m-%dT%H:%M:%S')
+        # A master written twice in one batch (e.g. re-enriched) keeps its last copy
+        latest = {str(master['id']): master for master in self._pending}
+        master_rows, services, brands, phones, images, snapshots = [], [], [], [], [], []
+        for master in latest.values():
+            typed = typed_record(master)
+            master_id = typed['id']
+            typed['district'] = district_of(typed['location'])
+            typed['added_date'] = typed['added_date'].isoformat() if typed['added_date'] else None
+            typed['crawl_id'] = self.crawl_id
+            typed['updated_at'] = now
+            master_rows.append([typed[column] for column in MASTER_COLUMNS])
+
+            services.extend((master_id, s['position'], s['car']) for s in typed['services'])
+            brands.extend((master_id, brand) for brand in split_brands(typed['car_brands']))
+            phones.extend((master_id, phone) for phone in typed['phone_numbers'])
+            images.extend((master_id, i, url) for i, url in enumerate(typed['images']))
+            snapshots.append((self.crawl_id, master_id, typed['rating'], typed['votes'], typed['views']))
+
+        ids = [(row[0],) for row in master_rows]
+        with self.conn:
+            self.conn.executemany(UPSERT_MASTER, master_rows)
+            # Child rows are replaced wholesale with the latest scrape
+            for table in ('services', 'master_brands', 'phones', 'images'):
+                self.conn.executemany(f'DELETE FROM {table} WHERE master_id = ?', ids)
+            self.conn.executemany('INSERT INTO services (master_id, position, car) VALUES (?, ?, ?)', services)
+            self.conn.executemany('INSERT INTO master_brands (master_id, brand) VALUES (?, ?)', brands)
+            self.conn.executemany('INSERT INTO phones (master_id, phone) VALUES (?, ?)', phones)
+            self.conn.executemany('INSERT INTO images (master_id, idx, url) VALUES (?, ?, ?)', images)
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO snapshots (crawl_id, master_id, rating, votes, views) VALUES (?, ?, ?, ?, ?)',
+                snapshots
+            )
+
+        self.count += len(self._pending)
+        self._pending = []
+
+    def flush(self):
+        """Write buffered records in one transaction"""
+        with self._lock:
+            self._write_batch()
+
+    def close(self):
+        """Write the remaining records, close the crawl and the database"""
+        with self._lock:
+            if self.conn is None:
+                return
+            self._write_batch()
+            with self.conn:
+                self.conn.execute(
+                    'UPDATE crawls SET finished_at = ?, masters = ? WHERE id = ?',
+                    (time.strftime('%Y-%m-%dT%H:%M:%S'), self.count, self.crawl_id)
+                )
+            self.conn.close()
+            self.conn = None
+        logger.info(f"Stored {self.count} records in {self.path}")
+
+
+class MasterQueries:
+    """Index-driven lookups over a database written by SqliteStore"""
+
+    def __init__(self, path: str = 'avtotemir.db'):
+        """
+        Args:
+            path: SQLite database file
+        """
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+
+    def close(self):
+        self.conn.close()
+
+    def _masters(self, where: str, params: tuple, limit: Optional[int] = None) -> List[Dict]:
+        sql = f'SELECT * FROM masters WHERE {where} ORDER BY rating DESC, votes DESC'
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def get(self, master_id: str) -> Optional[Dict]:
+        """Full record of a master, with services, phones and images, in scraper output form"""
+        row = self.conn.execute('SELECT * FROM masters WHERE id = ?', (str(master_id),)).fetchone()
+        if row is None:
+            return None
+
+        master = dict(row)
+        master['services'] = [
+            {'position': r['position'], 'car': r['car']}
+            for r in self.conn.execute('SELECT position, car FROM services WHERE master_id = ? ORDER BY rowid',
+                                       (master['id'],))
+        ]
+        master['phone_numbers'] = [
+            r['phone'] for r in self.conn.execute('SELECT phone FROM phones WHERE master_id = ? ORDER BY rowid',
+                                                  (master['id'],))
+        ]
+        master['images'] = [
+            r['url'] for r in self.conn.execute('SELECT url FROM images WHERE master_id = ? ORDER BY idx',
+                                                (master['id'],))
+        ]
+        return master
+
+    def by_district(self, district: str, limit: Optional[int] = None) -> List[Dict]:
+        """Masters in a district"""
+        return self._masters('district = ?', (district,), limit)
+
+    def by_position(self, position: str, limit: Optional[int] = None) -> List[Dict]:
+        """Masters whose main position matches"""
+        return self._masters('position = ?', (position,), limit)
+
+    def by_service(self, position: str, car: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Masters offering a service, optionally for a given car"""
+        if car is None:
+            subquery = 'SELECT master_id FROM services WHERE position = ?'
+            params = (position,)
+        else:
+            subquery = 'SELECT master_id FROM services WHERE position = ? AND car = ?'
+            params = (position, car)
+        return self._masters(f'id IN ({subquery})', params, limit)
+
+    def by_brand(self, brand: str, limit: Optional[int] = None) -> List[Dict]:
+        """Masters listing a car brand"""
+        return self._masters('id IN (SELECT master_id FROM master_brands WHERE brand = ?)', (brand,), limit)
+
+    def by_phone(self, phone: str) -> List[Dict]:
+        """Masters with a phone number"""
+        return self._masters('id IN (SELECT master_id FROM phones WHERE phone = ?)', (phone,))
+
+    def history(self, master_id: str) -> List[Dict]:
+        """Rating, votes and views of a master in every crawl, oldest first"""
+        return [dict(row) for row in self.conn.execute(
+            'SELECT c.id AS crawl_id, c.started_at, s.rating, s.votes, s.views '
+            'FROM snapshots s JOIN crawls c ON c.id = s.crawl_id WHERE s.master_id = ? ORDER BY c.id',
+            (str(master_id),)
+        )]
+
+
+def import_jsonl(jsonl_filename: str, db_path: str, batch_size: int = 500) -> int:
+    """Load the latest copy of every master in a JSON Lines file into the database"""
+    store = SqliteStore(db_path, batch_size=batch_size, kind='import')
+    store.upsert_many(iter_latest_records(jsonl_filename))
+    store.close()
+    return store.count
+
+
+def main(argv=None) -> int:
+    """Import scraper output or look masters up"""
+    parser = argparse.ArgumentParser(description='Query or fill the Avtotemir masters database')
+    parser.add_argument('--db', default='avtotemir.db', help='SQLite database (default: avtotemir.db)')
+    parser.add_argument('--import', dest='import_file', metavar='JSONL', default=None,
+                        help='Import a JSON Lines file written by the scraper')
+    parser.add_argument('--id', default=None, help='Show one master')
+    parser.add_argument('--district', default=None, help='Masters in a district')
+    parser.add_argument('--service', default=None, help='Masters offering a service position')
+    parser.add_argument('--car', default=None, help='With --service: only for this car')
+    parser.add_argument('--brand', default=None, help='Masters listing a car brand')
+    parser.add_argument('--limit', type=int, default=20, help='Maximum results (default: 20)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.import_file:
+        import_jsonl(args.import_file, args.db)
+
+    queries = MasterQueries(args.db)
+    try:
+        if args.id:
+            results = [queries.get(args.id)]
+        elif args.district:
+            results = queries.by_district(args.district, args.limit)
+        elif args.service:
+            results = queries.by_service(args.service, args.car, args.limit)
+        elif args.brand:
+            results = queries.by_brand(args.brand, args.limit)
+        else:
+            return 0
+    finally:
+        queries.close()
+
+    for master in results:
+        print(json.dumps(master, ensure_ascii=False))
+    return 0 if any(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
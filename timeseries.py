@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Per-master time series of views, votes and rating for the Avtotemir.az scraper
+Every crawl appends one compact, delta-encoded columnar segment, and trend
+metrics are updated from the latest segment alone, so history is never re-read
+
+Files:
+    timeseries.jsonl.gz   - append-only; one gzip member holding one JSON line per crawl:
+                            {"crawl": "<UTC timestamp>", "ids": [...], "views": [...],
+                             "votes": [...], "rating": [...]}
+                            Columns hold the change since the master's previous stored
+                            value (the full value for a new master); masters whose
+                            counters did not change are left out. Numeric IDs are stored
+                            sorted as gaps from the previous ID ("id_gaps"). Ratings are
+                            stored in hundredths.
+    timeseries.jsonl.gz.state.json
+                          - latest value of every master plus the trend metrics; one per
+                            segment file (the state path defaults to the segment path
+                            + ".state.json")
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sinks import iter_latest_records, parse_float, parse_int
+
+logger = logging.getLogger(__name__)
+
+SERIES = ('views', 'votes', 'rating')
+
+# Weight of the newest interval in the smoothed per-district review velocity
+VELOCITY_SMOOTHING = 0.5
+
+
+def crawl_timestamp() -> str:
+    """UTC timestamp identifying a crawl"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+
+
+def state_path_for(path: str) -> str:
+    """State file belonging to a segment file"""
+    return path + '.state.json'
+
+
+def observation(master: Dict) -> Optional[Tuple[str, List[Optional[int]], str]]:
+    """
+    Counters of a scraped master as (id, [views, votes, rating in hundredths], district)
+
+    Counters that cannot be parsed are None and leave the stored value unchanged.
+
+    Returns:
+        None for records without an ID
+    """
+    if not master.get('id'):
+        return None
+    rating = parse_float(master.get('rating'))
+    values = [
+        parse_int(master.get('views')),
+        parse_int(master.get('votes')),
+        int(round(rating * 100)) if rating is not None else None,
+    ]
+    district = str(master.get('location') or '').split(',')[-1].strip()
+    return str(master['id']), values, district
+
+
+def encode_ids(ids: List[str]) -> Dict[str, list]:
+    """Numeric IDs as sorted gaps, anything else as plain strings"""
+    if ids and all(i.isdigit() and (i == '0' or not i.startswith('0')) for i in ids):
+        previous = 0
+        gaps = []
+        for value in sorted(int(i) for i in ids):
+            gaps.append(value - previous)
+            previous = value
+        return {'id_gaps': gaps}
+    return {'ids': sorted(ids)}
+
+
+def decode_ids(segment: Dict) -> List[str]:
+    """IDs of a segment in the order of its value columns"""
+    if 'id_gaps' not in segment:
+        return segment['ids']
+    ids = []
+    value = 0
+    for gap in segment['id_gaps']:
+        value += gap
+        ids.append(str(value))
+    return ids
+
+
+class TimeSeriesStore:
+    """Append-only, delta-encoded history of every master's views, votes and rating"""
+
+    def __init__(self, path: str = 'timeseries.jsonl.gz', state_path: Optional[str] = None):
+        """
+        Args:
+            path: Append-only segment file
+            state_path: JSON file with the latest values and trend metrics (default: path + '.state.json')
+        """
+        self.path = path
+        self.state_path = state_path or state_path_for(path)
+        self.state = self._empty_state()
+        self.load_state()
+
+    @staticmethod
+    def _empty_state() -> Dict:
+        return {'last_crawl': None, 'masters': {}, 'districts': {}, 'segment_bytes': 0}
+
+    def _segment_bytes(self) -> int:
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def load_state(self):
+        """
+        Load the latest values from the previous crawl, if any
+
+        The state remembers the size of the segment file it was saved with. If
+        the file was deleted, replaced or appended to elsewhere, the delta
+        baseline no longer matches, so the latest values are rebuilt from the
+        segments instead.
+        """
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding='utf-8') as f:
+                self.state = json.load(f)
+        segment_bytes = self._segment_bytes()
+        if self.state.get('segment_bytes', 0) != segment_bytes:
+            logger.warning(f"{self.state_path} does not match {self.path}; rebuilding the latest values "
+                           f"from the stored segments")
+            self.rebuild_state()
+
+    def rebuild_state(self):
+        """Recompute the latest value of every master by summing the deltas of all segments"""
+        previous = self.state['masters']
+        state = self._empty_state()
+        masters = state['masters']
+        for segment in self.segments():
+            for index, master_id in enumerate(decode_ids(segment)):
+                deltas = [segment[name][index] for name in SERIES]
+                entry = masters.get(master_id)
+                if entry is None:
+                    old = previous.get(master_id, {})
+                    masters[master_id] = {'values': deltas, 'district': old.get('district', ''),
+                                          'seen': segment['crawl'], 'first_seen': segment['crawl'],
+                                          'views_per_day': None, 'votes_per_day': None}
+                else:
+                    entry['values'] = [value + delta for value, delta in zip(entry['values'], deltas)]
+                    entry['seen'] = segment['crawl']
+            state['last_crawl'] = segment['crawl']
+        state['segment_bytes'] = self._segment_bytes()
+        self.state = state
+
+    def _save_state(self):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def append(self, observations: Iterable[Tuple[str, List[int], str]], crawl: Optional[str] = None) -> Dict:
+        """
+        Store one crawl and update the trend metrics from it
+
+        Args:
+            observations: (id, [views, votes, rating in hundredths], district) per master
+            crawl: Crawl timestamp (default: now)
+
+        Returns:
+            Summary of the segment: crawl, masters seen, masters stored
+        """
+        crawl = crawl or crawl_timestamp()
+        masters = self.state['masters']
+        now = _parse_timestamp(crawl)
+
+        changed = {}
+        district_votes: Dict[str, float] = {}
+        district_days: Dict[str, float] = {}
+        seen = 0
+        for master_id, values, district in observations:
+            seen += 1
+            previous = masters.get(master_id)
+            if previous is None:
+                # Unknown counters start from 0, the value history reconstruction assumes
+                values = [value or 0 for value in values]
+                changed[master_id] = values
+                masters[master_id] = {'values': values, 'district': district, 'seen': crawl,
+                                      'first_seen': crawl, 'views_per_day': None, 'votes_per_day': None}
+                continue
+
+            # A counter that could not be parsed keeps its stored value instead of dropping to 0
+            known = [new is not None for new in values]
+            values = [new if new is not None else old for new, old in zip(values, previous['values'])]
+            deltas = [new - old for new, old in zip(values, previous['values'])]
+            if any(deltas):
+                changed[master_id] = deltas
+
+            days = (now - _parse_timestamp(previous['seen'])).total_seconds() / 86400
+            if days > 0:
+                if known[0]:
+                    previous['views_per_day'] = deltas[0] / days
+                if known[1]:
+                    previous['votes_per_day'] = deltas[1] / days
+                    district_votes[district] = district_votes.get(district, 0) + deltas[1]
+                    district_days[district] = max(district_days.get(district, 0), days)
+            previous.update(values=values, district=district, seen=crawl)
+
+        self._update_districts(district_votes, district_days, crawl)
+        self._write_segment(crawl, changed)
+        self.state['last_crawl'] = crawl
+        self.state['segment_bytes'] = self._segment_bytes()
+        self._save_state()
+
+        logger.info(f"Time series: {seen} masters seen, {len(changed)} changed, crawl {crawl}")
+        return {'crawl': crawl, 'seen': seen, 'stored': len(changed)}
+
+    def _update_districts(self, votes: Dict[str, float], days: Dict[str, float], crawl: str):
+        """Review velocity (new votes per day) per district, raw for the last interval and smoothed"""
+        districts = self.state['districts']
+        for district, total in votes.items():
+            velocity = total / days[district]
+            entry = districts.setdefault(district, {'review_velocity': None, 'review_velocity_smoothed': None})
+            smoothed = entry['review_velocity_smoothed']
+            entry['review_velocity'] = velocity
+            entry['review_velocity_smoothed'] = velocity if smoothed is None else (
+                VELOCITY_SMOOTHING * velocity + (1 - VELOCITY_SMOOTHING) * smoothed
+            )
+            entry['updated'] = crawl
+
+    def _write_segment(self, crawl: str, changed: Dict[str, List[int]]):
+        encoded = encode_ids(list(changed))
+        order = decode_ids(encoded)
+        segment = {'crawl': crawl, **encoded}
+        for column, name in enumerate(SERIES):
+            segment[name] = [changed[master_id][column] for master_id in order]
+
+        # Each append is a separate gzip member; gzip readers see one continuous stream
+        with gzip.open(self.path, 'at', encoding='utf-8') as f:
+            f.write(json.dumps(segment, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def segments(self) -> Iterator[Dict]:
+        """Stored segments, oldest first"""
+        if not os.path.exists(self.path):
+            return
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def history(self, master_id: str) -> List[Dict]:
+        """Reconstructed views, votes and rating of a master at every crawl where they changed"""
+        master_id = str(master_id)
+        values = None
+        points = []
+        for segment in self.segments():
+            ids = decode_ids(segment)
+            if master_id not in ids:
+                continue
+            index = ids.index(master_id)
+            deltas = [segment[name][index] for name in SERIES]
+            values = deltas if values is None else [v + d for v, d in zip(values, deltas)]
+            points.append({'crawl': segment['crawl'], 'views': values[0], 'votes': values[1],
+                           'rating': values[2] / 100})
+        return points
+
+    def trends(self, top: int = 10) -> Dict:
+        """Trend metrics as of the latest crawl, read from the state alone"""
+        masters = self.state['masters']
+        fastest = sorted(
+            ((master_id, m['views_per_day']) for master_id, m in masters.items() if m.get('views_per_day')),
+            key=lambda item: item[1], reverse=True
+        )[:top]
+        districts = sorted(
+            ((district, d) for district, d in self.state['districts'].items()),
+            key=lambda item: item[1].get('review_velocity_smoothed') or 0, reverse=True
+        )
+        return {
+            'last_crawl': self.state['last_crawl'],
+            'masters': len(masters),
+            'top_views_per_day': [{'id': master_id, 'views_per_day': rate} for master_id, rate in fastest],
+            'district_review_velocity': [{'district': district, **d} for district, d in districts],
+        }
+
+
+class TimeSeriesSink:
+    """
+    Sink collecting every scraped master's counters and appending them as one crawl on close()
+
+    Only the ID, three counters and the district are kept per master.
+    """
+
+    def __init__(self, store: TimeSeriesStore):
+        """
+        Args:
+            store: Time series the crawl is appended to
+        """
+        self.store = store
+        self.crawl = crawl_timestamp()
+        self.count = 0
+        self._observations: Dict[str, Tuple[str, List[int], str]] = {}
+        self._lock = threading.Lock()
+
+    def write(self, master: Dict):
+        obs = observation(master)
+        if obs is None:
+            return
+        with self._lock:
+            self._observations[obs[0]] = obs
+            self.count += 1
+
+    def flush(self):
+        """Nothing to do: the crawl is stored as one segment on close()"""
+
+    def close(self):
+        """Append the collected crawl to the time series"""
+        with self._lock:
+            if self._observations is None:
+                return
+            observations, self._observations = self._observations, None
+        if observations:
+            self.store.append(observations.values(), self.crawl)
+
+
+def main(argv=None) -> int:
+    """Append a crawl output file or show stored history and trends"""
+    parser = argparse.ArgumentParser(description='Views, votes and rating history of Avtotemir masters')
+    parser.add_argument('--path', default='timeseries.jsonl.gz', help='Segment file (default: timeseries.jsonl.gz)')
+    parser.add_argument('--state', default=None,
+                        help='State file (default: the segment file + .state.json)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    append = subparsers.add_parser('append', help='Append a crawl from a JSON Lines output file')
+    append.add_argument('jsonl', nargs='?', default='avtotemir_masters.jsonl')
+    append.add_argument('--crawl', default=None, help='Crawl timestamp, YYYY-MM-DDTHH:MM:SSZ (default: now)')
+    history = subparsers.add_parser('history', help="Show a master's history")
+    history.add_argument('id')
+    subparsers.add_parser('trends', help='Show trend metrics of the latest crawl')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = TimeSeriesStore(args.path, args.state)
+
+    if args.command == 'append':
+        observations = (obs for obs in map(observation, iter_latest_records(args.jsonl)) if obs)
+        print(json.dumps(store.append(observations, args.crawl)))
+    elif args.command == 'history':
+        for point in store.history(args.id):
+            print(json.dumps(point))
+    else:
+        print(json.dumps(store.trends(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+HTTP transports for the Avtotemir.az scraper session
+Mounts a connection pool sized to the scraper's concurrency, with TCP
+keep-alive on idle connections, or an optional httpx client that multiplexes
+listing, profile and phone requests over a few HTTP/2 connections. Both
+count requests and new connections, so connection reuse can be checked.
+
+Transports:
+    pooled - requests/urllib3 HTTP/1.1 keep-alive pool (default)
+    http2  - httpx client with HTTP/2 (requires httpx and h2; HTTP/1.1 with httpx alone)
+"""
+
+import logging
+import socket
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.connection import HTTPConnection
+
+try:
+    import httpx
+except ImportError:  # the http2 transport is optional
+    httpx = None
+
+try:
+    import h2  # noqa: F401 (httpx needs it for HTTP/2)
+except ImportError:
+    h2 = None
+
+logger = logging.getLogger(__name__)
+
+TRANSPORTS = ('pooled', 'http2')
+
+# Connection-specific headers requests adds; HTTP/2 forbids them and httpx manages its own
+HOP_BY_HOP_HEADERS = ('connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade')
+
+# http.client protocol versions as reported by urllib3 responses
+HTTP_VERSIONS = {10: 'HTTP/1.0', 11: 'HTTP/1.1'}
+
+# Probe idle connections so rate-limit pauses do not let middleboxes drop them
+KEEPALIVE_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+for _option, _value in (('TCP_KEEPIDLE', 30), ('TCP_KEEPINTVL', 10), ('TCP_KEEPCNT', 3)):
+    if hasattr(socket, _option):
+        KEEPALIVE_SOCKET_OPTIONS.append((socket.IPPROTO_TCP, getattr(socket, _option), _value))
+
+
+def _reuse_stats(transport: str, pool_size: int, requests_sent: int, connections: int,
+                 versions: Dict[str, int]) -> Dict:
+    return {
+        'transport': transport,
+        'pool_size': pool_size,
+        'requests': requests_sent,
+        'connections_opened': connections,
+        'reused_requests': max(0, requests_sent - connections),
+        'requests_per_connection': round(requests_sent / connections, 2) if connections else None,
+        'http_versions': versions,
+    }
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTP/1.1 keep-alive adapter with one pool of pool_size connections per host
+
+    requests' default keeps 10 connections per host; with more concurrent
+    requests, every extra connection is opened, used once and discarded.
+    """
+
+    def __init__(self, pool_size: int = 10, **kwargs):
+        """
+        Args:
+            pool_size: Connections kept open per host (at least the number of requests in flight)
+        """
+        self.pool_size = pool_size
+        self._requests = 0
+        self._connections = 0
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        super().__init__(pool_connections=4, pool_maxsize=pool_size, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = KEEPALIVE_SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+        # Count every TCP connect, including urllib3 reconnecting a connection the server closed
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: type(pool.__name__, (pool,), {'ConnectionCls': self._counting(pool.ConnectionCls)})
+            for scheme, pool in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def _counting(self, connection_class):
+        adapter = self
+
+        class CountingConnection(connection_class):
+            def connect(self):
+                super().connect()
+                with adapter._lock:
+                    adapter._connections += 1
+
+        return CountingConnection
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        version = HTTP_VERSIONS.get(getattr(response.raw, 'version', None), 'other')
+        with self._lock:
+            self._requests += 1
+            self._versions[version] = self._versions.get(version, 0) + 1
+        return response
+
+    def stats(self) -> Dict:
+        """Requests sent and connections opened over the pools of every host"""
+        with self._lock:
+            return _reuse_stats('pooled', self.pool_size, self._requests, self._connections, dict(self._versions))
+
+
+class HttpxAdapter(BaseAdapter):
+    """
+    Adapter sending requests through one httpx client, over HTTP/2 when h2 is installed
+
+    HTTP/2 multiplexes concurrent requests to a host over a single connection,
+    so the scraper's workers share one TLS handshake. Redirects are followed
+    by httpx; cookies are kept by the httpx client.
+    """
+
+    def __init__(self, pool_size: int = 10, http2: bool = True):
+        """
+        Args:
+            pool_size: Maximum connections (HTTP/1.1) or keep-alive connections across hosts
+            http2: Negotiate HTTP/2 (falls back to HTTP/1.1 without the h2 package)
+        """
+        if httpx is None:
+            raise ImportError('The http2 transport requires httpx: pip install "httpx[http2]"')
+        super().__init__()
+        if http2 and h2 is None:
+            logger.warning('h2 is not installed; the httpx transport uses HTTP/1.1 (pip install "httpx[http2]")')
+            http2 = False
+        self.pool_size = pool_size
+        self.client = httpx.Client(
+            http2=http2,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+        self._requests = 0
+        self._connections = 0
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _trace(self, event: str, info: Dict):
+        # httpcore reports a TCP connect for every new connection
+        if event == 'connection.connect_tcp.complete':
+            with self._lock:
+                self._connections += 1
+
+    @staticmethod
+    def _timeout(timeout) -> Optional['httpx.Timeout']:
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        try:
+            reply = self.client.request(
+                request.method,
+                request.url,
+                headers=[(name, value) for name, value in request.headers.items()
+                         if name.lower() not in HOP_BY_HOP_HEADERS],
+                content=request.body,
+                timeout=self._timeout(timeout),
+                extensions={'trace': self._trace}
+            )
+        except httpx.ConnectTimeout as e:
+            raise requests.exceptions.ConnectTimeout(e, request=request)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.ReadTimeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(e, request=request)
+
+        with self._lock:
+            self._requests += 1
+            self._versions[reply.http_version] = self._versions.get(reply.http_version, 0) + 1
+
+        response = requests.Response()
+        response.status_code = reply.status_code
+        response.reason = reply.reason_phrase
+        # httpx already decoded the body, so the encoding headers no longer apply
+        response.headers = CaseInsensitiveDict(
+            (name, value) for name, value in reply.headers.items()
+            if name.lower() not in ('content-encoding', 'content-length')
+        )
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = str(reply.url)
+        response.request = request
+        response.elapsed = reply.elapsed
+        response.connection = self
+        response._content = reply.content
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        self.client.close()
+
+    def stats(self) -> Dict:
+        """Requests sent and connections opened by the httpx client"""
+        with self._lock:
+            return _reuse_stats('http2', self.pool_size, self._requests, self._connections, dict(self._versions))
+
+
+def http2_available() -> bool:
+    """Whether the http2 transport can be used (httpx is installed)"""
+    return httpx is not None
+
+
+def mount_transport(session: requests.Session, transport: str = 'pooled', pool_size: int = 10) -> BaseAdapter:
+    """
+    Mount a sized transport on the session for http:// and https://
+
+    Args:
+        session: Session to mount on
+        transport: One of TRANSPORTS
+        pool_size: Connections kept per host; at least the number of requests in flight
+
+    Returns:
+        The mounted adapter, whose stats() reports connection reuse
+    """
+    if transport == 'http2':
+        adapter = HttpxAdapter(pool_size=pool_size)
+    elif transport == 'pooled':
+        adapter = PooledAdapter(pool_size=pool_size)
+    else:
+        raise ValueError(f"Unknown transport {transport!r}; choose from {', '.join(TRANSPORTS)}")
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return adapter
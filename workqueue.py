@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Shared work queue for crawling avtotemir.az from several processes or machines
+A coordinator seeds listing page ranges into a SQLite file; workers lease page
+ranges and master IDs, keep their leases alive with heartbeats and report
+scraped masters into a results table deduplicated by master ID
+
+Tables:
+    items   - one row per page range ('pages') or listing entry ('master');
+              state is pending, leased, done, failed or cancelled
+    workers - registered workers and their last heartbeat
+    results - latest scraped record of every master
+    meta    - the detected end of the listings
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    page INTEGER,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL,
+    UNIQUE (kind, key)
+);
+CREATE INDEX IF NOT EXISTS idx_items_kind_state ON items(kind, state, page);
+CREATE INDEX IF NOT EXISTS idx_items_worker ON items(worker, state);
+
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    host TEXT,
+    pid INTEGER,
+    started_at REAL,
+    heartbeat_at REAL,
+    done INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS results (
+    master_id TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    worker TEXT,
+    updated_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Work still to be done; leased items count until they complete or their lease expires
+OUTSTANDING = ('pending', 'leased')
+
+
+class WorkQueue:
+    """
+    Lease-based work queue in a SQLite file shared by a coordinator and its workers
+
+    Leasing runs in an immediate transaction, so two workers never receive the
+    same item. A leased item whose worker stops heartbeating is handed out
+    again once its lease expires, up to max_attempts times.
+    """
+
+    def __init__(self, path: str = 'crawl_queue.db', max_attempts: int = 3):
+        """
+        Args:
+            path: SQLite database file (on a filesystem every worker can reach)
+            max_attempts: Leases of an item before it is marked failed
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _transaction(self, sql_statements):
+        """Run (sql, params) pairs in one write transaction"""
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                for sql, params in sql_statements:
+                    self.conn.execute(sql, params)
+                self.conn.execute('COMMIT')
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def seed_pages(self, start_page: int, max_pages: int, range_size: int = 10) -> int:
+        """
+        Queue listing pages start_page..start_page + max_pages - 1 in ranges
+
+        Seeding is idempotent: ranges already in the queue are left as they are.
+
+        Returns:
+            Number of ranges added
+        """
+        now = time.time()
+        last_page = start_page + max_pages - 1
+        ranges = []
+        for first in range(start_page, last_page + 1, range_size):
+            last = min(first + range_size - 1, last_page)
+            ranges.append((f"{first}-{last}", first, json.dumps({'start': first, 'end': last}), now))
+
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.execute('BEGIN IMMEDIATE')
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO items (kind, key, page, payload, updated_at) VALUES ('pages', ?, ?, ?, ?)",
+                ranges
+            )
+            self.conn.execute('COMMIT')
+            added = self.conn.total_changes - before
+        logger.info(f"Queued {added} page ranges of {range_size} pages ({start_page}-{last_page})")
+        return added
+
+    def add_masters(self, page: int, masters: List[Dict[str, str]]) -> int:
+        """
+        Queue listing entries for profile scraping; entries already queued are ignored
+
+        Returns:
+            Number of new entries
+        """
+        now = time.time()
+        rows = [
+            (str(master['id'] or master['url']), page, json.dumps(master, ensure_ascii=False), now)
+            for master in masters
+        ]
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.execute('BEGIN IMMEDIATE')
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO items (kind, key, page, payload, updated_at) VALUES ('master', ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.execute('COMMIT')
+            return self.conn.total_changes - before
+
+    def lease(self, worker: str, limit: int, lease_seconds: float = 120.0) -> List[Dict]:
+        """
+        Lease up to limit listing entries, plus one page range when there are fewer entries
+
+        Pending items and items whose lease expired are eligible; expired items
+        that used up their attempts are marked failed instead.
+
+        Returns:
+            Items as dictionaries with id, kind, key, page, attempts and the decoded payload
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                self.conn.execute(
+                    "UPDATE items SET state = 'failed', error = COALESCE(error, 'lease expired'), updated_at = ? "
+                    "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, now, self.max_attempts)
+                )
+                eligible = (
+                    "SELECT id, kind, key, page, payload, attempts FROM items WHERE kind = ? "
+                    "AND (state = 'pending' OR (state = 'leased' AND lease_expires < ?)) ORDER BY page, id LIMIT ?"
+                )
+                rows = self.conn.execute(eligible, ('master', now, limit)).fetchall()
+                if len(rows) < limit:
+                    # One range at a time keeps listing discovery spread over the workers
+                    rows += self.conn.execute(eligible, ('pages', now, 1)).fetchall()
+                self.conn.executemany(
+                    "UPDATE items SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                    "updated_at = ? WHERE id = ?",
+                    [(worker, now + lease_seconds, now, row['id']) for row in rows]
+                )
+                self.conn.execute('COMMIT')
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+
+        return [
+            {'id': row['id'], 'kind': row['kind'], 'key': row['key'], 'page': row['page'],
+             'attempts': row['attempts'] + 1, 'payload': json.loads(row['payload'])}
+            for row in rows
+        ]
+
+    def complete(self, item: Dict, worker: str, records: Optional[List[Dict]] = None) -> bool:
+        """
+        Mark a leased item done and store its scraped records in one transaction
+
+        Records are upserted by master ID, so a master scraped twice (e.g. after
+        a lease expired while its first worker was still busy) is stored once.
+
+        Returns:
+            False if the lease was lost to another worker; the records are stored anyway
+        """
+        now = time.time()
+        statements = [
+            ("INSERT INTO results (master_id, record, worker, updated_at) VALUES (?, ?, ?, ?) "
+             "ON CONFLICT(master_id) DO UPDATE SET record = excluded.record, worker = excluded.worker, "
+             "updated_at = excluded.updated_at",
+             (str(record['id']), json.dumps(record, ensure_ascii=False), worker, now))
+            for record in records or [] if record.get('id')
+        ]
+        statements.append((
+            "UPDATE items SET state = 'done', error = NULL, updated_at = ? WHERE id = ? AND worker = ? "
+            "AND state = 'leased'",
+            (now, item['id'], worker)
+        ))
+        statements.append(('UPDATE workers SET done = done + 1 WHERE id = ?', (worker,)))
+        self._transaction(statements)
+        with self._lock:
+            owned = self.conn.execute(
+                "SELECT 1 FROM items WHERE id = ? AND worker = ? AND state = 'done'", (item['id'], worker)
+            ).fetchone()
+        return owned is not None
+
+    def fail(self, item: Dict, worker: str, error: str):
+        """Release a leased item for another attempt, or mark it failed after max_attempts"""
+        state = 'failed' if item['attempts'] >= self.max_attempts else 'pending'
+        self._transaction([(
+            "UPDATE items SET state = ?, error = ?, lease_expires = NULL, updated_at = ? "
+            "WHERE id = ? AND worker = ? AND state = 'leased'",
+            (state, error, time.time(), item['id'], worker)
+        )])
+
+    def mark_end(self, page: int):
+        """Record the end of the listings and cancel page ranges starting after it"""
+        end = self.end_page()
+        if end is not None and end <= page:
+            return
+        self._transaction([
+            ("INSERT OR REPLACE INTO meta (key, value) VALUES ('end_page', ?)", (str(page),)),
+            ("UPDATE items SET state = 'cancelled', updated_at = ? "
+             "WHERE kind = 'pages' AND state = 'pending' AND page > ?", (time.time(), page)),
+        ])
+        logger.info(f"End of listings at page {page}; later page ranges cancelled")
+
+    def end_page(self) -> Optional[int]:
+        """Last listing page, once a worker found the end"""
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'end_page'").fetchone()
+        return int(row['value']) if row else None
+
+    def register(self, worker: str):
+        """Register a worker and its first heartbeat"""
+        now = time.time()
+        self._transaction([(
+            'INSERT OR REPLACE INTO workers (id, host, pid, started_at, heartbeat_at) VALUES (?, ?, ?, ?, ?)',
+            (worker, socket.gethostname(), os.getpid(), now, now)
+        )])
+
+    def heartbeat(self, worker: str, lease_seconds: float = 120.0):
+        """Record that a worker is alive and extend the leases it holds"""
+        now = time.time()
+        self._transaction([
+            ('UPDATE workers SET heartbeat_at = ? WHERE id = ?', (now, worker)),
+            ("UPDATE items SET lease_expires = ? WHERE worker = ? AND state = 'leased'",
+             (now + lease_seconds, worker)),
+        ])
+
+    def outstanding(self) -> int:
+        """Items pending or leased"""
+        with self._lock:
+            return self.conn.execute(
+                f"SELECT COUNT(*) FROM items WHERE state IN ({', '.join('?' * len(OUTSTANDING))})", OUTSTANDING
+            ).fetchone()[0]
+
+    def status(self, stale_after: float = 120.0) -> Dict:
+        """Item counts by kind and state, results and workers with their heartbeat age"""
+        now = time.time()
+        with self._lock:
+            counts = {}
+            for row in self.conn.execute('SELECT kind, state, COUNT(*) AS n FROM items GROUP BY kind, state'):
+                counts.setdefault(row['kind'], {})[row['state']] = row['n']
+            results = self.conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            workers = [
+                {'id': row['id'], 'host': row['host'], 'pid': row['pid'], 'done': row['done'],
+                 'heartbeat_age': round(now - row['heartbeat_at'], 1),
+                 'alive': now - row['heartbeat_at'] < stale_after}
+                for row in self.conn.execute('SELECT * FROM workers ORDER BY started_at')
+            ]
+        return {'items': counts, 'results': results, 'end_page': self.end_page(), 'workers': workers}
+
+    def iter_results(self) -> Iterator[Dict]:
+        """Latest scraped record of every master, in master ID order"""
+        with self._lock:
+            rows = self.conn.execute('SELECT record FROM results ORDER BY master_id').fetchall()
+        for row in rows:
+            yield json.loads(row['record'])
+
+
+class CrawlWorker:
+    """
+    Worker leasing page ranges and listing entries from a WorkQueue
+
+    Page ranges are walked with the scraper's listing logic and their entries
+    queued for profile scraping; listing entries are scraped (profile and
+    phones) concurrently with the scraper's workers and rate budget. A
+    background thread heartbeats while the worker runs.
+    """
+
+    def __init__(self, scraper, queue: WorkQueue, worker_id: Optional[str] = None,
+                 batch_size: Optional[int] = None, lease_seconds: float = 120.0, poll_interval: float = 2.0):
+        """
+        Args:
+            scraper: AvtotemirScraper used for fetching and parsing
+            queue: Shared work queue
+            worker_id: Unique worker name (default: host-pid-random)
+            batch_size: Items leased at a time (default: twice the scraper's workers)
+            lease_seconds: Lease length; heartbeats renew it every third of this
+            poll_interval: Seconds to wait when no item is available but others are still leased
+        """
+        self.scraper = scraper
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.batch_size = batch_size or scraper.workers * 2
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.pages_done = 0
+        self.masters_done = 0
+        self._stop = threading.Event()
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                self.queue.heartbeat(self.worker_id, self.lease_seconds)
+            except sqlite3.Error as e:
+                logger.warning(f"Heartbeat failed: {e}")
+
+    def run(self) -> int:
+        """
+        Process items until the queue has no pending or leased work left
+
+        Returns:
+            Number of masters this worker scraped
+        """
+        self.queue.register(self.worker_id)
+        heartbeat = threading.Thread(target=self._heartbeat, name='heartbeat', daemon=True)
+        heartbeat.start()
+        logger.info(f"Worker {self.worker_id} started")
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.scraper.workers) as executor:
+                while True:
+                    items = self.queue.lease(self.worker_id, self.batch_size, self.lease_seconds)
+                    if not items:
+                        if not self.queue.outstanding():
+                            break
+                        time.sleep(self.poll_interval)
+                        continue
+
+                    for item in items:
+                        if item['kind'] == 'pages':
+                            self.process_pages(item)
+
+                    masters = [item for item in items if item['kind'] == 'master']
+                    for item, master_data in zip(masters, executor.map(self.scrape, masters)):
+                        if master_data:
+                            self.scraper.add_master(master_data)
+                            self.queue.complete(item, self.worker_id, [master_data])
+                            self.masters_done += 1
+                        else:
+                            self.queue.fail(item, self.worker_id, 'profile failed')
+        finally:
+            self._stop.set()
+            heartbeat.join()
+
+        logger.info(f"Worker {self.worker_id} finished: {self.pages_done} pages, {self.masters_done} masters")
+        return self.masters_done
+
+    def scrape(self, item: Dict) -> Dict:
+        """Scrape one leased listing entry, {} on failure"""
+        try:
+            return self.scraper._scrape_master(item['payload'])
+        except Exception as e:
+            logger.error(f"Unexpected error scraping {item['payload'].get('url')}: {e}")
+            return {}
+
+    def process_pages(self, item: Dict):
+        """Walk a leased page range and queue the masters it lists"""
+        start, end = item['payload']['start'], item['payload']['end']
+        end_page = self.queue.end_page()
+        if end_page is not None and start > end_page:
+            self.queue.complete(item, self.worker_id)
+            return
+
+        self.scraper.reached_end = False
+        try:
+            for page, masters in self.scraper.iter_listings(start, end, end):
+                added = self.queue.add_masters(page, masters)
+                self.pages_done += 1
+                logger.info(f"Page {page}: queued {added} new of {len(masters)} masters")
+        except Exception as e:
+            logger.error(f"Listing pages {start}-{end} failed: {e}")
+            self.queue.fail(item, self.worker_id, str(e))
+            return
+
+        if self.scraper.failed_pages:
+            # Release the range for another lease; a failed fetch says nothing about the end of the listings
+            failed = ', '.join(map(str, self.scraper.failed_pages))
+            logger.warning(f"Listing pages {start}-{end}: fetching page(s) {failed} failed")
+            self.queue.fail(item, self.worker_id, f"listing pages failed: {failed}")
+            return
+        if self.scraper.reached_end:
+            self.queue.mark_end(end)
+        self.queue.complete(item, self.worker_id)